@@ -1,4 +1,12 @@
+import logging
+
 import streamlit as st
+from streamlit_gsheets import GSheetsConnection
+from functools import partial
+from utils.insight import openai_client
+from utils.pipeline import model_pool
+from utils.scheduler import ensure_scheduler, refresh_snapshots
+from utils.storage import get_storage
 
 st.set_page_config(
     page_title="Peramalan Volume Penjualan ReadyMix",
@@ -6,6 +14,26 @@ st.set_page_config(
     layout="wide"
 )
 
+logger = logging.getLogger(__name__)
+
+
+def scheduled_refresh(storage):
+    """Job scheduler; secrets dibaca saat job berjalan, bukan setiap rerun halaman."""
+    try:
+        scraping_key = st.secrets['scraping']['api_key']
+        openai_key = st.secrets['openai']['api_key']
+    except (KeyError, FileNotFoundError):
+        logger.warning("Refresh terjadwal dilewati: secrets [scraping] atau [openai] api_key belum diatur")
+        return None
+    return refresh_snapshots(storage, scraping_key, client=partial(openai_client, openai_key))
+
+
+model_pool.warm()
+ensure_scheduler(partial(
+    scheduled_refresh,
+    get_storage(lambda: st.connection("gsheets", type=GSheetsConnection))
+))
+
 pages = st.navigation({
     "Main Menu": [
         st.Page("pages/home.py", title="Home", icon="🏠"),
@@ -16,7 +44,9 @@ pages = st.navigation({
     ],
     "Pengaturan": [
         st.Page("pages/pengaturan_data_sbb.py", title="Data SBB", icon="📄"),
-        st.Page("pages/pengaturan_data_vub.py", title="Data VUB", icon="📄")
+        st.Page("pages/pengaturan_data_vub.py", title="Data VUB", icon="📄"),
+        # Tidak tampil di menu; buka lewat /diagnostik.
+        st.Page("pages/diagnostik.py", title="Diagnostik", icon="🩺", url_path="diagnostik", visibility="hidden")
     ]
 })
 
@@ -0,0 +1,105 @@
+import importlib
+import os
+import shutil
+
+from benchmarks.data import API_KEY, apbn_budget, install_fixtures
+from utils import http_cache, insight, model_update, order_cache
+from utils.forecast_cache import forecast_cache
+from utils.indicators import allocate_apbn_infra, update_or_forecast_column
+from utils.forecasting import sarimax_forecast
+from utils.pipeline import INDICATOR_COLUMNS, UNITS, StageTimer, build_snapshot, refresh_indicators, run_refresh
+from utils.scraping import fetch_macro_indicators
+from utils.storage import MemoryBackend
+from utils.working_days import effective_working_days, get_calendar, get_effective_working_days
+
+
+CASES = {}
+NEEDS_MODEL = ("forecast_dashboard", "refresh")
+
+
+def case(name, heavy=False):
+    """Daftarkan fungsi `func(actuals, assumptions)` sebagai kasus benchmark.
+
+    Fungsi boleh mengembalikan durasi per tahap (detik) untuk dirinci di laporan.
+    """
+    def register(func):
+        CASES[name] = (func, heavy)
+        return func
+    return register
+
+
+def available(name):
+    return name not in NEEDS_MODEL or os.path.exists(UNITS["sbb"]["model"])
+
+
+def prepare():
+    """Pasang fixture dan muat paket berat lebih dulu agar waktu import tidak masuk pengukuran."""
+    install_fixtures(http_cache.default_cache)
+    for module in ("bs4", "pmdarima", "statsmodels.tsa.statespace.sarimax"):
+        importlib.import_module(module)
+
+
+def reset():
+    """Kosongkan semua cache agar setiap pengulangan diukur dalam kondisi dingin."""
+    for directory in (order_cache.ORDER_CACHE_DIR, model_update.MODEL_STATE_DIR, insight.INSIGHT_CACHE_DIR):
+        shutil.rmtree(directory, ignore_errors=True)
+    forecast_cache.clear()
+    get_calendar.cache_clear()
+
+
+@case("hari_kerja_per_bulan")
+def working_days_scalar(actuals, assumptions):
+    for periode in actuals.index:
+        get_effective_working_days(periode.year, periode.month)
+
+
+@case("hari_kerja_vektor")
+def working_days_vectorized(actuals, assumptions):
+    effective_working_days(actuals.index)
+
+
+@case("update_or_forecast_column")
+def merge_columns(actuals, assumptions):
+    latest = actuals.index.max()
+    history, scraped = actuals.iloc[:-3], actuals.iloc[-24:]
+    for col in INDICATOR_COLUMNS:
+        update_or_forecast_column(col, history[[col]], scraped[[col]], assumptions[[col]], latest)
+
+
+@case("alokasi_apbn")
+def apbn_allocation(actuals, assumptions):
+    allocate_apbn_infra(apbn_budget(), actuals)
+
+
+@case("scraping")
+def scraping(actuals, assumptions):
+    fetched = fetch_macro_indicators(actuals, API_KEY)
+    if fetched.errors:
+        raise RuntimeError(f"fixture scraping gagal: {fetched.errors}")
+    return fetched.durations
+
+
+@case("sarimax_forecast", heavy=True)
+def sarimax(actuals, assumptions):
+    sarimax_forecast(actuals["Inflasi"], steps=13, use_cache=False)
+
+
+@case("process_all_columns", heavy=True)
+def indicators(actuals, assumptions):
+    timer = StageTimer()
+    refresh_indicators(actuals, assumptions, API_KEY, start_year=actuals.index.year.min(), timer=timer)
+    return timer.durations
+
+
+@case("forecast_dashboard")
+def dashboard_forecast(actuals, assumptions):
+    return build_snapshot("sbb", actuals, assumptions)["durations"]
+
+
+@case("refresh", heavy=True)
+def refresh(actuals, assumptions):
+    storage = MemoryBackend({
+        "SBB": actuals.reset_index(),
+        "Forecasting SBB": assumptions.reset_index(),
+    })
+    return run_refresh(storage, "sbb", API_KEY, start_year=actuals.index.year.min()).durations
@@ -0,0 +1,70 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+API_KEY = "benchmark"
+LAST_PERIOD = "2025-08-01"
+
+FIXTURE_URLS = {
+    "bps_inflasi.json": f"https://webapi.bps.go.id/v1/api/view/domain/0000/model/statictable/lang/ind/id/915/key/{API_KEY}",
+    "bps_bi_rate.json": f"https://webapi.bps.go.id/v1/api/list/model/data/lang/ind/domain/0000/var/379/key/{API_KEY}?th=2020-2025",
+    "kemenkeu_apbn.json": "https://media.kemenkeu.go.id/SinglePage/custompage?p=/Pages/Home/Anggaran-Infrastruktur",
+    "bisnis_apbn.html": "https://ekonomi.bisnis.com/read/20240816/45/1791651/anggaran-infrastruktur-rp400-triliun-untuk-proyek-prioritas-di-2025-apa-saja",
+}
+
+
+def install_fixtures(cache):
+    """Isi `cache` (HttpCache) dengan respons rekaman agar scraper bisa berjalan offline."""
+    for name, url in FIXTURE_URLS.items():
+        with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+            body = f.read()
+        content_type = "application/json" if name.endswith(".json") else "text/html"
+        cache.put(url, body, content_type=content_type)
+
+
+def apbn_budget():
+    """Anggaran APBN infrastruktur tahunan dari fixture Kemenkeu, bentuknya sama dengan hasil scraper."""
+    with open(os.path.join(FIXTURES_DIR, "kemenkeu_apbn.json"), encoding="utf-8") as f:
+        content = json.load(f)["Data"]["Content"]
+    return pd.DataFrame({
+        "Tahun": [int(item["Tahun"]) for item in content],
+        "APBN Infrastruktur": [float(item["Jumlah"].replace(",", ".")) for item in content],
+    })
+
+
+def make_dataset(years=10, width=0, seed=0, end=LAST_PERIOD):
+    """Dataset bulanan sintetis dengan kolom yang sama seperti worksheet unit, ditambah `width` kolom ekstra.
+
+    Mengembalikan (actuals, assumptions) dengan indeks Periode, seperti hasil `reload_df`.
+    """
+    rng = np.random.default_rng(seed)
+    index = pd.date_range(end=end, periods=years * 12, freq="MS", name="Periode")
+    n = len(index)
+    t = np.arange(n)
+    season = np.sin(2 * np.pi * index.month.values / 12)
+
+    actuals = pd.DataFrame({
+        "Tahun": index.year,
+        "Bulan": index.month,
+        "Volume": 60000 + 150 * t / 12 + 12000 * season + rng.normal(0, 3000, n),
+        "Forecasting": np.nan,
+        "BI Rate": np.round(0.055 + 0.01 * np.sin(t / 15) + rng.normal(0, 0.001, n), 4),
+        "Inflasi": np.round(0.03 + 0.01 * np.cos(t / 9) + rng.normal(0, 0.002, n), 4),
+        "APBN Infra": 20 + 8 * season + rng.normal(0, 1, n),
+        "PDB Konstruksi": np.round(0.05 + rng.normal(0, 0.01, n), 4),
+        "Effective Working Days": rng.integers(17, 23, n).astype(float),
+    }, index=index)
+    for i in range(width):
+        actuals[f"Ekstra {i + 1}"] = rng.normal(0, 1, n)
+
+    future = pd.date_range(start=index.max() + pd.DateOffset(months=1), periods=13, freq="MS", name="Periode")
+    assumptions = pd.DataFrame({
+        col: actuals[col].iloc[-13:].values
+        for col in ["BI Rate", "Inflasi", "PDB Konstruksi", "APBN Infra", "Effective Working Days"]
+    }, index=future)
+    assumptions["Forecasting"] = np.nan
+    return actuals, assumptions
@@ -0,0 +1,204 @@
+"""Benchmark pipeline refresh dan peramalan, sepenuhnya offline.
+
+Data memakai dataset sintetis (`benchmarks.data.make_dataset`), respons scraper diputar ulang dari
+`benchmarks/fixtures`, dan penyimpanan memakai `MemoryBackend`. Semua cache diarahkan ke direktori
+sementara dan dikosongkan sebelum setiap pengulangan.
+
+Contoh:
+    python -m benchmarks.run --quick --save-baseline
+    python -m benchmarks.run --quick
+    python -m benchmarks.run --years 5 20 50 --width 0 20 --repeat 3 --case process_all_columns
+
+Tanpa `--save-baseline`, hasil dibandingkan dengan baseline dan perintah keluar dengan status 1
+jika ada kasus yang lebih lambat atau lebih boros memori melebihi toleransi, atau jika ada kasus
+yang belum punya baseline (kecuali dengan `--allow-new`). Baseline bergantung pada mesin, jadi
+buat dulu dengan `--save-baseline` di mesin yang dipakai untuk membandingkan.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+MIN_DELTA_MS = 5.0
+MIN_DELTA_MB = 1.0
+
+
+def configure_environment(workdir):
+    """Arahkan semua cache ke `workdir` dan aktifkan mode offline; harus dipanggil sebelum mengimpor utils."""
+    for name, sub in [
+        ("HTTP_CACHE_DIR", "http"), ("ORDER_CACHE_DIR", "order_selection"), ("MODEL_STATE_DIR", "model_state"),
+        ("INSIGHT_CACHE_DIR", "insight"), ("SNAPSHOT_DIR", "snapshots"), ("LOCAL_STORE_PATH", "store.sqlite"),
+    ]:
+        os.environ[name] = os.path.join(workdir, sub)
+    os.environ["HTTP_CACHE_OFFLINE"] = "1"
+    os.environ.setdefault("FORECAST_WORKERS", "1")
+
+
+def measure(func, reset, actuals, assumptions, repeat, memory):
+    walls, stages = [], {}
+    for _ in range(repeat):
+        reset()
+        start = time.perf_counter()
+        stages = func(actuals, assumptions) or {}
+        walls.append(time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        reset()
+        tracemalloc.start()
+        try:
+            func(actuals, assumptions)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "wall_ms": round(statistics.median(walls) * 1000, 2),
+        "min_ms": round(min(walls) * 1000, 2),
+        "peak_mb": round(peak / 2 ** 20, 2) if peak is not None else None,
+        "stages_ms": {stage: round(seconds * 1000, 2) for stage, seconds in stages.items()},
+    }
+
+
+def result_key(result):
+    return f"{result['case']}[years={result['years']},width={result['width']}]"
+
+
+def compare(results, baseline, tolerance):
+    """Tandai hasil yang lebih lambat/lebih boros dari baseline melebihi `tolerance` (proporsi)."""
+    regressions = []
+    for result in results:
+        base = baseline.get(result_key(result))
+        result["baseline_ms"] = base["wall_ms"] if base else None
+        result["ratio"] = round(result["wall_ms"] / base["wall_ms"], 2) if base and base["wall_ms"] else None
+        result["status"] = "TANPA BASELINE" if base is None else "ok"
+        if base is None:
+            continue
+
+        problems = []
+        if (result["wall_ms"] > base["wall_ms"] * (1 + tolerance)
+                and result["wall_ms"] - base["wall_ms"] > MIN_DELTA_MS):
+            problems.append(f"waktu {base['wall_ms']:.1f} -> {result['wall_ms']:.1f} ms")
+        if (result["peak_mb"] is not None and base.get("peak_mb") is not None
+                and result["peak_mb"] > base["peak_mb"] * (1 + tolerance)
+                and result["peak_mb"] - base["peak_mb"] > MIN_DELTA_MB):
+            problems.append(f"memori {base['peak_mb']:.1f} -> {result['peak_mb']:.1f} MB")
+        if problems:
+            result["status"] = "REGRESI"
+            regressions.append(f"{result_key(result)}: " + ", ".join(problems))
+    return regressions
+
+
+def missing_baseline(results):
+    return [result_key(result) for result in results if result["status"] == "TANPA BASELINE"]
+
+
+def load_baseline(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)["results"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def save_baseline(path, results):
+    baseline = load_baseline(path)
+    baseline.update({
+        result_key(r): {k: r[k] for k in ("wall_ms", "min_ms", "peak_mb", "stages_ms")}
+        for r in results
+    })
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": baseline,
+        }, f, indent=2, sort_keys=True)
+
+
+def print_report(results):
+    import pandas as pd
+
+    columns = ["case", "years", "width", "wall_ms", "min_ms", "peak_mb", "baseline_ms", "ratio", "status"]
+    print(pd.DataFrame(results).reindex(columns=columns).to_string(index=False))
+    for result in results:
+        if result["stages_ms"]:
+            stages = ", ".join(f"{stage} {ms:.1f}" for stage, ms in result["stages_ms"].items())
+            print(f"  {result_key(result)} tahap (ms): {stages}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pipeline peramalan ReadyMix (offline)")
+    parser.add_argument("--years", type=int, nargs="+", default=[5, 20, 50], help="Panjang dataset (tahun)")
+    parser.add_argument("--width", type=int, nargs="+", default=[0], help="Jumlah kolom ekstra")
+    parser.add_argument("--repeat", type=int, default=3, help="Jumlah pengulangan per kasus")
+    parser.add_argument("--case", action="append", help="Hanya jalankan kasus ini (boleh diulang)")
+    parser.add_argument("--quick", action="store_true", help="Lewati kasus berat yang melatih SARIMAX")
+    parser.add_argument("--no-memory", action="store_true", help="Jangan ukur puncak memori")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="File baseline JSON")
+    parser.add_argument("--save-baseline", action="store_true", help="Simpan hasil sebagai baseline")
+    parser.add_argument("--allow-new", action="store_true",
+                        help="Jangan gagal untuk kasus yang belum punya baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Toleransi regresi (0.25 = 25%%)")
+    parser.add_argument("--json", help="Tulis hasil lengkap ke file JSON ini")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="readymix-bench-")
+    configure_environment(workdir)
+
+    from benchmarks import cases
+    from benchmarks.data import make_dataset
+
+    names = args.case or list(cases.CASES)
+    unknown = set(names) - set(cases.CASES)
+    if unknown:
+        parser.error(f"kasus tidak dikenal: {', '.join(sorted(unknown))}")
+
+    cases.prepare()
+    results = []
+    for years in args.years:
+        for width in args.width:
+            actuals, assumptions = make_dataset(years=years, width=width)
+            for name in names:
+                func, heavy = cases.CASES[name]
+                if (heavy and args.quick) or not cases.available(name):
+                    continue
+                print(f"... {name} years={years} width={width}", file=sys.stderr)
+                result = measure(func, cases.reset, actuals, assumptions, args.repeat, not args.no_memory)
+                results.append(dict(result, case=name, years=years, width=width))
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results)
+        regressions, missing = [], []
+        for result in results:
+            result.update(baseline_ms=None, ratio=None, status="baseline")
+    else:
+        regressions = compare(results, load_baseline(args.baseline), args.tolerance)
+        missing = [] if args.allow_new else missing_baseline(results)
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if regressions:
+        print("\nREGRESI terdeteksi:", file=sys.stderr)
+        for line in regressions:
+            print(f"  {line}", file=sys.stderr)
+    if missing:
+        print(f"\nTidak ada baseline di {args.baseline} untuk:", file=sys.stderr)
+        for line in missing:
+            print(f"  {line}", file=sys.stderr)
+        print("Buat dengan --save-baseline, atau lewati pemeriksaan ini dengan --allow-new.", file=sys.stderr)
+    return 1 if regressions or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
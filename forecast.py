@@ -0,0 +1,319 @@
+"""Pembaruan data dan peramalan tanpa Streamlit, misalnya untuk dijalankan dari cron.
+
+Contoh:
+    python forecast.py refresh --unit sbb --horizon 12 --no-write
+    python forecast.py schedule --interval 21600
+    python forecast.py export-model --unit sbb
+    python forecast.py model register --unit sbb --artifact models/model_baru.pkl --promote
+    python forecast.py model rollback --unit sbb
+    python forecast.py backtest --unit sbb --min-train 36 --refit-every 6
+    python forecast.py select-features --unit sbb --criterion backtest --lags 0 1 --register
+"""
+import argparse
+import json
+import os
+import sys
+from functools import partial
+
+from dotenv import load_dotenv
+
+from utils.insight import openai_client
+from utils import model_registry
+from utils.backtest import MIN_TRAIN, REFIT_EVERY, backtest_unit
+from utils.feature_search import CRITERIA, MAX_BACKTEST, PRUNE_DELTA, register_features, search_unit
+from utils.forecasting import FORECAST_WORKERS
+from utils.pipeline import HORIZON, UNITS, export_model, model_pool
+from utils.scheduler import REFRESH_INTERVAL, RefreshScheduler, refresh_snapshots
+from utils.sheet_writer import sheet_writer
+from utils.storage import STORAGE_BACKEND, get_storage
+
+
+def gsheets_connection():
+    import streamlit as st
+    from streamlit_gsheets import GSheetsConnection
+
+    return st.connection("gsheets", type=GSheetsConnection)
+
+
+def scraping_api_key(value):
+    if value:
+        return value
+    if os.environ.get("SCRAPING_API_KEY"):
+        return os.environ["SCRAPING_API_KEY"]
+    import streamlit as st
+
+    return st.secrets["scraping"]["api_key"]
+
+
+def insight_client():
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if api_key is None:
+        import streamlit as st
+
+        try:
+            api_key = st.secrets["openai"]["api_key"]
+        except (FileNotFoundError, KeyError):
+            return None
+    return partial(openai_client, api_key)
+
+
+def print_progress(unit, done, total, col):
+    print(f"[{unit}] model {col} selesai ({done}/{total})", file=sys.stderr)
+
+
+def refresh(args):
+    storage = get_storage(gsheets_connection, args.backend)
+    snapshots, errors = refresh_snapshots(
+        storage, scraping_api_key(args.api_key), client=insight_client(), units=args.unit,
+        horizon=args.horizon, write=not args.no_write, start_year=args.start_year,
+        source="cli", progress=print_progress
+    )
+    for unit, snapshot in snapshots.items():
+        for message in snapshot["warnings"]:
+            print(f"[{unit}] peringatan: {message}", file=sys.stderr)
+    for unit, error in errors.items():
+        print(f"[{unit}] gagal: {error}", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps({
+            unit: {
+                "version": snapshot.get("version"),
+                "durations": {stage: round(seconds, 3) for stage, seconds in snapshot["durations"].items()},
+                "forecast": {f"{idx:%Y-%m}": float(value) for idx, value in snapshot["forecast"]["Forecasting"].items()},
+                "insight_source": snapshot["insight_source"],
+                "warnings": snapshot["warnings"],
+            }
+            for unit, snapshot in snapshots.items()
+        }, indent=2))
+    else:
+        for unit, snapshot in snapshots.items():
+            version = f" (snapshot v{snapshot['version']})" if "version" in snapshot else ""
+            print(f"== {UNITS[unit]['sheet']}{version}")
+            for stage, seconds in snapshot["durations"].items():
+                print(f"{stage:<20} {seconds:8.2f} s")
+            print(f"{'total':<20} {sum(snapshot['durations'].values()):8.2f} s")
+            print(snapshot["forecast"].to_string(float_format=lambda v: f"{v:,.0f}"))
+    return 1 if errors else 0
+
+
+def schedule(args):
+    storage = get_storage(gsheets_connection, args.backend)
+    job = partial(
+        refresh_snapshots, storage, scraping_api_key(args.api_key), client=insight_client(),
+        units=args.unit, horizon=args.horizon, start_year=args.start_year, progress=print_progress
+    )
+    scheduler = RefreshScheduler(job, args.interval).start()
+    try:
+        scheduler.join()
+    except KeyboardInterrupt:
+        scheduler.stop()
+    return 0
+
+
+def export_models(args):
+    status = 0
+    for unit in args.unit:
+        if not os.path.exists(UNITS[unit]["model"]):
+            print(f"[{unit}] dilewati: {UNITS[unit]['model']} tidak ada", file=sys.stderr)
+            continue
+        try:
+            stats = export_model(unit, steps=args.horizon)
+        except Exception as e:
+            print(f"[{unit}] gagal: {e}", file=sys.stderr)
+            status = 1
+            continue
+        print(
+            f"[{unit}] ukuran {stats['pickle_bytes'] / 1024:,.1f} KB -> {stats['compact_bytes'] / 1024:,.1f} KB, "
+            f"waktu muat {stats['pickle_seconds'] * 1000:,.1f} ms -> {stats['compact_seconds'] * 1000:,.1f} ms, "
+            f"selisih forecast {stats['difference']:g}"
+        )
+    return status
+
+
+def manage_models(args):
+    if args.action == "list":
+        table = model_registry.versions_table()
+        print(table.to_string(index=False) if not table.empty else "Registri model masih kosong.")
+        return 0
+
+    if not args.unit or len(args.unit) != 1:
+        print("Pilih tepat satu --unit", file=sys.stderr)
+        return 2
+    unit = args.unit[0]
+    try:
+        if args.action == "register":
+            if not args.artifact:
+                print("--artifact wajib untuk register", file=sys.stderr)
+                return 2
+            metadata = dict(model_registry.describe(model_registry.load_artifact(args.artifact)), catatan=args.note or "")
+            version = model_registry.register(unit, args.artifact, metadata=metadata,
+                                              promote=args.promote, copy=not args.no_copy)
+            print(f"[{unit}] terdaftar sebagai versi {version}" + (" (aktif)" if args.promote else ""))
+        elif args.action == "promote":
+            if args.version is None:
+                print("--version wajib untuk promote", file=sys.stderr)
+                return 2
+            model_registry.promote(unit, args.version)
+            print(f"[{unit}] versi {args.version} aktif")
+        else:
+            version = model_registry.previous_version(unit)
+            if version is None:
+                print(f"[{unit}] tidak ada versi sebelumnya", file=sys.stderr)
+                return 1
+            model_registry.promote(unit, version)
+            print(f"[{unit}] kembali ke versi {version}")
+    except (KeyError, FileNotFoundError) as e:
+        print(f"[{unit}] gagal: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def backtest(args):
+    storage = get_storage(gsheets_connection, args.backend)
+    status = 0
+    for unit in args.unit:
+        try:
+            result = backtest_unit(
+                storage, unit, horizon=args.horizon, min_train=args.min_train, refit_every=args.refit_every,
+                max_workers=args.workers, progress=lambda done, total: print(
+                    f"[{unit}] kelompok fold {done}/{total} selesai", file=sys.stderr)
+            )
+        except Exception as e:
+            print(f"[{unit}] gagal: {e}", file=sys.stderr)
+            status = 1
+            continue
+
+        print(f"== {UNITS[unit]['sheet']}: {result.computed} fold dihitung, {result.cached} dari cache, "
+              f"{result.duration:.1f} s")
+        print(result.metrics.to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+
+        version = model_pool.entry(unit)["version"]
+        if args.record and version:
+            model_registry.set_metrics(unit, version, {
+                "backtest_fold": int(result.folds["Asal"].nunique()),
+                "mape_1_bulan": round(result.metrics["MAPE (%)"].iloc[0], 2),
+                "mape_rata2": round(result.metrics["MAPE (%)"].mean(), 2),
+                "rmse_rata2": round(result.metrics["RMSE"].mean(), 1),
+                "bias_rata2": round(result.metrics["Bias"].mean(), 1),
+            })
+            print(f"Metrik dicatat di registri untuk versi {version}")
+    return status
+
+
+def select_features(args):
+    storage = get_storage(gsheets_connection, args.backend)
+    status = 0
+    for unit in args.unit:
+        try:
+            result = search_unit(
+                storage, unit, lags=tuple(args.lags), criterion=args.criterion, horizon=args.horizon,
+                min_train=args.min_train, refit_every=args.refit_every, max_workers=args.workers,
+                prune_delta=args.prune_delta, max_backtest=args.max_backtest,
+                progress=lambda stage, done, total: print(
+                    f"[{unit}] {stage}: {done}/{total} kandidat selesai", file=sys.stderr)
+            )
+        except Exception as e:
+            print(f"[{unit}] gagal: {e}", file=sys.stderr)
+            status = 1
+            continue
+
+        print(f"== {UNITS[unit]['sheet']}: {len(result.table)} kandidat, {result.computed} dihitung, "
+              f"{result.cached} dari cache, {result.pruned} dipangkas, {result.duration:.1f} s")
+        print(result.table.head(args.top).to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+        print(f"Fitur terbaik ({CRITERIA[args.criterion]}): {', '.join(result.best)}")
+
+        if args.register:
+            version = register_features(storage, unit, result.best, note=f"pemilihan fitur {args.criterion}",
+                                        promote=args.promote)
+            print(f"[{unit}] terdaftar sebagai versi {version}" + (" (aktif)" if args.promote else ""))
+    return status
+
+
+def main(argv=None):
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Peramalan volume penjualan ReadyMix tanpa Streamlit")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_refresh = commands.add_parser("refresh", help="Scraping indikator, forecast, lalu simpan hasil dan snapshot")
+    parser_schedule = commands.add_parser("schedule", help="Jalankan refresh berkala di proses ini")
+    for sub in (parser_refresh, parser_schedule):
+        sub.add_argument("--unit", choices=sorted(UNITS), action="append",
+                         help="Unit yang diperbarui (boleh diulang, default: semua)")
+        sub.add_argument("--horizon", type=int, default=HORIZON, help="Jumlah bulan peramalan volume")
+        sub.add_argument("--start-year", type=int, default=2020, help="Tahun awal data latih indikator")
+        sub.add_argument("--backend", default=STORAGE_BACKEND, help="Backend penyimpanan (lihat STORAGE_BACKEND)")
+        sub.add_argument("--api-key", help="API key BPS (default: SCRAPING_API_KEY atau secrets Streamlit)")
+
+    parser_refresh.add_argument("--no-write", action="store_true", help="Jangan tulis hasil maupun snapshot")
+    parser_refresh.add_argument("--json", action="store_true", help="Tampilkan hasil dan durasi sebagai JSON")
+    parser_refresh.set_defaults(func=refresh)
+
+    parser_schedule.add_argument("--interval", type=float, default=REFRESH_INTERVAL or 6 * 3600,
+                                 help="Jarak antar refresh dalam detik (default: REFRESH_INTERVAL, atau 21600 jika tidak diatur)")
+    parser_schedule.set_defaults(func=schedule)
+
+    parser_export = commands.add_parser("export-model", help="Ekspor model pickle ke artefak ringkas yang cepat dimuat")
+    parser_export.add_argument("--unit", choices=sorted(UNITS), action="append",
+                               help="Unit yang diekspor (boleh diulang, default: semua)")
+    parser_export.add_argument("--horizon", type=int, default=HORIZON, help="Jumlah bulan untuk verifikasi forecast")
+    parser_export.set_defaults(func=export_models)
+
+    parser_model = commands.add_parser("model", help="Kelola registri versi model (server memuat perubahan otomatis)")
+    parser_model.add_argument("action", choices=["list", "register", "promote", "rollback"])
+    parser_model.add_argument("--unit", choices=sorted(UNITS), action="append", help="Unit model")
+    parser_model.add_argument("--artifact", help="Path artefak (.pkl atau artefak ringkas) untuk register")
+    parser_model.add_argument("--version", type=int, help="Versi yang diaktifkan untuk promote")
+    parser_model.add_argument("--promote", action="store_true", help="Langsung aktifkan versi yang didaftarkan")
+    parser_model.add_argument("--no-copy", action="store_true", help="Daftarkan artefak di tempatnya tanpa menyalin")
+    parser_model.add_argument("--note", help="Catatan versi")
+    parser_model.set_defaults(func=manage_models)
+
+    parser_backtest = commands.add_parser("backtest", help="Evaluasi rolling-origin model volume aktif")
+    parser_backtest.add_argument("--unit", choices=sorted(UNITS), action="append",
+                                 help="Unit yang dievaluasi (boleh diulang, default: semua)")
+    parser_backtest.add_argument("--horizon", type=int, default=HORIZON, help="Jumlah bulan yang diramal per fold")
+    parser_backtest.add_argument("--min-train", type=int, default=MIN_TRAIN, help="Jumlah bulan data latih fold pertama")
+    parser_backtest.add_argument("--refit-every", type=int, default=REFIT_EVERY,
+                                 help="Estimasi ulang parameter setiap sekian fold")
+    parser_backtest.add_argument("--workers", type=int, default=FORECAST_WORKERS,
+                                 help="Jumlah proses paralel (default: FORECAST_WORKERS atau jumlah CPU)")
+    parser_backtest.add_argument("--backend", default=STORAGE_BACKEND, help="Backend penyimpanan (lihat STORAGE_BACKEND)")
+    parser_backtest.add_argument("--record", action="store_true", help="Catat ringkasan metrik di registri model")
+    parser_backtest.set_defaults(func=backtest)
+
+    parser_features = commands.add_parser("select-features",
+                                          help="Cari kombinasi indikator (dan lag) terbaik untuk model volume")
+    parser_features.add_argument("--unit", choices=sorted(UNITS), action="append",
+                                 help="Unit yang dievaluasi (boleh diulang, default: semua)")
+    parser_features.add_argument("--criterion", choices=sorted(CRITERIA), default="aic", help="Kriteria pemilihan")
+    parser_features.add_argument("--lags", type=int, nargs="+", default=[0],
+                                 help="Lag (bulan) yang dicoba untuk setiap indikator")
+    parser_features.add_argument("--horizon", type=int, default=HORIZON, help="Jumlah bulan yang diramal per fold backtest")
+    parser_features.add_argument("--min-train", type=int, default=MIN_TRAIN, help="Jumlah bulan data latih fold pertama")
+    parser_features.add_argument("--refit-every", type=int, default=REFIT_EVERY,
+                                 help="Estimasi ulang parameter setiap sekian fold")
+    parser_features.add_argument("--prune-delta", type=float, default=PRUNE_DELTA,
+                                 help="Selisih AIC maksimum dari yang terbaik agar kandidat ikut backtest")
+    parser_features.add_argument("--max-backtest", type=int, default=MAX_BACKTEST,
+                                 help="Jumlah maksimum kandidat yang di-backtest")
+    parser_features.add_argument("--workers", type=int, default=FORECAST_WORKERS,
+                                 help="Jumlah proses paralel (default: FORECAST_WORKERS atau jumlah CPU)")
+    parser_features.add_argument("--top", type=int, default=10, help="Jumlah kandidat teratas yang ditampilkan")
+    parser_features.add_argument("--backend", default=STORAGE_BACKEND, help="Backend penyimpanan (lihat STORAGE_BACKEND)")
+    parser_features.add_argument("--register", action="store_true",
+                                 help="Latih model dengan fitur terbaik dan daftarkan sebagai versi baru")
+    parser_features.add_argument("--promote", action="store_true", help="Langsung aktifkan versi yang didaftarkan")
+    parser_features.set_defaults(func=select_features)
+
+    args = parser.parse_args(argv)
+    if not args.unit and args.command != "model":
+        args.unit = sorted(UNITS)
+    status = args.func(args)
+    for sheet_name, error in sheet_writer.flush().items():
+        print(f"Gagal menulis {sheet_name}: {error}", file=sys.stderr)
+        status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+import hmac
+import os
+import sys
+from datetime import datetime
+
+import plotly.graph_objects as go
+import streamlit as st
+from streamlit_gsheets import GSheetsConnection
+from utils.feature_search import CRITERIA, get_search, register_features, start_search
+from utils.import_profile import loaded_stacks, profile_pages
+from utils.model_registry import load_manifest, previous_version, versions_table
+from utils.pipeline import UNITS, model_pool
+from utils.scheduler import get_scheduler, rebuild_snapshot_async
+from utils.snapshots import list_versions, load_snapshot
+from utils.storage import get_storage
+from utils.tracing import stage_stats, tracer, waterfall
+
+
+PAGES = ["pages/home.py", "pages/sbb.py", "pages/vub.py", "pages/pengaturan_data_sbb.py", "pages/pengaturan_data_vub.py"]
+
+
+def admin_token():
+    """Token untuk tombol yang mengubah state server; dari DIAGNOSTIK_TOKEN atau secrets [diagnostik] token."""
+    token = os.environ.get("DIAGNOSTIK_TOKEN")
+    if not token:
+        try:
+            token = st.secrets["diagnostik"]["token"]
+        except (KeyError, FileNotFoundError):
+            token = None
+    return token
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def run_profile(paths):
+    return profile_pages(paths)
+
+
+def waktu(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%d/%m/%Y %H:%M:%S") if timestamp else "-"
+
+
+def waterfall_chart(df):
+    labels = [f"{i:02d} " + "· " * depth + name for i, (depth, name) in enumerate(zip(df["Kedalaman"], df["Span"]))]
+    fig = go.Figure(go.Bar(
+        y=labels,
+        x=df["Durasi (ms)"],
+        base=df["Mulai (ms)"],
+        orientation="h",
+        marker_color=["#d62728" if error else "#1f77b4" for error in df["Error"]],
+        customdata=df[["CPU (ms)", "Byte", "Atribut"]].values,
+        hovertemplate="%{y}<br>mulai %{base:.1f} ms • durasi %{x:.1f} ms<br>"
+                      "CPU %{customdata[0]:.1f} ms • %{customdata[1]:,} byte<br>%{customdata[2]}<extra></extra>",
+    ))
+    fig.update_layout(
+        xaxis_title="Waktu sejak awal trace (ms)",
+        yaxis=dict(autorange="reversed", tickfont=dict(family="monospace")),
+        height=max(250, 24 * len(df) + 80),
+        margin=dict(l=10, r=10, t=10, b=40),
+    )
+    return fig
+
+
+@st.fragment(run_every=2)
+def search_progress(job):
+    if job.done.is_set():
+        st.rerun()
+    st.progress(
+        job.done_count / job.total if job.total else 0.0,
+        text=f"Tahap {job.stage or '-'}: {job.done_count}/{job.total} kandidat • mulai {waktu(job.started_at)}"
+    )
+
+
+st.title("🩺 Diagnostik")
+
+token = admin_token()
+if token is None:
+    admin = False
+    st.caption("🔒 Kontrol yang mengubah server nonaktif: atur DIAGNOSTIK_TOKEN atau `[diagnostik] token` di secrets.")
+else:
+    given = st.text_input("Token admin", type="password", help="Dibutuhkan untuk refresh, registri model, "
+                                                               "pemilihan fitur, dan profil import.")
+    admin = bool(given) and hmac.compare_digest(given.encode("utf-8"), str(token).encode("utf-8"))
+    if given and not admin:
+        st.error("Token salah.")
+
+st.subheader("Refresh Terjadwal")
+scheduler = get_scheduler()
+if scheduler is None:
+    st.write("Scheduler tidak aktif (REFRESH_INTERVAL = 0).")
+else:
+    st.write(
+        f"Terakhir mulai: {waktu(scheduler.last_started)} • selesai: {waktu(scheduler.last_finished)} • "
+        f"berikutnya: {waktu(scheduler.next_run)}"
+    )
+    if scheduler.last_result is not None:
+        for unit, error in scheduler.last_result[1].items():
+            st.warning(f"Refresh {unit.upper()} gagal: {error}")
+    if st.button("Jalankan Refresh Sekarang", disabled=not admin) and admin:
+        scheduler.run_now()
+        st.toast("Refresh dijadwalkan", icon="✅")
+
+rows = []
+for unit in sorted(UNITS):
+    snapshot = load_snapshot(unit)
+    if snapshot is None:
+        continue
+    rows.append({
+        "Unit": unit.upper(),
+        "Versi": snapshot["version"],
+        "Jumlah Versi": len(list_versions(unit)),
+        "Dibuat": waktu(snapshot["created_at"]),
+        "Sumber": snapshot.get("source", "-"),
+        "Insight": snapshot["insight_source"],
+        "Durasi (s)": round(sum(snapshot["durations"].values()), 2),
+    })
+st.dataframe(rows, use_container_width=True, hide_index=True)
+
+st.subheader("Registri Model")
+st.caption("Model aktif setiap unit dimuat sekali per proses; mengganti versi memuat model baru lalu menukarnya tanpa restart.")
+st.dataframe(model_pool.status(), use_container_width=True, hide_index=True)
+
+registry = versions_table()
+if registry.empty:
+    st.write("Registri model masih kosong. Daftarkan model dengan `python forecast.py model register`.")
+else:
+    st.dataframe(registry, use_container_width=True, hide_index=True)
+    manifest_units = load_manifest()["units"]
+    col_unit, col_version, col_promote, col_rollback = st.columns([2, 2, 1, 1])
+    unit = col_unit.selectbox("Unit model", sorted(manifest_units), format_func=str.upper)
+    version = col_version.selectbox("Versi", sorted(map(int, manifest_units[unit]["versions"]), reverse=True))
+    target = None
+    if col_promote.button("Aktifkan", use_container_width=True, disabled=not admin) and admin:
+        target = version
+    rollback_disabled = not admin or previous_version(unit) is None
+    if col_rollback.button("Rollback", use_container_width=True, disabled=rollback_disabled) and admin:
+        target = previous_version(unit)
+    if target is not None:
+        try:
+            with st.spinner(f"Memuat model {unit.upper()} versi {target}..."):
+                model_pool.promote(unit, target)
+            rebuild_snapshot_async(get_storage(lambda: st.connection("gsheets", type=GSheetsConnection)), unit)
+            st.toast(f"Model {unit.upper()} versi {target} aktif; snapshot sedang diperbarui", icon="✅")
+        except Exception as e:
+            st.error(f"❌ Gagal mengaktifkan versi {target}: {e}")
+
+st.subheader("Pemilihan Fitur")
+st.caption(
+    "Semua kombinasi indikator (beserta lag) dinilai dengan spesifikasi model aktif. Skor disimpan per data, "
+    "sehingga pemilihan ulang setelah data berubah hanya menghitung kandidat yang datanya berubah. "
+    "Dengan kriteria backtest, hanya kandidat dengan AIC mendekati yang terbaik yang di-backtest."
+)
+col_unit, col_criterion, col_lags = st.columns(3)
+feature_unit = col_unit.selectbox("Unit", sorted(UNITS), format_func=str.upper, key="feature_unit")
+criterion = col_criterion.selectbox("Kriteria", list(CRITERIA), format_func=CRITERIA.get)
+lags = col_lags.multiselect("Lag (bulan)", [0, 1, 2, 3], default=[0, 1])
+
+job = get_search(feature_unit)
+running = job is not None and not job.done.is_set()
+if st.button("Mulai Pemilihan Fitur", disabled=not admin or running or not lags) and admin:
+    storage = get_storage(lambda: st.connection("gsheets", type=GSheetsConnection))
+    job = start_search(storage, feature_unit, criterion=criterion, lags=tuple(sorted(lags)))
+    running = True
+
+if running:
+    search_progress(job)
+elif job is not None and job.error is not None:
+    st.error(f"❌ Pemilihan fitur {feature_unit.upper()} gagal: {job.error}")
+elif job is not None:
+    result = job.result
+    st.write(
+        f"Selesai {waktu(job.finished_at)} • {len(result.table)} kandidat, {result.computed} dihitung, "
+        f"{result.cached} dari cache, {result.pruned} dipangkas • {result.duration:.1f} s"
+    )
+    st.dataframe(result.table.head(20).round(2), use_container_width=True, hide_index=True)
+    st.markdown(f"**Fitur terbaik ({CRITERIA[result.criterion]}):** {', '.join(result.best)}")
+    if result.table.loc[0, "Aktif"]:
+        st.info("Model aktif sudah memakai fitur terbaik.")
+    else:
+        activate = st.checkbox("Langsung aktifkan versi baru")
+        if st.button("Daftarkan Model dengan Fitur Terbaik", disabled=not admin) and admin:
+            storage = get_storage(lambda: st.connection("gsheets", type=GSheetsConnection))
+            try:
+                with st.spinner(f"Melatih model {feature_unit.upper()}..."):
+                    version = register_features(storage, feature_unit, result.best,
+                                                 note=f"pemilihan fitur {result.criterion}")
+                    if activate:
+                        model_pool.promote(feature_unit, version)
+                if activate:
+                    rebuild_snapshot_async(storage, feature_unit)
+                st.toast(f"Model {feature_unit.upper()} versi {version} terdaftar"
+                         + ("; snapshot sedang diperbarui" if activate else ""), icon="✅")
+            except Exception as e:
+                st.error(f"❌ Gagal mendaftarkan model: {e}")
+
+st.subheader("Trace Terbaru")
+st.caption(
+    f"Span terakhir yang tercatat di proses server ini (maksimal {tracer.size} trace per jenis). "
+    "CPU adalah waktu CPU thread yang menjalankan span; byte adalah data yang dibaca/dikirim."
+)
+names = tracer.names()
+if not names:
+    st.write("Belum ada trace. Buka dashboard atau jalankan refresh terlebih dahulu.")
+else:
+    col_name, col_clear = st.columns([4, 1])
+    name = col_name.selectbox("Jenis trace", names)
+    if col_clear.button("Hapus Trace", disabled=not admin) and admin:
+        tracer.clear()
+        st.rerun()
+
+    traces = tracer.traces(name)
+    st.markdown(f"**Durasi per span dari {len(traces)} trace terakhir**")
+    st.dataframe(stage_stats(traces).round(1), use_container_width=True, hide_index=True)
+
+    selected = st.selectbox(
+        "Waterfall trace", list(reversed(traces)),
+        format_func=lambda t: f"{waktu(t.started_at)} • {t.wall * 1000:,.0f} ms"
+                              + (f" • {', '.join(f'{k}={v}' for k, v in t.attrs.items())}" if t.attrs else "")
+                              + (" • gagal" if t.error else "")
+    )
+    detail = waterfall(selected)
+    st.plotly_chart(waterfall_chart(detail), use_container_width=True)
+    with st.expander("Detail span"):
+        st.dataframe(detail.round(1), use_container_width=True, hide_index=True)
+
+st.subheader("Stack yang Sudah Dimuat di Server")
+stacks = loaded_stacks(sys.modules)
+st.write(", ".join(stacks) if stacks else "Belum ada stack berat yang dimuat.")
+
+st.subheader("Profil Waktu Import Halaman")
+st.caption(
+    "Setiap halaman diimpor ulang di interpreter baru dengan `python -X importtime`; "
+    "angka menunjukkan biaya import tingkat modul sebelum halaman mulai dirender."
+)
+
+if st.button("Jalankan Profil Import", type="primary", disabled=not admin) and admin:
+    run_profile.clear()
+    st.session_state["import_profile"] = True
+
+if st.session_state.get("import_profile"):
+    with st.spinner("Mengukur waktu import..."):
+        summary, reports = run_profile(tuple(p for p in PAGES if os.path.exists(p)))
+
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+
+    if reports:
+        page = st.selectbox("Detail halaman", list(reports))
+        top_n = st.slider("Jumlah modul", 10, 100, 25)
+        report = reports[page].sort_values("Kumulatif (ms)", ascending=False).head(top_n)
+        st.dataframe(report, use_container_width=True, hide_index=True)
@@ -1,461 +1,53 @@
 import streamlit as st
 from streamlit_gsheets import GSheetsConnection
 import pandas as pd
-import requests
-import pmdarima as pm
-from statsmodels.tsa.statespace.sarimax import SARIMAX
-import itertools
-from tqdm import tqdm
-import html
-from bs4 import BeautifulSoup
-import json, re
-import holidays
-from datetime import date, timedelta
 import time
+from utils import order_cache
+from utils.data_cache import dataset_cache
+from utils.pipeline import refresh_indicators
+from utils.scheduler import rebuild_snapshot_async
+from utils.sheet_writer import sheet_writer
+from utils.storage import get_storage
+from utils.working_days import get_effective_working_days
 
 
-conn = st.connection("gsheets", type=GSheetsConnection)
-
-def reload_df(conn, sheet_name):
-    df = conn.read(worksheet=sheet_name)
-    df["Periode"] = pd.to_datetime(df["Periode"])
-    df.set_index("Periode", inplace=True)
-    return df.sort_index()
-
+storage = get_storage(lambda: st.connection("gsheets", type=GSheetsConnection))
 
 def update_df_to_gsheet(df, sheet_name="VUB"):
-    conn.update(worksheet=sheet_name, data=df.reset_index())
-
-
-def get_effective_working_days(year, month):
-    indo_holidays = holidays.country_holidays('ID', years=[year])
-    start_date = date(year, month, 1)
-    end_date = pd.Period(f"{year}-{month:02}").end_time.date()
-    current = start_date
-    workdays = 0
-    while current <= end_date:
-        if current.weekday() < 5 and current not in indo_holidays:
-            workdays += 1
-        current += timedelta(days=1)
-    return workdays
-
-
-def update_dataframe(df, updates_dict):
-    """Update dataframe utama dengan hasil gabungan."""
-    for col_name, series_update in updates_dict.items():
-        df.loc[series_update.index, col_name] = series_update.values
-    return df
-
-
-def scrape_inflasi():
-    API_KEY = st.secrets['scraping']['api_key']
-    url = f"https://webapi.bps.go.id/v1/api/view/domain/0000/model/statictable/lang/ind/id/915/key/{API_KEY}"
-    response = requests.get(url)
-    json_data = response.json()
-    html_encoded = json_data["data"]["table"]
-    html_decoded = html.unescape(html_encoded)
-    soup = BeautifulSoup(html_decoded, "html.parser")
-    rows = soup.find_all('tr')
-    data_months, data_years, data_inflation = [], [], []
-    for row in rows:
-        months = row.find_all('td', class_='xl6622202')
-        months = [col.get_text(strip=True) for col in months]
-        if months:
-            data_months.append(months[0].replace('\xa0', '').strip())
-    for row in rows:
-        years = row.find_all('td', class_='xl7022202')
-        years = [col.get_text(strip=True) for col in years]
-        if years:
-            data_years = years
-    for row in rows:
-        values = row.find_all('td', class_=['xl7222202', 'xl7122202'])
-        values = [col.get_text(strip=True) for col in values]
-        if values:
-            data_inflation.append(values)
-    inflation_data = []
-    for i in range(len(data_months)):
-        for j in range(len(data_years)):
-            inflation_data.append({
-                'Tahun': data_years[j],
-                'Bulan': data_months[i],
-                'Inflasi': data_inflation[i][j] if j < len(data_inflation[i]) else None
-            })
-    df_inflation = pd.DataFrame(inflation_data)
-    df_inflation['Inflasi'] = df_inflation['Inflasi'].str.replace(',', '.', regex=False)
-    df_inflation['Inflasi'] = pd.to_numeric(df_inflation['Inflasi'], errors='coerce')
-    df_inflation = df_inflation.dropna(subset=['Inflasi']).reset_index(drop=True)
-    df_inflation['Inflasi'] = df_inflation['Inflasi'] / 100
-    df_inflation['Tahun'] = df_inflation['Tahun'].astype(int)
-    month_map = {
-        "Januari": 1, "Februari": 2, "Maret": 3, "April": 4, "Mei": 5, "Juni": 6,
-        "Juli": 7, "Agustus": 8, "September": 9, "Oktober": 10, "November": 11, "Desember": 12
-    }
-    df_inflation["Bulan"] = df_inflation["Bulan"].map(month_map)
-    df_inflation['Periode'] = pd.to_datetime({
-        'year': df_inflation['Tahun'],
-        'month': df_inflation['Bulan'],
-        'day': 1
-    })
-    df_inflation = df_inflation.set_index('Periode').drop(columns=['Tahun', 'Bulan']).sort_index()
-    return df_inflation
-
-
-def scrape_bi_rate():
-    API_KEY = st.secrets['scraping']['api_key']
-    url = f'https://webapi.bps.go.id/v1/api/list/model/data/lang/ind/domain/0000/var/379/key/{API_KEY}?th=2020-2025'
-
-    response = requests.get(url)
-    data = response.json()
-    datacontent = data.get('datacontent', {})
-
-    data_list = []
-    for kode, value in datacontent.items():
-        timecode = kode[6:]
-
-        try:
-            if len(timecode) == 3:
-                bulan = int(timecode[2])
-                tahun = 2000 + int(timecode[:2])
-            elif len(timecode) == 4:
-                bulan = int(timecode[2:])
-                tahun = 2000 + int(timecode[:2])
-            else:
-                continue
-        except ValueError:
-            continue
-
-        data_list.append({
-            'Tahun': tahun,
-            'Bulan': bulan,
-            'BI Rate': float(value)
-        })
-
-    df_bi_rate = pd.DataFrame(data_list)
-    df_bi_rate = df_bi_rate.sort_values(by=['Tahun', 'Bulan']).reset_index(drop=True)
-    df_bi_rate = df_bi_rate[df_bi_rate['Bulan'] <= 12]
-    df_bi_rate = df_bi_rate[df_bi_rate['Tahun'] >= 2009]
-    df_bi_rate['Periode'] = pd.to_datetime({
-        'year': df_bi_rate['Tahun'],
-        'month': df_bi_rate['Bulan'],
-        'day': 1
-    })
-    df_bi_rate = df_bi_rate.set_index('Periode')
-    df_bi_rate.drop(columns=['Tahun', 'Bulan'], inplace=True)
-    df_bi_rate['BI Rate'] = df_bi_rate['BI Rate'] / 100
-    return df_bi_rate
-
-
-def scrape_apbn_infra():
-    url = "https://media.kemenkeu.go.id/SinglePage/custompage?p=/Pages/Home/Anggaran-Infrastruktur"
-    data = json.loads(requests.get(url).text)['Data']['Content']
-
-    df_apbn = pd.DataFrame({
-        'Tahun': [int(item['Tahun']) for item in data],
-        'APBN Infrastruktur': [
-            float(item['Jumlah'].replace(',', '.')) for item in data
-        ]
-    })
-
-    url_apbn_2025 = 'https://ekonomi.bisnis.com/read/20240816/45/1791651/anggaran-infrastruktur-rp400-triliun-untuk-proyek-prioritas-di-2025-apa-saja'
-    response = requests.get(url_apbn_2025)
-    soup = BeautifulSoup(response.text, 'html.parser')
-    text = soup.find('article').find('p').get_text(strip=True)
-
-    tahun_2025_match = re.search(r'infrastruktur\s*(\d{4})', text)
-    anggaran_2025_match = re.search(r'Rp\s*(\d{1,3}(?:\.\d{3})*(?:,\d{1,2})?)\s*triliun', text)
-
-    if tahun_2025_match and anggaran_2025_match:
-        tahun_2025 = int(tahun_2025_match.group(1))
-        anggaran_2025 = float(
-            anggaran_2025_match.group(1).replace('.', '').replace(',', '.')
-        )
-        df_apbn.loc[len(df_apbn)] = [tahun_2025, anggaran_2025]
-
-    df_apbn = df_apbn.sort_values('Tahun').reset_index(drop=True)
-    df_existing = st.session_state.df_vub
-    
-    periode_terakhir = df_existing.index.max()
-    tahun_terakhir = periode_terakhir.year
-
-    result = []
-
-    for idx, row in df_existing.iterrows():
-        year = idx.year
-        month = idx.month
-        volume = row['Volume']
-
-        apbn_value = df_apbn[df_apbn['Tahun'] == year]['APBN Infrastruktur'].values[0]
-        comparison_year = tahun_terakhir - 1 if year == tahun_terakhir else year
-        total_volume = df_existing[df_existing.index.year == comparison_year]['Volume'].sum()
-        ratio = volume / total_volume if total_volume > 0 else 0
-        apbn_per_month = apbn_value * ratio
-
-        result.append({
-            'Tahun': year,
-            'Bulan': month,
-            'APBN Infra': apbn_per_month,
-        })
-
-    df_result = pd.DataFrame(result)
-    df_result = df_result.sort_values(['Tahun', 'Bulan']).reset_index(drop=True)
-
-    df_result['Periode'] = pd.to_datetime(
-        df_result[['Tahun', 'Bulan']].rename(columns={'Tahun': 'year', 'Bulan': 'month'}).assign(day=1)
-    )
-    df_result.set_index('Periode', inplace=True)
-    df_result.drop(columns=['Tahun', 'Bulan'], inplace=True)
-    
-    return df_result
-
-
-def forecast_apbn_infra(df_actual):
-    forecast_periods = pd.date_range(
-        start=df_actual.index.max() + pd.DateOffset(months=1),
-        periods=13, freq='MS'
-    )
-
-    df_result = df_actual.copy()
-    forecast_rows = []
-
-    for periode in forecast_periods:
-        year = periode.year
-        month = periode.month
-
-        apbn_per_month = None
-        for offset in [1, 2]:
-            prev_year = year - offset
-            mask = (df_result.index.year == prev_year) & (df_result.index.month == month)
-            if mask.any():
-                apbn_per_month = df_result.loc[mask, 'APBN Infra'].values[0]
-                break
-
-        if apbn_per_month is None:
-            apbn_per_month = 0.0
-
-        forecast_rows.append({
-            'Tahun': year,
-            'Bulan': month,
-            'APBN Infra': apbn_per_month,
-        })
-
-    df_forecast = pd.DataFrame(forecast_rows)
-    df_combined = pd.concat([
-        df_result.reset_index().rename(columns={'Periode': 'Periode'}),
-        df_forecast
-    ], ignore_index=True)
-
-    df_combined['Periode'] = pd.to_datetime(
-        df_combined[['Tahun', 'Bulan']].rename(columns={'Tahun': 'year', 'Bulan': 'month'}).assign(day=1)
-    )
-    df_combined.set_index('Periode', inplace=True)
-    df_combined.drop(columns=['Tahun', 'Bulan'], inplace=True)
-
-    df_combined.sort_index(inplace=True)
-    return df_combined
-
-
-def scrape_pdb_konstruksi():
-    return df[['PDB Konstruksi']]
-
-
-def scrape_effective_working_days():
-    df_existing = st.session_state.df_vub
-    periods_actual = df_existing.index
-
-    data = []
-
-    for idx in periods_actual:
-        ewd = get_effective_working_days(idx.year, idx.month)
-        data.append({
-            'Periode': idx,
-            'Effective Working Days': ewd,
-            'Sumber': 'Aktual'
-        })
-
-    df_ewd = pd.DataFrame(data).set_index('Periode').sort_index()
-    df_ewd = df_ewd[['Effective Working Days']]
-    return df_ewd
-
-
-def forecast_effective_working_days(df_actual):
-    df_existing = df_actual
-    last_periode = df_existing.index.max()
-    
-    data = []
-
-    forecast_periods = pd.date_range(
-        start=last_periode + pd.DateOffset(months=1),
-        periods=13,
-        freq='MS'
-    )
-
-    for idx in forecast_periods:
-        ewd = get_effective_working_days(idx.year, idx.month)
-        data.append({
-            'Periode': idx,
-            'Effective Working Days': ewd,
-        })
-    
-    df_ewd = pd.DataFrame(data).set_index('Periode').sort_index()
-    df_ewd = df_ewd[['Effective Working Days']]
-    return df_ewd
-
-
-def sarimax_forecast(train_series, steps=13):
-    model = pm.auto_arima(
-        train_series, seasonal=True, m=12,
-        trace=False, error_action='ignore', suppress_warnings=True
-    )
-    order = model.get_params()['order']
-    seasonal_order = model.get_params()['seasonal_order']
-
-    fitted = SARIMAX(train_series, order=order, seasonal_order=seasonal_order).fit()
-    forecast = fitted.forecast(steps=steps)
-
-    forecast_index = pd.date_range(
-        start=train_series.index.max() + pd.DateOffset(months=1),
-        periods=steps, freq='MS'
-    )
-    return pd.DataFrame({train_series.name: forecast.values}, index=forecast_index)
+    dataset_cache.put(sheet_name, df)
+    sheet_writer.submit(storage, sheet_name, df)
+    rebuild_snapshot_async(storage, "vub")
 
 
-def update_or_forecast_column(col_name, df_existing, df_scraped, df_forecast, global_latest_index):
-    df = df_existing.copy()
-    combined_index = pd.date_range(
-        start=min(df_scraped.index.min(), df_forecast.index.min()),
-        end=global_latest_index,
-        freq='MS'
+def data_scraping(df, forecasting_assumptions, update_forecasting, start_year=2020):
+    progress_text = st.empty()
+    updated_actuals, forecast_assumptions = refresh_indicators(
+        df,
+        forecasting_assumptions,
+        st.secrets['scraping']['api_key'],
+        start_year=start_year,
+        progress=lambda done, total, col: progress_text.caption(f"Model {col} selesai ({done}/{total})"),
+        on_warning=lambda message: st.toast(message, icon="⚠️")
     )
+    progress_text.empty()
 
-    combined = pd.DataFrame(index=combined_index, columns=[col_name], dtype=float)
-
-    for idx in combined_index:
-        current_val = df.loc[idx, col_name] if idx in df.index else None
-        scraped_val = df_scraped.loc[idx, col_name] if idx in df_scraped.index else None
-        forecast_val = df_forecast.loc[idx, col_name] if idx in df_forecast.index else None
-
-        if current_val is not None and not pd.isna(current_val):
-            combined.loc[idx, col_name] = current_val
-        elif scraped_val is not None and not pd.isna(scraped_val):
-            combined.loc[idx, col_name] = scraped_val
-        elif forecast_val is not None and not pd.isna(forecast_val):
-            combined.loc[idx, col_name] = forecast_val
-
-    updated_actual = combined.loc[combined.index <= global_latest_index]
-    forecast_df = df_forecast.loc[df_forecast.index > global_latest_index, [col_name]]
-    return updated_actual, forecast_df
-
-
-def process_all_columns(df_existing, scraped_data_dict, sheet_updater, update_forecasting, start_year=2020):
-    updated_actuals = df_existing.copy()
-    forecast_assumptions = pd.DataFrame(columns=['Periode'])
-
-    all_latest_indices = []
-    for col, df_scraped in scraped_data_dict.items():
-        if not df_scraped.empty:
-            all_latest_indices.append(df_scraped.index.max())
-
-    all_latest_indices.append(updated_actuals.index.max())
-    global_latest_index = max(all_latest_indices)
-
-    all_index = pd.date_range(
-        start=min(updated_actuals.index.min(), global_latest_index),
-        end=global_latest_index,
-        freq='MS'
-    )
-    updated_actuals = updated_actuals.reindex(all_index)
-    updated_actuals.index.name = "Periode"
-    updated_actuals['Tahun'] = updated_actuals.index.year
-    updated_actuals['Bulan'] = updated_actuals.index.month
-    
-    forecast_columns = ["BI Rate", "Inflasi", "PDB Konstruksi"]
-    scraped_only_columns = ["APBN Infra", "Effective Working Days"]
-
-    for col in forecast_columns:
-        df_col = df_existing[[col]]
-        df_col = df_col[df_col.index.year >= start_year]
-
-        forecast_df = sarimax_forecast(df_col[col])
-        scraped_df = scraped_data_dict.get(col, pd.DataFrame())
-        scraped_df = scraped_df[scraped_df.index.year >= start_year]
-        
-        actual_df, forecast_df_col = update_or_forecast_column(
-            col, df_col, scraped_df, forecast_df, global_latest_index
-        )
-        
-        for c in actual_df:
-            updated_actuals.loc[actual_df.index, c] = actual_df[c].values
-
-        forecast_assumptions['Periode'] = forecast_df_col.index
-        forecast_assumptions[col] = forecast_df_col.values
-
-    for col in scraped_only_columns:
-        df_col = df_existing[[col]]
-        df_col = df_col[df_col.index.year >= start_year]
-        
-        scraped_df = scraped_data_dict.get(col, pd.DataFrame())
-        if col == "APBN Infra":
-            forecast_df = forecast_apbn_infra(scraped_df)
-        elif col == "Effective Working Days":
-            forecast_df = forecast_effective_working_days(scraped_df)
-        
-        actual_df, forecast_df_col = update_or_forecast_column(
-            col, df_col, scraped_df, forecast_df, global_latest_index
-        )
-        
-        for c in actual_df:
-            updated_actuals.loc[actual_df.index, c] = actual_df[c].values
-
-        forecast_assumptions['Periode'] = forecast_df_col.index
-        forecast_assumptions[col] = forecast_df_col.values
-    
-    forecast_assumptions.set_index('Periode', inplace=True)
     if update_forecasting:
-        sheet_updater(forecast_assumptions, sheet_name="Forecasting VUB")
-
-    return updated_actuals
-
-def data_scraping(df, forecasting_assumptions, sheet_updater, update_forecasting, start_year=2020):
-    prev_forecasting = forecasting_assumptions.copy()
-    prev_forecasting = prev_forecasting['Forecasting']
-    
-    scraped_data_dict = {
-        "BI Rate": scrape_bi_rate(),
-        "Inflasi": scrape_inflasi(),
-        "APBN Infra": scrape_apbn_infra(),
-        "PDB Konstruksi": scrape_pdb_konstruksi(),
-        "Effective Working Days": scrape_effective_working_days()
-    }
-
-    updated_actuals = process_all_columns(
-        df,
-        scraped_data_dict,
-        sheet_updater=update_df_to_gsheet,
-        update_forecasting=update_forecasting,
-        start_year=start_year
-    )
-    
-    updated_actuals['Volume'] = updated_actuals['Volume'].fillna(0)
-    
-    mask = prev_forecasting.index.isin(updated_actuals.index)
-    for idx in prev_forecasting.index[mask]:
-        updated_actuals.at[idx, 'Forecasting'] = prev_forecasting.at[idx]
-    
-    sheet_updater(updated_actuals, sheet_name="VUB")
+        update_df_to_gsheet(forecast_assumptions, sheet_name="Forecasting VUB")
+    update_df_to_gsheet(updated_actuals, sheet_name="VUB")
     return updated_actuals
 
 
 st.title("⚙️ Pengaturan Data VUB")
 
-if "df_vub" not in st.session_state:
-    st.session_state.df_vub = reload_df(conn, "VUB")
-
-if "df_forecasting_assumptions" not in st.session_state:
-    st.session_state.df_forecasting_assumptions = reload_df(conn, "Forecasting VUB")
-
-df = st.session_state.df_vub
-forecasting_assumptions = st.session_state.df_forecasting_assumptions
+for sheet_name, failure in sheet_writer.failures().items():
+    if sheet_name in ("VUB", "Forecasting VUB"):
+        st.warning(
+            f"Penyimpanan {sheet_name} ke Google Sheets gagal ({failure['attempts']}x): {failure['error']}. "
+            "Perubahan masih di antrian dan akan dicoba lagi otomatis."
+        )
 
+df = dataset_cache.get(storage, "VUB").copy()
+forecasting_assumptions = dataset_cache.get(storage, "Forecasting VUB").copy()
 st.dataframe(df)
 
 
@@ -469,14 +61,18 @@ with st.expander("🔄 Update Data Otomatis", expanded=True):
     if st.button("Ambil Data dari API", type="primary"):
         with st.spinner("Mengambil dan memproses data..."):
             try:
-                update_actuals = data_scraping(df, forecasting_assumptions, update_df_to_gsheet, update_forecasting, 2020)
-                st.session_state.df_vub = update_actuals
+                data_scraping(df, forecasting_assumptions, update_forecasting, 2020)
                 st.toast("Data berhasil diperbarui!", icon="✅")
                 time.sleep(1)
                 st.rerun()
             except Exception as e:
                 st.toast(f"Gagal mengambil data: {e}", icon="❌")
 
+    cache_orde = order_cache.summary()
+    if not cache_orde.empty:
+        st.caption("Cache orde SARIMAX per indikator")
+        st.dataframe(cache_orde, hide_index=True, use_container_width=True)
+
 col1, col2, col3 = st.columns(3)
 
 
@@ -511,9 +107,7 @@ with col1:
                     "APBN Infra": apbn_infra,
                     "PDB Konstruksi": pdb_konstruksi
                 }
-                st.session_state.df_vub = df
-                update_df_to_gsheet(st.session_state.df_vub)
-                st.session_state.reload_data = True
+                update_df_to_gsheet(df.sort_index())
                 st.toast("Data berhasil disimpan!", icon="✅")
                 time.sleep(1)
                 st.rerun()
@@ -560,9 +154,7 @@ with col2:
                 df.at[p, "APBN Infra"] = apbn_infra
                 df.at[p, "PDB Konstruksi"] = pdb_konstruksi
 
-                st.session_state.df_vub = df.sort_index()
-                update_df_to_gsheet(st.session_state.df_vub)
-                st.session_state.reload_data = True
+                update_df_to_gsheet(df.sort_index())
                 st.toast("Data berhasil diperbarui!", icon="✅")
                 time.sleep(1)
                 st.rerun()
@@ -584,8 +176,7 @@ with col3:
 
         if submit_delete and confirm:
             df = df.drop(index=p)
-            st.session_state.df_vub = df.sort_index()
-            update_df_to_gsheet(st.session_state.df_vub)
+            update_df_to_gsheet(df.sort_index())
             st.toast("Data berhasil dihapus!", icon="🗑️")
             time.sleep(1)
             st.rerun()
@@ -599,11 +190,7 @@ with st.expander("✏️ Update Data Asumsi"):
         use_container_width=True
     )
 
-    if "df_forecasting_assumptions" not in st.session_state:
-        st.session_state.df_forecasting_assumptions = forecasting_assumptions
-
-    if not updated_assumptions.equals(st.session_state.df_forecasting_assumptions):
-        st.session_state.df_forecasting_assumptions = updated_assumptions
+    if not updated_assumptions.equals(forecasting_assumptions):
         update_df_to_gsheet(
             updated_assumptions,
             sheet_name="Forecasting VUB"
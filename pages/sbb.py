@@ -1,76 +1,75 @@
 import streamlit as st
 from streamlit_gsheets import GSheetsConnection
 import pandas as pd
-import numpy as np
 import plotly.graph_objects as go
-import pmdarima as pm
-from statsmodels.tsa.statespace.sarimax import SARIMAX
-import itertools
-from tqdm import tqdm
-import joblib
-import os
-from openai import OpenAI
+from datetime import datetime
+from functools import partial
 from dotenv import load_dotenv
+from utils.insight import build_insight_prompt, get_or_start, load_insight, openai_client, stream_insight
+from utils.local_insight import compute_forecast_stats
+from utils.scheduler import rebuild_snapshot
+from utils.snapshots import load_snapshot
+from utils.storage import get_storage
+from utils.tracing import span
 load_dotenv()
 
 api_key = st.secrets['openai']['api_key']
-client = OpenAI(base_url="https://models.github.ai/inference", api_key=api_key)
+client = partial(openai_client, api_key)
 
-def reload_df(conn, sheet_name):
-    df = conn.read(worksheet=sheet_name)
-    df["Periode"] = pd.to_datetime(df["Periode"]).dt.normalize()
-    df.set_index("Periode", inplace=True)
-    return df.sort_index()
 
+def show_insight(snapshot):
+    if snapshot["insight_source"] == "ai":
+        st.markdown(snapshot["insight"])
+        return
 
-@st.cache_resource
-def load_model():
-    return joblib.load("models/model_sarimax_sbb_update_final.pkl")
-
+    insight = load_insight(snapshot["insight_key"])
+    if insight is not None:
+        st.markdown(insight)
+        return
 
-def generate_insight_with_gpt(df_full_forecast):
-    data_summary = df_full_forecast[["Forecasting"]].tail(12).to_string()
-    prompt = f"""
-    PT Solusi Bangun Beton (PT SBB) adalah anak perusahaan dari PT Solusi Bangun Indonesia Tbk (SBI) yang bergerak di bidang produksi dan distribusi beton siap pakai (ready-mix concrete). Perusahaan ini menyediakan solusi beton berkualitas tinggi untuk berbagai kebutuhan konstruksi, mulai dari proyek infrastruktur skala besar hingga pembangunan perumahan dan komersial. Dengan jaringan lebih dari 30 batching plant yang tersebar di Pulau Jawa dan armada pengangkut yang terus diperluas, PT SBB mendukung pengiriman beton secara cepat dan efisien. Selain produk konvensional, PT SBB juga menawarkan beton inovatif seperti ThruCrete (beton berpori untuk resapan air), DekoCrete (beton dekoratif untuk estetika kawasan), dan SpeedCrete (beton cepat kering). Mengusung prinsip keberlanjutan, PT SBB menggunakan semen ramah lingkungan dan mendukung pengurangan emisi karbon dalam konstruksi. Dengan inovasi digital seperti layanan DynaPay dan komitmen terhadap mutu melalui laboratorium bersertifikasi, PT SBB berperan penting dalam pembangunan infrastruktur yang modern, efisien, dan berkelanjutan di Indonesia.
-    
-    Berikut adalah hasil peramalan volume penjualan readymix unit SBB selama 12 bulan ke depan:
+    stats = compute_forecast_stats(snapshot["forecast"]["Forecasting"], snapshot["actuals"]["Volume"])
+    job = get_or_start(snapshot["insight_key"], "SBB", client, build_insight_prompt("SBB", snapshot["forecast"], stats))
+    placeholder = st.empty()
+    placeholder.markdown(snapshot["insight"])
+    with st.spinner("Menghasilkan analisis dengan AI..."):
+        finished = stream_insight(placeholder, job)
 
-    {data_summary}
+    if finished:
+        placeholder.markdown(job.text)
+        return
 
-    Berdasarkan data tersebut dan latar belakang perusahaan di atas, lakukan analisis terhadap tren penjualan, temukan insight yang relevan, serta berikan rekomendasi bisnis strategis. Sampaikan dalam bahasa Indonesia yang formal, ringkas, dan berbasis data.
-    """
-    try:
-        response = client.chat.completions.create(
-            model="openai/gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "Kamu adalah analis data ahli yang memberikan insight dari data forecasting."},
-                {"role": "user", "content": prompt}
-            ],
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"⚠️ Gagal mendapatkan insight dari AI: {e}"
+    status = (
+        f"⚠️ Gagal mendapatkan insight dari AI: {job.error}" if job.error is not None
+        else "⏳ Analisis AI masih diproses, muat ulang halaman beberapa saat lagi."
+    )
+    placeholder.markdown(f"{snapshot['insight']}\n\n_{status}_")
 
 
 def show():
     st.title("📊 Peramalan Volume Penjualan ReadyMix SBB")
 
-    conn = st.connection("gsheets", type=GSheetsConnection)
-
-    if "df_sbb" not in st.session_state:
-        st.session_state.df_sbb = reload_df(conn, "SBB")
-    
-    if "df_forecasting_assumptions" not in st.session_state:
-        st.session_state.df_forecasting_assumptions = reload_df(conn, "Forecasting SBB")
-
-    df = st.session_state.df_sbb
-    forecasting_assumptions = st.session_state.df_forecasting_assumptions
+    snapshot = load_snapshot("sbb")
+    if snapshot is None:
+        try:
+            with st.spinner("Menyiapkan hasil peramalan pertama..."):
+                storage = get_storage(lambda: st.connection("gsheets", type=GSheetsConnection))
+                snapshot = rebuild_snapshot(storage, "sbb", client)
+        except Exception as e:
+            st.error(f"❌ Gagal memuat model SARIMAX atau menghitung prediksi: {e}")
+            return
+
+    df = snapshot["actuals"]
+    forecasting_final = snapshot["forecast"]
+    st.caption(
+        f"Snapshot v{snapshot['version']} • diperbarui "
+        f"{datetime.fromtimestamp(snapshot['created_at']):%d/%m/%Y %H:%M}"
+    )
 
     with st.sidebar:
         st.markdown("🗓️ **Filter Hasil Prediksi**")
         combined_index = pd.date_range(
             start=df.index.min(),
-            end=forecasting_assumptions.index.max(),
+            end=forecasting_final.index.max(),
             freq='MS'
         )
         periode_full = combined_index
@@ -81,22 +80,11 @@ def show():
             "Pilih rentang bulan:",
             min_value=bulan_min,
             max_value=bulan_max,
-            value=(forecasting_assumptions.index.min().to_pydatetime(), forecasting_assumptions.index.max().to_pydatetime()),
+            value=(forecasting_final.index.min().to_pydatetime(), forecasting_final.index.max().to_pydatetime()),
             format="MM/YYYY"
         )
 
     try:
-        best_features = ['Inflasi', 'APBN Infra', 'Effective Working Days']
-        model_fit = load_model()
-        exog_df = forecasting_assumptions[best_features]
-        
-        forecast_12_months = model_fit.forecast(steps=12, exog=exog_df[:12])
-        forecasting_final = pd.DataFrame({
-            "Forecasting": forecast_12_months
-        }, index=pd.date_range(start=forecasting_assumptions.index.min(), periods=12, freq='MS'))
-        st.session_state.df_forecasting_assumptions['Forecasting'] = forecasting_final
-        conn.update(worksheet="Forecasting SBB", data=st.session_state.df_forecasting_assumptions.reset_index())
-
         df_filtered = df[(df.index >= bulan_awal) & (df.index <= bulan_akhir)]
         forecasting_existing = df_filtered[(df_filtered.index >= bulan_awal) & (df_filtered.index <= bulan_akhir)]['Forecasting']
         
@@ -143,13 +131,12 @@ def show():
         st.plotly_chart(fig, use_container_width=True)
 
     except Exception as e:
-        st.error(f"❌ Gagal memuat model SARIMAX atau menghitung prediksi: {e}")
+        st.error(f"❌ Gagal menampilkan hasil peramalan: {e}")
 
     st.subheader("🧠 Rekomendasi Strategis")
-    with st.spinner("Menghasilkan analisis dengan AI..."):
-        insight = generate_insight_with_gpt(forecasting_final)
-        st.markdown(insight)
+    show_insight(snapshot)
 
 
 if __name__ == "__main__" or st.runtime.exists():
-    show()
+    with span("dashboard", unit="sbb"):
+        show()
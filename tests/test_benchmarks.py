@@ -0,0 +1,53 @@
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.run import compare, missing_baseline
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def result(wall_ms, peak_mb=None):
+    return {"case": "uji", "years": 5, "width": 0, "wall_ms": wall_ms, "peak_mb": peak_mb, "stages_ms": {}}
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = {"uji[years=5,width=0]": {"wall_ms": 100.0, "peak_mb": 10.0}}
+
+    assert compare([result(120.0, 10.5)], baseline, tolerance=0.25) == []
+    regressions = compare([result(200.0, 10.0)], baseline, tolerance=0.25)
+    assert len(regressions) == 1 and "waktu" in regressions[0]
+    assert compare([result(100.0, 20.0)], baseline, tolerance=0.25)[0].endswith("memori 10.0 -> 20.0 MB")
+    # Selisih kecil di bawah MIN_DELTA_MS tidak dianggap regresi meski rasionya besar.
+    assert compare([result(3.0)], {"uji[years=5,width=0]": {"wall_ms": 1.0}}, tolerance=0.25) == []
+
+
+def test_compare_marks_missing_baseline():
+    results = [result(100.0)]
+
+    assert compare(results, {}, tolerance=0.25) == []
+    assert missing_baseline(results) == ["uji[years=5,width=0]"]
+
+
+def run_benchmark(baseline, *extra):
+    return subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", "--case", "hari_kerja_per_bulan", "--years", "5",
+         "--repeat", "1", "--no-memory", "--baseline", str(baseline), *extra],
+        cwd=ROOT, capture_output=True, text=True, timeout=600,
+    )
+
+
+def test_exit_code(tmp_path):
+    baseline = tmp_path / "baseline.json"
+
+    assert run_benchmark(baseline).returncode == 1
+    assert run_benchmark(baseline, "--allow-new").returncode == 0
+    assert run_benchmark(baseline, "--save-baseline").returncode == 0
+    assert run_benchmark(baseline, "--tolerance", "10").returncode == 0
+
+    data = json.loads(baseline.read_text())
+    for entry in data["results"].values():
+        entry["wall_ms"] = entry["wall_ms"] / 100
+    baseline.write_text(json.dumps(data))
+    assert run_benchmark(baseline).returncode == 1
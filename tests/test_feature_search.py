@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from utils.feature_search import candidates, search
+
+
+SPEC = {"order": [1, 0, 0]}
+
+
+def make_data(n=48, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2020-01-01", periods=n, freq="MS", name="Periode")
+    exog = pd.DataFrame({"A": rng.normal(size=n), "B": rng.normal(size=n)}, index=index)
+    endog = pd.Series(100 + 5 * exog["A"] + rng.normal(size=n), index=index, name="Volume")
+    return endog, exog
+
+
+def test_search_counts_cached_and_recomputed_candidates(tmp_path):
+    endog, exog = make_data()
+    subsets = candidates(["A", "B"])
+
+    first = search("uji", endog, exog, SPEC, subsets, max_workers=1, cache_dir=tmp_path)
+    assert (first.computed, first.cached) == (3, 0)
+    assert "A" in first.best
+
+    second = search("uji", endog, exog, SPEC, subsets, max_workers=1, cache_dir=tmp_path)
+    assert (second.computed, second.cached) == (0, 3)
+    pd.testing.assert_frame_equal(first.table, second.table)
+
+    changed = exog.assign(B=exog["B"] * 2)
+    third = search("uji", endog, changed, SPEC, subsets, max_workers=1, cache_dir=tmp_path)
+    assert (third.computed, third.cached) == (2, 1)
+
+
+def test_backtest_stage_counts_and_keeps_no_fold_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    endog, exog = make_data()
+    subsets = candidates(["A", "B"])
+    options = dict(criterion="backtest", horizon=2, min_train=40, refit_every=4, max_workers=1,
+                   prune_delta=1e9, max_backtest=2, cache_dir=tmp_path / "scores")
+
+    first = search("uji", endog, exog, SPEC, subsets, **options)
+    assert (first.computed, first.cached, first.pruned) == (3 + 2, 0, 1)
+    assert first.table["MAPE Backtest (%)"].notna().sum() == 2
+
+    second = search("uji", endog, exog, SPEC, subsets, **options)
+    assert (second.computed, second.cached) == (0, 5)
+    assert not (tmp_path / ".cache").exists()
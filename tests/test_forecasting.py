@@ -0,0 +1,21 @@
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+
+from utils.forecasting import last_value_forecast, sarimax_forecast_many
+
+
+def test_single_worker_fit_is_killed_at_the_deadline():
+    index = pd.date_range("2020-01-01", periods=48, freq="MS")
+    series = {"Inflasi": pd.Series(np.linspace(1, 3, 48), index=index, name="Inflasi")}
+
+    results, errors = sarimax_forecast_many(series, steps=3, max_workers=1, fit_timeout=0.2)
+
+    assert isinstance(errors["Inflasi"], TimeoutError)
+    pd.testing.assert_frame_equal(results["Inflasi"], last_value_forecast(series["Inflasi"], 3))
+    assert multiprocessing.active_children() == []
+
+
+def test_no_columns():
+    assert sarimax_forecast_many({}) == ({}, {})
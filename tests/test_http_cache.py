@@ -0,0 +1,72 @@
+import pytest
+import requests
+
+from utils.http_cache import HttpCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.encoding = "utf-8"
+        self.apparent_encoding = "utf-8"
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.calls.append(headers)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+URL = "https://example.com/api/key/rahasia/data"
+
+
+def test_fresh_entry_is_served_without_request(tmp_path):
+    session = FakeSession(FakeResponse(200, b"satu", {"ETag": "v1"}))
+    cache = HttpCache(str(tmp_path), session=session)
+
+    assert cache.get(URL, ttl=60).text == "satu"
+    response = cache.get(URL, ttl=60)
+
+    assert response.from_cache and response.text == "satu"
+    assert len(session.calls) == 1
+
+
+def test_stale_entry_is_revalidated(tmp_path):
+    session = FakeSession(FakeResponse(200, b"satu", {"ETag": "v1"}), FakeResponse(304))
+    cache = HttpCache(str(tmp_path), session=session)
+    cache.get(URL, ttl=0)
+
+    response = cache.get(URL, ttl=0)
+
+    assert response.from_cache and response.text == "satu"
+    assert session.calls[1]["If-None-Match"] == "v1"
+
+
+@pytest.mark.parametrize("failure", [requests.ConnectionError("putus"), FakeResponse(503)])
+def test_stale_entry_is_served_when_revalidation_fails(tmp_path, failure):
+    cache = HttpCache(str(tmp_path), session=FakeSession(FakeResponse(200, b"satu"), failure))
+    cache.get(URL, ttl=0)
+
+    response = cache.get(URL, ttl=0)
+
+    assert response.from_cache and response.status_code == 200 and response.text == "satu"
+
+
+def test_network_error_without_cache_is_raised(tmp_path):
+    cache = HttpCache(str(tmp_path), session=FakeSession(requests.ConnectionError("putus")))
+
+    with pytest.raises(requests.ConnectionError):
+        cache.get(URL, ttl=60)
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.indicators import allocate_apbn_infra, forecast_apbn_infra, merge_by_precedence, update_or_forecast_column
+
+
+def baseline_update_or_forecast_column(col_name, df_existing, df_scraped, df_forecast, global_latest_index):
+    """Implementasi per periode sebelum vektorisasi, sebagai pembanding."""
+    df = df_existing.copy()
+    combined_index = pd.date_range(
+        start=min(df_scraped.index.min(), df_forecast.index.min()),
+        end=global_latest_index,
+        freq='MS'
+    )
+    combined = pd.DataFrame(index=combined_index, columns=[col_name], dtype=float)
+    for idx in combined_index:
+        current_val = df.loc[idx, col_name] if idx in df.index else None
+        scraped_val = df_scraped.loc[idx, col_name] if idx in df_scraped.index else None
+        forecast_val = df_forecast.loc[idx, col_name] if idx in df_forecast.index else None
+        if current_val is not None and not pd.isna(current_val):
+            combined.loc[idx, col_name] = current_val
+        elif scraped_val is not None and not pd.isna(scraped_val):
+            combined.loc[idx, col_name] = scraped_val
+        elif forecast_val is not None and not pd.isna(forecast_val):
+            combined.loc[idx, col_name] = forecast_val
+    updated_actual = combined.loc[combined.index <= global_latest_index]
+    forecast_df = df_forecast.loc[df_forecast.index > global_latest_index, [col_name]]
+    return updated_actual, forecast_df
+
+
+def baseline_allocate_apbn_infra(df_apbn, df_existing):
+    """Implementasi iterrows sebelum vektorisasi, sebagai pembanding."""
+    tahun_terakhir = df_existing.index.max().year
+    result = []
+    for idx, row in df_existing.iterrows():
+        apbn_value = df_apbn[df_apbn['Tahun'] == idx.year]['APBN Infrastruktur'].values[0]
+        comparison_year = tahun_terakhir - 1 if idx.year == tahun_terakhir else idx.year
+        total_volume = df_existing[df_existing.index.year == comparison_year]['Volume'].sum()
+        ratio = row['Volume'] / total_volume if total_volume > 0 else 0
+        result.append({'Tahun': idx.year, 'Bulan': idx.month, 'APBN Infra': apbn_value * ratio})
+    df_result = pd.DataFrame(result).sort_values(['Tahun', 'Bulan']).reset_index(drop=True)
+    df_result['Periode'] = pd.to_datetime(
+        df_result[['Tahun', 'Bulan']].rename(columns={'Tahun': 'year', 'Bulan': 'month'}).assign(day=1)
+    )
+    return df_result.set_index('Periode').drop(columns=['Tahun', 'Bulan'])
+
+
+def monthly(start, periods, values, col="Inflasi"):
+    index = pd.date_range(start, periods=periods, freq="MS", name="Periode")
+    return pd.DataFrame({col: values}, index=index)
+
+
+def test_merge_by_precedence_prefers_earlier_sources_and_skips_nan():
+    index = pd.date_range("2024-01-01", periods=4, freq="MS")
+    first = monthly("2024-01-01", 2, [1.0, np.nan])
+    second = monthly("2024-02-01", 2, [20.0, 30.0])
+    third = monthly("2024-01-01", 4, [100.0, 200.0, 300.0, 400.0])
+
+    values, provenance = merge_by_precedence("Inflasi", [("a", first), ("b", second), ("c", third)], index)
+
+    assert values.tolist() == [1.0, 20.0, 30.0, 400.0]
+    assert provenance.tolist() == ["a", "b", "b", "c"]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_update_or_forecast_column_matches_baseline(seed):
+    rng = np.random.default_rng(seed)
+
+    def sparse(start, periods):
+        values = rng.normal(size=periods)
+        values[rng.random(periods) < 0.3] = np.nan
+        return monthly(start, periods, values)
+
+    existing = sparse("2020-01-01", 40)
+    scraped = sparse("2020-06-01", 42)
+    forecast = sparse("2022-01-01", 30)
+    latest = pd.Timestamp("2023-08-01")
+
+    expected_actual, expected_forecast = baseline_update_or_forecast_column(
+        "Inflasi", existing, scraped, forecast, latest)
+    actual, forecast_df = update_or_forecast_column("Inflasi", existing, scraped, forecast, latest)
+
+    pd.testing.assert_frame_equal(actual, expected_actual, check_freq=False, check_names=False)
+    pd.testing.assert_frame_equal(forecast_df, expected_forecast)
+
+
+def test_allocate_apbn_infra_matches_baseline():
+    rng = np.random.default_rng(1)
+    existing = monthly("2019-01-01", 70, rng.uniform(1000, 5000, size=70), col="Volume")
+    existing.iloc[3, 0] = 0.0
+    apbn = pd.DataFrame({"Tahun": range(2019, 2025), "APBN Infrastruktur": rng.uniform(300, 500, size=6)})
+
+    expected = baseline_allocate_apbn_infra(apbn, existing)
+    result = allocate_apbn_infra(apbn, existing)
+
+    pd.testing.assert_frame_equal(result, expected, check_freq=False)
+
+
+def test_allocate_apbn_infra_carries_budget_to_years_without_one():
+    existing = monthly("2015-01-01", 36, 1.0, col="Volume")
+    apbn = pd.DataFrame({"Tahun": [2016], "APBN Infrastruktur": [120.0]})
+
+    result = allocate_apbn_infra(apbn, existing, weights="flat")
+
+    assert result["APBN Infra"].notna().all()
+    assert result["APBN Infra"].groupby(result.index.year).sum().round(6).tolist() == [120.0, 120.0, 120.0]
+
+
+def test_forecast_apbn_infra_scales_carried_values_by_budget_growth():
+    actual = monthly("2023-01-01", 24, [10.0] * 12 + [20.0] * 12, col="APBN Infra")
+    budget = pd.Series({2023: 120.0, 2024: 240.0, 2025: 360.0})
+
+    plain = forecast_apbn_infra(actual, horizon=12)
+    scaled = forecast_apbn_infra(actual, horizon=12, annual_budget=budget)
+
+    assert plain.loc["2025", "APBN Infra"].tolist() == [20.0] * 12
+    assert scaled.loc["2025", "APBN Infra"].tolist() == pytest.approx([30.0] * 12)
+    pd.testing.assert_frame_equal(scaled.loc[:"2024"], actual)
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.local_insight import compute_forecast_stats, render_local_insight
+
+
+def volume(n=36):
+    index = pd.date_range("2022-01-01", periods=n, freq="MS")
+    return pd.Series(1000 + 100 * np.sin(np.arange(n) * np.pi / 6), index=index)
+
+
+def test_stats_and_insight_for_a_forecast():
+    index = pd.date_range("2025-01-01", periods=12, freq="MS")
+    forecast = pd.Series(np.arange(1, 13) * 100.0, index=index)
+
+    stats = compute_forecast_stats(forecast, volume())
+
+    assert stats["peak_period"] == index[-1] and stats["trough_period"] == index[0]
+    assert stats["trend_slope"] == pytest.approx(100.0)
+    assert "Desember 2025" in render_local_insight("SBB", stats)
+
+
+@pytest.mark.parametrize("forecast", [pd.Series(dtype=float), pd.Series([np.nan, np.nan])])
+def test_empty_forecast_gives_not_enough_data(forecast):
+    stats = compute_forecast_stats(forecast, volume())
+
+    assert stats["peak_period"] is None
+    assert "Data tidak cukup" in render_local_insight("SBB", stats)
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+from utils.model_artifact import export_compact, load_compact
+from utils.model_update import load_state, new_observations, save_state, update_results
+
+
+def make_data(n=60, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2019-01-01", periods=n, freq="MS", name="Periode")
+    exog = pd.DataFrame({"Inflasi": rng.normal(size=n)}, index=index)
+    endog = pd.Series(50 + 3 * exog["Inflasi"] + rng.normal(size=n), index=index, name="Volume")
+    return endog, exog
+
+
+@pytest.fixture(scope="module")
+def fitted():
+    endog, exog = make_data()
+    results = SARIMAX(endog.iloc[:48], exog=exog.iloc[:48], order=(1, 0, 0)).fit(disp=False)
+    return results, endog, exog
+
+
+def test_new_observations_stop_at_first_gap(fitted):
+    results, endog, exog = fitted
+    endog = endog.copy()
+    endog.iloc[51] = 0.0
+
+    endog_new, exog_new = new_observations(results, endog, exog, drop_zero=True)
+
+    assert list(endog_new.index) == list(endog.index[48:51])
+    assert list(exog_new.index) == list(endog_new.index)
+
+
+def test_append_keeps_parameters(fitted):
+    results, endog, exog = fitted
+
+    updated, action, _ = update_results(results, endog.iloc[48:51], exog.iloc[48:51], months_since_refit=2)
+
+    assert action == "append"
+    np.testing.assert_allclose(updated.params, results.params)
+    assert updated.model._index[-1] == endog.index[50]
+
+
+def test_refit_when_due(fitted):
+    results, endog, exog = fitted
+
+    updated, action, _ = update_results(results, endog.iloc[48:51], exog.iloc[48:51], months_since_refit=10)
+
+    assert action == "refit"
+    assert not np.allclose(updated.params, results.params)
+    assert updated.model.nobs == 51
+
+
+def test_appended_compact_model_can_be_stored_and_refit(fitted, tmp_path):
+    results, endog, exog = fitted
+    export_compact(results, str(tmp_path / "model.pkl"))
+    compact = load_compact(str(tmp_path / "model.pkl"))
+
+    appended, action, _ = update_results(compact, endog.iloc[48:52], exog.iloc[48:52])
+    assert action == "append"
+    assert len(appended.training_data[0]) == 52
+
+    save_state("volume-uji", appended, {"months_since_refit": 4}, state_dir=str(tmp_path))
+    restored, metadata = load_state("volume-uji", state_dir=str(tmp_path))
+    assert metadata == {"months_since_refit": 4}
+
+    refit, action, _ = update_results(restored, endog.iloc[52:60], exog.iloc[52:60], months_since_refit=4)
+    assert action == "refit"
+    assert refit.model.nobs == 60
+    np.testing.assert_allclose(refit.forecast(1, exog=exog.iloc[-1:]).values,
+                               SARIMAX(endog, exog=exog, order=(1, 0, 0)).fit(disp=False)
+                               .forecast(1, exog=exog.iloc[-1:]).values, rtol=1e-3)
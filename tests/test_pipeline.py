@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from utils.data_cache import DatasetCache
+from utils.pipeline import write_unchanged
+from utils.sheet_writer import WriteBehindWriter
+from utils.storage import MemoryBackend
+
+
+@pytest.fixture
+def shared(monkeypatch):
+    cache, writer = DatasetCache(), WriteBehindWriter(delay=60)
+    monkeypatch.setattr("utils.pipeline.dataset_cache", cache)
+    monkeypatch.setattr("utils.pipeline.sheet_writer", writer)
+    return cache, writer
+
+
+def frame(*values):
+    index = pd.date_range("2024-01-01", periods=len(values), freq="MS", name="Periode")
+    return pd.DataFrame({"Volume": list(values)}, index=index)
+
+
+def test_write_unchanged_writes_and_updates_cache(shared):
+    cache, _ = shared
+    storage = MemoryBackend()
+    versions = {"SBB": cache.version("SBB")}
+
+    write_unchanged(storage, {"SBB": frame(1.0)}, versions)
+
+    assert storage.read("SBB")["Volume"].tolist() == [1.0]
+    assert cache.get(storage, "SBB")["Volume"].tolist() == [1.0]
+
+
+def test_write_unchanged_aborts_after_concurrent_edit(shared):
+    cache, writer = shared
+    storage = MemoryBackend()
+    versions = {"SBB": cache.version("SBB")}
+    cache.put("SBB", frame(2.0))
+    writer.submit(storage, "SBB", frame(2.0))
+
+    with pytest.raises(RuntimeError):
+        write_unchanged(storage, {"SBB": frame(1.0)}, versions)
+
+    assert not storage.has("SBB")
+    writer.flush()
+    assert storage.read("SBB")["Volume"].tolist() == [2.0]
+
+
+def test_dataset_cache_put_with_stale_version_is_ignored():
+    cache = DatasetCache()
+    version = cache.version("SBB")
+    cache.put("SBB", frame(2.0))
+
+    assert cache.put("SBB", frame(1.0), expected_version=version) is None
+    assert cache.get(MemoryBackend(), "SBB")["Volume"].tolist() == [2.0]
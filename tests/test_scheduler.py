@@ -0,0 +1,31 @@
+import threading
+
+import utils.scheduler as scheduler
+
+
+def test_rebuilds_are_coalesced_per_unit(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    calls, done = [], threading.Event()
+
+    def rebuild(storage, unit, client=None, source=None):
+        calls.append((unit, source))
+        if len(calls) == 1:
+            started.set()
+            release.wait(5)
+        else:
+            done.set()
+
+    monkeypatch.setattr(scheduler, "rebuild_snapshot", rebuild)
+
+    assert scheduler.rebuild_snapshot_async(None, "sbb", source="pertama")
+    started.wait(5)
+    assert not scheduler.rebuild_snapshot_async(None, "sbb", source="kedua")
+    assert not scheduler.rebuild_snapshot_async(None, "sbb", source="ketiga")
+    release.set()
+
+    assert done.wait(5)
+    for thread in threading.enumerate():
+        if thread.name == "snapshot-sbb":
+            thread.join(5)
+    assert calls == [("sbb", "pertama"), ("sbb", "ketiga")]
+    assert scheduler.rebuild_snapshot_async(None, "sbb", source="baru")
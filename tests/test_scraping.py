@@ -0,0 +1,38 @@
+import time
+
+from utils.scraping import fetch_concurrently
+
+
+def slow(value, seconds):
+    def func():
+        time.sleep(seconds)
+        return value
+    return func
+
+
+def failing():
+    raise ValueError("sumber rusak")
+
+
+def test_sources_run_concurrently():
+    start = time.perf_counter()
+    result = fetch_concurrently({"a": slow(1, 0.3), "b": slow(2, 0.3), "c": slow(3, 0.3)}, deadline=5)
+
+    assert result.data == {"a": 1, "b": 2, "c": 3}
+    assert result.errors == {}
+    assert time.perf_counter() - start < 0.8
+
+
+def test_partial_results_on_error_and_deadline():
+    result = fetch_concurrently({"ok": slow(1, 0), "rusak": failing, "lambat": slow(3, 2)}, deadline=0.5)
+
+    assert result.data == {"ok": 1}
+    assert isinstance(result.errors["rusak"], ValueError)
+    assert isinstance(result.errors["lambat"], TimeoutError)
+    assert set(result.durations) == {"ok", "rusak", "lambat"}
+
+
+def test_no_sources():
+    result = fetch_concurrently({})
+
+    assert (result.data, result.errors) == ({}, {})
@@ -0,0 +1,103 @@
+import threading
+
+import pandas as pd
+
+from utils.sheet_writer import WriteBehindWriter, values_changed
+from utils.storage import MemoryBackend
+
+
+class FlakyBackend(MemoryBackend):
+    def __init__(self, failures=0):
+        super().__init__()
+        self.failures = failures
+        self.writes = []
+
+    def write(self, sheet_name, df):
+        if self.failures:
+            self.failures -= 1
+            raise IOError("Sheets tidak tersedia")
+        self.writes.append((sheet_name, df["Volume"].tolist()))
+        super().write(sheet_name, df)
+
+
+def frame(*values):
+    index = pd.date_range("2024-01-01", periods=len(values), freq="MS", name="Periode")
+    return pd.DataFrame({"Volume": list(values)}, index=index)
+
+
+def test_submissions_are_coalesced_per_worksheet():
+    backend = FlakyBackend()
+    writer = WriteBehindWriter(delay=60)
+
+    assert writer.submit(backend, "SBB", frame(1.0))
+    assert writer.submit(backend, "SBB", frame(1.0, 2.0))
+    assert writer.submit(backend, "VUB", frame(3.0))
+    assert writer.flush() == {}
+
+    assert sorted(backend.writes) == [("SBB", [1.0, 2.0]), ("VUB", [3.0])]
+    assert not writer.submit(backend, "SBB", frame(1.0, 2.0))
+    assert writer.pending() == []
+
+
+def test_failed_write_is_requeued_and_reported():
+    backend = FlakyBackend(failures=1)
+    writer = WriteBehindWriter(delay=60)
+    writer.submit(backend, "SBB", frame(1.0))
+
+    errors = writer.flush()
+
+    assert list(errors) == ["SBB"]
+    assert writer.pending() == ["SBB"]
+    assert writer.failures()["SBB"]["attempts"] == 1
+
+    assert writer.flush("SBB") == {}
+    assert backend.writes == [("SBB", [1.0])]
+    assert writer.failures() == {}
+
+
+def test_newer_submission_wins_over_failed_retry():
+    writer = WriteBehindWriter(delay=60)
+    started, release = threading.Event(), threading.Event()
+
+    class SlowFailingBackend(FlakyBackend):
+        def write(self, sheet_name, df):
+            if self.failures:
+                started.set()
+                release.wait(5)
+            super().write(sheet_name, df)
+
+    backend = SlowFailingBackend(failures=1)
+    writer.submit(backend, "SBB", frame(1.0))
+    flusher = threading.Thread(target=writer.flush)
+    flusher.start()
+    started.wait(5)
+    writer.submit(backend, "SBB", frame(2.0))
+    release.set()
+    flusher.join(5)
+
+    writer.flush()
+    assert backend.writes == [("SBB", [2.0])]
+
+
+def test_timer_retries_with_backoff():
+    backend = FlakyBackend(failures=2)
+    writer = WriteBehindWriter(delay=0.01, max_delay=0.05)
+    done = threading.Event()
+    original = backend.write
+
+    def write(sheet_name, df):
+        original(sheet_name, df)
+        done.set()
+
+    backend.write = write
+    writer.submit(backend, "SBB", frame(1.0))
+
+    assert done.wait(5)
+    assert backend.writes == [("SBB", [1.0])]
+    assert writer.failures() == {}
+
+
+def test_values_changed():
+    assert values_changed(None, [1.0])
+    assert not values_changed([1.0, float("nan")], [1.0, float("nan")])
+    assert values_changed([1.0, 2.0], [1.0, 2.5])
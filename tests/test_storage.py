@@ -0,0 +1,130 @@
+import pandas as pd
+import pytest
+
+from utils.storage import GSheetsBackend, MemoryBackend, SyncBackend, diff_rows
+
+
+class FakeWorksheet:
+    """Worksheet gspread tiruan: baris 1 header, data mulai baris 2."""
+
+    id = 0
+
+    def __init__(self, rows):
+        self.rows = [list(row) for row in rows]
+        self.spreadsheet = self
+        self.fail = False
+
+    def batch_update(self, body, **kwargs):
+        if self.fail:
+            raise IOError("Sheets tidak tersedia")
+        if isinstance(body, dict):
+            for request in body["requests"]:
+                del self.rows[request["deleteDimension"]["range"]["startIndex"] - 1]
+        else:
+            for update in body:
+                row = int(update["range"].split(":")[0].lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+                self.rows[row - 2] = update["values"][0]
+
+    def append_rows(self, values, **kwargs):
+        self.rows.extend(values)
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.worksheet = FakeWorksheet(rows)
+        self.client = self
+        self.updates = 0
+
+    def _select_worksheet(self, worksheet):
+        return self.worksheet
+
+    def read(self, worksheet):
+        return pd.DataFrame(self.worksheet.rows, columns=["Periode", "Volume"])
+
+    def update(self, worksheet, data):
+        self.updates += 1
+        self.worksheet.rows = [[str(p), v] for p, v in data.values.tolist()]
+
+
+class CountingBackend(MemoryBackend):
+    def __init__(self, sheets=None):
+        super().__init__(sheets)
+        self.writes = 0
+
+    def write(self, sheet_name, df):
+        self.writes += 1
+        super().write(sheet_name, df)
+
+
+def frame(values):
+    index = pd.DatetimeIndex(pd.to_datetime(list(values)), name="Periode")
+    return pd.DataFrame({"Volume": list(values.values())}, index=index)
+
+
+def test_memory_backend_round_trip():
+    backend = MemoryBackend()
+    df = frame({"2024-01-01": 1.0, "2024-02-01": 2.0})
+
+    backend.write("SBB", df)
+
+    assert backend.has("SBB")
+    pd.testing.assert_frame_equal(backend.read("SBB").set_index("Periode"), df)
+
+
+def test_sync_backend_reads_remote_once_and_writes_both_stores_once():
+    remote = CountingBackend({"SBB": frame({"2024-01-01": 1.0}).reset_index()})
+    local = MemoryBackend()
+    backend = SyncBackend(local, remote)
+
+    assert backend.read("SBB")["Volume"].tolist() == [1.0]
+    backend.write("SBB", frame({"2024-01-01": 1.0, "2024-02-01": 2.0}))
+
+    assert remote.writes == 1
+    assert local.read("SBB")["Volume"].tolist() == remote.read("SBB")["Volume"].tolist() == [1.0, 2.0]
+
+
+def sheet(conn):
+    return {pd.Timestamp(p): v for p, v in conn.worksheet.rows}
+
+
+def test_diff_rows():
+    old = frame({"2024-01-01": 1.0, "2024-02-01": 2.0, "2024-03-01": float("nan")}).reset_index()
+    new = frame({"2024-02-01": 2.5, "2024-03-01": float("nan"), "2024-04-01": 4.0}).reset_index()
+
+    appended, updated, deleted = diff_rows(old, new)
+
+    assert list(appended) == [pd.Timestamp("2024-04-01")]
+    assert list(updated) == [pd.Timestamp("2024-02-01")]
+    assert list(deleted) == [pd.Timestamp("2024-01-01")]
+
+
+def test_delta_write_targets_rows_in_sheet_order():
+    conn = FakeConnection([["2024-03-01", 3], ["2024-01-01", 1], ["2024-02-01", 2]])
+    backend = GSheetsBackend(lambda: conn)
+    backend.read("SBB")
+
+    backend.write("SBB", frame({"2024-01-01": 1, "2024-02-01": 20, "2024-03-01": 30}))
+    assert [row[1] for row in conn.worksheet.rows] == [30, 1, 20]
+
+    backend.write("SBB", frame({"2024-01-01": 10, "2024-03-01": 30, "2024-04-01": 4}))
+    assert [row[1] for row in conn.worksheet.rows] == [30, 10, 4]
+
+    # Setelah baris dihapus, baris di bawahnya bergeser; pembaruan berikutnya harus tetap tepat.
+    backend.write("SBB", frame({"2024-01-01": 11, "2024-03-01": 31, "2024-04-01": 40}))
+    assert [row[1] for row in conn.worksheet.rows] == [31, 11, 40]
+    assert conn.updates == 0
+
+
+def test_failed_delta_write_forces_full_rewrite():
+    conn = FakeConnection([["2024-01-01", 1], ["2024-02-01", 2]])
+    backend = GSheetsBackend(lambda: conn)
+    backend.read("SBB")
+
+    conn.worksheet.fail = True
+    with pytest.raises(IOError):
+        backend.write("SBB", frame({"2024-01-01": 5, "2024-02-01": 2}))
+    conn.worksheet.fail = False
+
+    backend.write("SBB", frame({"2024-01-01": 5, "2024-02-01": 6}))
+    assert conn.updates == 1
+    assert sheet(conn) == {pd.Timestamp("2024-01-01"): 5, pd.Timestamp("2024-02-01"): 6}
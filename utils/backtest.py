@@ -0,0 +1,228 @@
+"""Backtest rolling-origin model volume dengan estimasi ulang setiap `refit_every` titik asal."""
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from utils.data_cache import reload_df
+from utils.forecasting import FORECAST_WORKERS
+from utils.model_artifact import compact_state, from_compact_state, model_spec
+from utils.pipeline import HORIZON, UNITS, feature_frame, model_pool, unit_features
+from utils.tracing import attach, call_traced, span
+
+
+BACKTEST_CACHE_DIR = os.environ.get("BACKTEST_CACHE_DIR", os.path.join(".cache", "backtest"))
+MIN_TRAIN = 36
+REFIT_EVERY = 6
+
+
+@dataclass
+class BacktestResult:
+    folds: pd.DataFrame
+    metrics: pd.DataFrame
+    computed: int = 0
+    cached: int = 0
+    duration: float = 0.0
+    spec: dict = field(default_factory=dict)
+
+
+def backtest_data(df, features):
+    """Volume dan exog (termasuk fitur lag) yang lengkap sampai bulan terakhir dengan volume terisi (bukan 0)."""
+    data = pd.concat([df[["Volume"]], feature_frame(df, features)], axis=1).astype(float)
+    filled = data.index[data["Volume"].fillna(0) != 0]
+    if not len(filled):
+        raise ValueError("Belum ada data volume untuk backtest")
+    data = data.loc[:filled.max()].dropna()
+    expected = pd.date_range(start=data.index.min(), periods=len(data), freq="MS")
+    if not data.index.equals(expected):
+        raise ValueError("Data volume dan exog harus bulanan tanpa bulan yang kosong")
+    data.index = expected.rename("Periode")
+    return data["Volume"], data[features]
+
+
+def fold_key(spec, endog, exog, origin, refit_origin):
+    """Kunci cache fold: spesifikasi model, titik estimasi ulang, dan data latih sampai `origin`."""
+    digest = hashlib.sha256(json.dumps([spec, origin, refit_origin], sort_keys=True).encode("utf-8"))
+    digest.update(np.asarray(endog.index[:origin].asi8, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(endog.values[:origin], dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(exog.values[:origin], dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def _cache_path(key, cache_dir):
+    return os.path.join(cache_dir, f"{key}.joblib")
+
+
+def load_fold(key, cache_dir=BACKTEST_CACHE_DIR):
+    try:
+        return joblib.load(_cache_path(key, cache_dir))
+    except (OSError, EOFError, ValueError):
+        return None
+
+
+def save_fold(key, state, cache_dir=BACKTEST_CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _cache_path(key, cache_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(state, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def fold_forecast(state, exog, origin, steps):
+    results = from_compact_state(*state)
+    return np.asarray(results.forecast(steps=steps, exog=exog.iloc[origin:origin + steps]))
+
+
+def run_chunk(spec, endog, exog, refit_origin, origins, seed=None, horizon=HORIZON):
+    """Hitung state dan forecast untuk `origins` (berurutan) dalam satu kelompok estimasi ulang.
+
+    Tanpa `seed`, parameter diestimasi dengan data sampai `refit_origin`; dengan `seed` = (origin, state),
+    perhitungan dilanjutkan dari state fold yang sudah tersimpan. Mengembalikan {origin: (state, forecast)}.
+    """
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    init_kwds = {key: tuple(value) if isinstance(value, list) else value for key, value in spec.items()}
+    if seed is None:
+        with span("backtest_fit", origin=refit_origin):
+            model = SARIMAX(endog.iloc[:refit_origin], exog=exog.iloc[:refit_origin], **init_kwds)
+            results = model.fit(disp=False)
+        position = refit_origin
+    else:
+        position, state = seed
+        results = from_compact_state(*state)
+
+    output = {}
+    for origin in origins:
+        if origin > position:
+            results = results.append(endog.iloc[position:origin], exog=exog.iloc[position:origin])
+            position = origin
+        state = compact_state(results)
+        steps = min(horizon, len(endog) - origin)
+        forecast = np.asarray(results.forecast(steps=steps, exog=exog.iloc[origin:origin + steps]))
+        output[origin] = (state, forecast)
+    return output
+
+
+def error_metrics(folds):
+    """MAPE (%), RMSE, dan bias (forecast - aktual) per langkah horizon."""
+    rows = []
+    for step, group in folds.groupby("Langkah"):
+        error = group["Forecast"] - group["Aktual"]
+        nonzero = group["Aktual"] != 0
+        rows.append({
+            "Langkah": step,
+            "Jumlah Fold": len(group),
+            "MAPE (%)": float((error[nonzero].abs() / group.loc[nonzero, "Aktual"].abs()).mean() * 100),
+            "RMSE": float(np.sqrt((error ** 2).mean())),
+            "Bias": float(error.mean()),
+        })
+    return pd.DataFrame(rows)
+
+
+def rolling_origin(endog, exog, spec, horizon=HORIZON, min_train=MIN_TRAIN, refit_every=REFIT_EVERY,
+                   max_workers=FORECAST_WORKERS, cache_dir=BACKTEST_CACHE_DIR, progress=None):
+    """Backtest rolling-origin dengan jendela latih yang terus bertambah.
+
+    `spec` adalah argumen SARIMAX (lihat `model_artifact.model_spec`). `progress(selesai, total)`
+    dipanggil setiap satu kelompok fold selesai dihitung. Dengan `cache_dir=None` state fold
+    tidak dimuat maupun disimpan.
+    """
+    start_time = time.perf_counter()
+    n = len(endog)
+    if n <= min_train:
+        raise ValueError(f"Butuh lebih dari {min_train} bulan data untuk backtest, tersedia {n}")
+
+    origins = list(range(min_train, n))
+    refit_origin = {o: min_train + (o - min_train) // refit_every * refit_every for o in origins}
+    keys = {o: fold_key(spec, endog, exog, o, refit_origin[o]) for o in origins}
+    states = {}
+    if cache_dir is not None:
+        states = {o: state for o in origins if (state := load_fold(keys[o], cache_dir)) is not None}
+    forecasts = {}
+
+    chunks = []
+    for r in sorted(set(refit_origin.values())):
+        members = [o for o in origins if refit_origin[o] == r]
+        missing = [o for o in members if o not in states]
+        if not missing:
+            continue
+        seeds = [o for o in members if o in states and o < missing[0]]
+        seed = (seeds[-1], states[seeds[-1]]) if seeds else None
+        chunks.append((r, missing, seed))
+
+    def collect(output):
+        for origin, (state, forecast) in output.items():
+            states[origin] = state
+            forecasts[origin] = forecast
+            if cache_dir is not None:
+                save_fold(keys[origin], state, cache_dir)
+
+    with span("backtest", folds=len(origins), chunks=len(chunks)):
+        workers = min(max_workers or os.cpu_count() or 1, len(chunks))
+        if workers <= 1:
+            for done, (r, missing, seed) in enumerate(chunks, start=1):
+                collect(run_chunk(spec, endog, exog, r, missing, seed, horizon))
+                if progress is not None:
+                    progress(done, len(chunks))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+                pending = [
+                    executor.submit(call_traced, run_chunk, spec, endog, exog, r, missing, seed, horizon)
+                    for r, missing, seed in chunks
+                ]
+                for done, future in enumerate(as_completed(pending), start=1):
+                    output, child = future.result()
+                    attach(child)
+                    collect(output)
+                    if progress is not None:
+                        progress(done, len(chunks))
+
+        rows = []
+        for origin in origins:
+            steps = min(horizon, n - origin)
+            forecast = forecasts.get(origin)
+            if forecast is None:
+                forecast = fold_forecast(states[origin], exog, origin, steps)
+            for step in range(steps):
+                rows.append({
+                    "Asal": endog.index[origin - 1],
+                    "Periode": endog.index[origin + step],
+                    "Langkah": step + 1,
+                    "Forecast": float(forecast[step]),
+                    "Aktual": float(endog.iloc[origin + step]),
+                })
+
+    folds = pd.DataFrame(rows)
+    computed = sum(len(missing) for _, missing, _ in chunks)
+    return BacktestResult(
+        folds=folds,
+        metrics=error_metrics(folds),
+        computed=computed,
+        cached=len(origins) - computed,
+        duration=time.perf_counter() - start_time,
+        spec=spec,
+    )
+
+
+def active_spec(unit):
+    """Spesifikasi SARIMAX (tanpa exog) model aktif unit di registri."""
+    results = model_pool.get(unit)
+    training = getattr(results, "training_data", None)
+    if training is None:
+        return model_spec(results.model)
+    return {key: list(value) if isinstance(value, tuple) else value for key, value in training[2].items()}
+
+
+def backtest_unit(storage, unit, **kwargs):
+    """Backtest unit dengan spesifikasi dan fitur exog model aktif di registri."""
+    spec = active_spec(unit)
+    endog, exog = backtest_data(reload_df(storage, UNITS[unit]["sheet"]), unit_features(unit))
+    with span("backtest_unit", unit=unit):
+        return rolling_origin(endog, exog, spec, **kwargs)
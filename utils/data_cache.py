@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+
+import pandas as pd
+
+from utils.tracing import frame_bytes, span
+
+
+DATA_CACHE_TTL = float(os.environ.get("DATA_CACHE_TTL", "600"))
+
+
+def reload_df(storage, sheet_name):
+    with span("reload_df", sheet=sheet_name) as s:
+        df = storage.read(sheet_name)
+        s.add_bytes(frame_bytes(df))
+        df["Periode"] = pd.to_datetime(df["Periode"]).dt.normalize()
+        df.set_index("Periode", inplace=True)
+        return df.sort_index()
+
+
+class DatasetCache:
+    """Snapshot dataset per worksheet yang dipakai bersama oleh semua sesi dalam proses.
+
+    Snapshot dibaca ulang dari backend hanya jika versinya dinaikkan oleh penulisan
+    atau umurnya melewati `ttl`. Snapshot tidak boleh diubah langsung; salin dulu
+    dengan `.copy()` sebelum diedit.
+    """
+
+    def __init__(self, ttl=DATA_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._entries = {}
+
+    def version(self, sheet_name):
+        with self._lock:
+            return self._versions.get(sheet_name, 0)
+
+    def get(self, storage, sheet_name):
+        with self._lock:
+            version = self._versions.get(sheet_name, 0)
+            entry = self._entries.get(sheet_name)
+            if entry is not None and entry[0] == version and time.monotonic() - entry[1] < self.ttl:
+                return entry[2]
+
+        df = reload_df(storage, sheet_name)
+        with self._lock:
+            if self._versions.get(sheet_name, 0) == version:
+                self._entries[sheet_name] = (version, time.monotonic(), df)
+        return df
+
+    def put(self, sheet_name, df, expected_version=None):
+        """Simpan snapshot baru setelah penulisan dan naikkan versinya.
+
+        Dengan `expected_version`, snapshot hanya disimpan jika versinya belum berubah;
+        jika sudah berubah, tidak ada yang disimpan dan mengembalikan None.
+        """
+        snapshot = df.copy()
+        with self._lock:
+            if expected_version is not None and self._versions.get(sheet_name, 0) != expected_version:
+                return None
+            version = self._versions.get(sheet_name, 0) + 1
+            self._versions[sheet_name] = version
+            self._entries[sheet_name] = (version, time.monotonic(), snapshot)
+        return snapshot
+
+    def invalidate(self, sheet_name=None):
+        with self._lock:
+            names = [sheet_name] if sheet_name else list(self._entries)
+            for name in names:
+                self._versions[name] = self._versions.get(name, 0) + 1
+                self._entries.pop(name, None)
+
+
+dataset_cache = DatasetCache()
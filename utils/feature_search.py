@@ -0,0 +1,321 @@
+"""Pemilihan fitur exog model volume dari kombinasi indikator makro dan lag-nya."""
+import hashlib
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from utils.backtest import MIN_TRAIN, REFIT_EVERY, active_spec, backtest_data, rolling_origin
+from utils.data_cache import reload_df
+from utils.forecasting import FORECAST_WORKERS
+from utils.model_artifact import export_compact
+from utils.model_registry import describe, register
+from utils.pipeline import HORIZON, INDICATOR_COLUMNS, UNITS, lag_name, unit_features
+from utils.tracing import attach, call_traced, span
+
+
+FEATURE_SEARCH_CACHE_DIR = os.environ.get("FEATURE_SEARCH_CACHE_DIR", os.path.join(".cache", "feature_search"))
+PRUNE_DELTA = float(os.environ.get("FEATURE_PRUNE_DELTA", "10"))
+MAX_BACKTEST = int(os.environ.get("FEATURE_MAX_BACKTEST", "20"))
+BATCHES_PER_WORKER = 4
+CRITERIA = {"aic": "AIC", "bic": "BIC", "backtest": "MAPE Backtest (%)"}
+
+
+@dataclass
+class FeatureSearchResult:
+    table: pd.DataFrame
+    best: list
+    criterion: str
+    computed: int = 0
+    cached: int = 0
+    pruned: int = 0
+    duration: float = 0.0
+    spec: dict = field(default_factory=dict)
+
+
+def candidates(columns=INDICATOR_COLUMNS, lags=(0,)):
+    """Semua himpunan bagian tidak kosong dari `columns`, setiap kolom dengan salah satu `lags`."""
+    options = [[None] + [lag_name(col, lag) for lag in lags] for col in columns]
+    return [
+        [name for name in combination if name is not None]
+        for combination in itertools.product(*options)
+        if any(name is not None for name in combination)
+    ]
+
+
+def data_hash(endog, exog):
+    digest = hashlib.sha256()
+    digest.update(np.asarray(endog.index.asi8, dtype=np.int64).tobytes())
+    digest.update(np.ascontiguousarray(endog.values, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(exog.values, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def candidate_id(unit, features, stage, spec, options=None):
+    """Kunci kandidat tanpa data: unit, fitur, tahap penilaian, spesifikasi model, dan opsi backtest."""
+    payload = json.dumps([unit, features, stage, spec, options], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _path(unit, cache_dir):
+    return os.path.join(cache_dir, f"{re.sub(r'[^0-9a-zA-Z]+', '_', unit).lower()}.json")
+
+
+def load_cache(unit, cache_dir=FEATURE_SEARCH_CACHE_DIR):
+    try:
+        with open(_path(unit, cache_dir), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(unit, entries, cache_dir=FEATURE_SEARCH_CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _path(unit, cache_dir)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+    os.replace(tmp_path, path)
+
+
+def evaluate_batch(endog, exog, spec, jobs, horizon=HORIZON, min_train=MIN_TRAIN, refit_every=REFIT_EVERY):
+    """Nilai sekelompok kandidat `jobs` = [(fitur, tahap, start_params)] di satu proses.
+
+    Tahap "ic" mengembalikan AIC, BIC, dan parameter; tahap "backtest" mengembalikan MAPE rata-rata.
+    Kandidat yang gagal dikembalikan dengan kunci "error".
+    """
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    init_kwds = {key: tuple(value) if isinstance(value, list) else value for key, value in spec.items()}
+    output = []
+    for features, stage, start_params in jobs:
+        start = time.perf_counter()
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                if stage == "ic":
+                    results = SARIMAX(endog, exog=exog[features], **init_kwds).fit(
+                        start_params=start_params, disp=False
+                    )
+                    entry = {"aic": float(results.aic), "bic": float(results.bic),
+                             "params": [float(p) for p in results.params]}
+                else:
+                    result = rolling_origin(endog, exog[features], spec, horizon=horizon, min_train=min_train,
+                                            refit_every=refit_every, max_workers=1, cache_dir=None)
+                    entry = {"mape": float(result.metrics["MAPE (%)"].mean())}
+        except Exception as e:
+            entry = {"error": f"{type(e).__name__}: {e}"}
+        output.append(dict(entry, seconds=time.perf_counter() - start))
+    return output
+
+
+def _run_stage(endog, exog, spec, jobs, max_workers, options, progress=None, label=""):
+    """Jalankan `jobs` serial atau dibagi ke beberapa proses; hasil berurutan sesuai `jobs`."""
+    results = [None] * len(jobs)
+    if not jobs:
+        return results
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+    size = max(1, -(-len(jobs) // (workers * BATCHES_PER_WORKER))) if workers > 1 else 1
+    batches = [list(range(i, min(i + size, len(jobs)))) for i in range(0, len(jobs), size)]
+
+    def collect(batch, output, done):
+        for i, entry in zip(batch, output):
+            results[i] = entry
+        if progress is not None:
+            progress(label, done, len(jobs))
+
+    if workers <= 1:
+        done = 0
+        for batch in batches:
+            done += len(batch)
+            collect(batch, evaluate_batch(endog, exog, spec, [jobs[i] for i in batch], **options), done)
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        pending = {
+            executor.submit(call_traced, evaluate_batch, endog, exog, spec, [jobs[i] for i in batch], **options): batch
+            for batch in batches
+        }
+        done = 0
+        for future in as_completed(pending):
+            output, child = future.result()
+            attach(child)
+            done += len(pending[future])
+            collect(pending[future], output, done)
+    return results
+
+
+def search(unit, endog, exog, spec, subsets=None, criterion="aic", horizon=HORIZON, min_train=MIN_TRAIN,
+           refit_every=REFIT_EVERY, max_workers=FORECAST_WORKERS, prune_delta=PRUNE_DELTA,
+           max_backtest=MAX_BACKTEST, cache_dir=FEATURE_SEARCH_CACHE_DIR, active=None, progress=None):
+    """Urutkan kandidat `subsets` (default semua kombinasi kolom `exog`) menurut `criterion` (lihat CRITERIA).
+
+    `progress(tahap, selesai, total)` dipanggil setiap satu kelompok kandidat selesai.
+    """
+    if criterion not in CRITERIA:
+        raise ValueError(f"Kriteria tidak dikenal: {criterion}")
+    start_time = time.perf_counter()
+    subsets = subsets or candidates(list(exog.columns))
+    backtest_options = {"horizon": horizon, "min_train": min_train, "refit_every": refit_every}
+    cache = load_cache(unit, cache_dir)
+    computed = cached = 0
+
+    def evaluate(stage, group, options=None):
+        nonlocal computed, cached
+        keys = [candidate_id(unit, names, stage, spec, options) for names in group]
+        hashes = [data_hash(endog, exog[names]) for names in group]
+        scores, jobs, positions = {}, [], []
+        for i, (names, key, digest) in enumerate(zip(group, keys, hashes)):
+            entry = cache.get(key)
+            if entry is not None and entry["hash"] == digest:
+                scores[i] = entry
+                continue
+            previous = entry.get("params") if entry is not None else None
+            jobs.append((names, stage, previous))
+            positions.append(i)
+
+        output = _run_stage(endog, exog, spec, jobs, max_workers, backtest_options, progress, stage)
+        for i, entry in zip(positions, output):
+            scores[i] = entry
+            if "error" not in entry:
+                cache[keys[i]] = dict(entry, hash=hashes[i], features=group[i], updated_at=time.time())
+        save_cache(unit, cache, cache_dir)
+        computed += len(jobs)
+        cached += len(group) - len(jobs)
+        return [scores[i] for i in range(len(group))]
+
+    with span("feature_search", unit=unit, criterion=criterion, candidates=len(subsets)):
+        ic = evaluate("ic", subsets)
+        table = pd.DataFrame({
+            "Fitur": [", ".join(names) for names in subsets],
+            "Jumlah Fitur": [len(names) for names in subsets],
+            "AIC": [entry.get("aic", np.nan) for entry in ic],
+            "BIC": [entry.get("bic", np.nan) for entry in ic],
+            "Error": [entry.get("error") for entry in ic],
+        })
+
+        pruned = 0
+        if criterion == "backtest":
+            delta = table["AIC"] - table["AIC"].min()
+            survivors = delta[delta <= prune_delta].sort_values().index[:max_backtest]
+            pruned = len(table) - len(survivors)
+            scores = evaluate("backtest", [subsets[i] for i in survivors], backtest_options)
+            table[CRITERIA["backtest"]] = np.nan
+            for i, entry in zip(survivors, scores):
+                table.loc[i, CRITERIA["backtest"]] = entry.get("mape", np.nan)
+                if "error" in entry:
+                    table.loc[i, "Error"] = entry["error"]
+
+        column = CRITERIA[criterion]
+        table["Aktif"] = [names == list(active or []) for names in subsets]
+        table = table.sort_values([column, "AIC"], na_position="last", ignore_index=True)
+        rank = pd.Series(range(1, len(table) + 1), dtype="Int64")
+        table.insert(0, "Peringkat", rank.mask(table[column].isna()))
+
+    if table[column].isna().all():
+        raise ValueError("Semua kandidat fitur gagal dievaluasi")
+    return FeatureSearchResult(
+        table=table,
+        best=table.loc[0, "Fitur"].split(", "),
+        criterion=criterion,
+        computed=computed,
+        cached=cached,
+        pruned=pruned,
+        duration=time.perf_counter() - start_time,
+        spec=spec,
+    )
+
+
+def unit_data(storage, unit, lags=(0,)):
+    """Volume dan semua kolom indikator beserta lag-nya dengan sampel yang sama untuk setiap kandidat."""
+    names = [lag_name(col, lag) for col in INDICATOR_COLUMNS for lag in lags]
+    return backtest_data(reload_df(storage, UNITS[unit]["sheet"]), names)
+
+
+def search_unit(storage, unit, lags=(0,), **kwargs):
+    """Pemilihan fitur unit dengan spesifikasi model aktif di registri."""
+    endog, exog = unit_data(storage, unit, lags)
+    return search(unit, endog, exog, active_spec(unit), candidates(INDICATOR_COLUMNS, lags),
+                  active=unit_features(unit), **kwargs)
+
+
+def register_features(storage, unit, features, note="", promote=False):
+    """Latih model unit dengan fitur `features` pada seluruh data dan daftarkan sebagai versi baru.
+
+    Model disimpan sebagai artefak ringkas. Mengembalikan nomor versi di registri.
+    """
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    spec = active_spec(unit)
+    endog, exog = backtest_data(reload_df(storage, UNITS[unit]["sheet"]), features)
+    init_kwds = {key: tuple(value) if isinstance(value, list) else value for key, value in spec.items()}
+    with span("register_features", unit=unit, features=len(features)):
+        results = SARIMAX(endog, exog=exog, **init_kwds).fit(disp=False)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, f"model_sarimax_{unit}.pkl")
+            export_compact(results, path)
+            metadata = dict(describe(results), catatan=note or "pemilihan fitur")
+            return register(unit, path, metadata=metadata, promote=promote)
+
+
+class FeatureSearchJob:
+    """Pemilihan fitur di background thread; status dan progres bisa dibaca dari halaman lain."""
+
+    def __init__(self, storage, unit, options):
+        self.unit = unit
+        self.options = options
+        self.stage = None
+        self.done_count = 0
+        self.total = 0
+        self.result = None
+        self.error = None
+        self.started_at = time.time()
+        self.finished_at = None
+        self.done = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(storage,), name=f"feature-search-{unit}",
+                                        daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _progress(self, stage, done, total):
+        self.stage, self.done_count, self.total = stage, done, total
+
+    def _run(self, storage):
+        try:
+            self.result = search_unit(storage, self.unit, progress=self._progress, **self.options)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished_at = time.time()
+            self.done.set()
+
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def start_search(storage, unit, **options):
+    """Mulai pemilihan fitur unit di background, kecuali masih ada yang berjalan untuk unit itu."""
+    with _jobs_lock:
+        job = _jobs.get(unit)
+        if job is None or job.done.is_set():
+            job = FeatureSearchJob(storage, unit, options).start()
+            _jobs[unit] = job
+        return job
+
+
+def get_search(unit):
+    with _jobs_lock:
+        return _jobs.get(unit)
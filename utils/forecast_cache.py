@@ -0,0 +1,63 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+FORECAST_CACHE_SIZE = int(os.environ.get("FORECAST_CACHE_SIZE", "32"))
+
+_artifact_hashes = {}
+
+
+def artifact_identity(path):
+    """Identitas artefak model: (path, mtime, sha256). Hash file dihitung ulang hanya jika mtime berubah."""
+    path = os.path.abspath(path)
+    mtime = os.stat(path).st_mtime_ns
+    key = (path, mtime)
+    if key not in _artifact_hashes:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        _artifact_hashes[key] = digest.hexdigest()
+    return path, mtime, _artifact_hashes[key]
+
+
+def frame_hash(df):
+    return int(pd.util.hash_pandas_object(df).sum())
+
+
+class ForecastCache:
+    """Cache hasil forecast bersama untuk seluruh sesi dengan eviksi LRU."""
+
+    def __init__(self, maxsize=FORECAST_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+
+        value = compute()
+        with self._lock:
+            self.misses += 1
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+forecast_cache = ForecastCache()
@@ -0,0 +1,237 @@
+import multiprocessing
+import os
+import time
+from multiprocessing.connection import wait
+
+import pandas as pd
+
+from utils import model_update, order_cache
+from utils.tracing import attach, call_traced, span
+
+
+FORECAST_WORKERS = int(os.environ.get("FORECAST_WORKERS", "0")) or None
+FIT_TIMEOUT = float(os.environ.get("FORECAST_FIT_TIMEOUT", "300"))
+
+
+def neighborhood_orders(order, seasonal_order):
+    """Orde tersimpan dan tetangganya: p, q, P, dan Q masing-masing digeser -1/+1 (minimal 0), d dan D tetap."""
+    p, d, q = order
+    P, D, Q, m = seasonal_order
+    base = (p, q, P, Q)
+    candidates = [base]
+    for i in range(len(base)):
+        for step in (-1, 1):
+            moved = base[:i] + (base[i] + step,) + base[i + 1:]
+            if moved[i] >= 0 and moved not in candidates:
+                candidates.append(moved)
+    return [((p, d, q), (P, D, Q, m)) for p, q, P, Q in candidates]
+
+
+def neighborhood_search(train_series, order, seasonal_order):
+    """Orde dengan AIC terkecil di antara `neighborhood_orders`; None jika semua kandidat gagal."""
+    import pmdarima as pm
+
+    best, best_aic = None, float("inf")
+    for candidate_order, candidate_seasonal in neighborhood_orders(order, seasonal_order):
+        d, D = candidate_order[1], candidate_seasonal[1]
+        try:
+            aic = pm.ARIMA(
+                order=candidate_order, seasonal_order=candidate_seasonal,
+                with_intercept=(d + D) in (0, 1), suppress_warnings=True
+            ).fit(train_series).aic()
+        except Exception:
+            continue
+        if aic < best_aic:
+            best, best_aic = (candidate_order, candidate_seasonal), aic
+    return best
+
+
+def select_order(train_series, use_cache=True):
+    """Pilih (order, seasonal_order) dengan auto_arima, memakai cache orde jika memungkinkan.
+
+    Deret identik langsung memakai orde tersimpan; deret yang hanya bertambah observasi
+    baru cukup dibandingkan dengan orde tetangganya (lihat `neighborhood_orders`).
+    """
+    status, cached = order_cache.lookup(train_series) if use_cache else ("miss", None)
+    if status == "hit":
+        return tuple(cached["order"]), tuple(cached["seasonal_order"]), status, cached, 0.0
+
+    start = time.perf_counter()
+    if status == "append":
+        with span("auto_arima", series=train_series.name, mode=status):
+            found = neighborhood_search(train_series, tuple(cached["order"]), tuple(cached["seasonal_order"]))
+        if found is not None:
+            return found[0], found[1], "neighborhood", cached, time.perf_counter() - start
+
+    import pmdarima as pm
+
+    with span("auto_arima", series=train_series.name, mode="miss"):
+        model = pm.auto_arima(
+            train_series, seasonal=True, m=12,
+            trace=False, error_action='ignore', suppress_warnings=True
+        )
+    search_seconds = time.perf_counter() - start
+    order = model.get_params()['order']
+    seasonal_order = model.get_params()['seasonal_order']
+    return order, seasonal_order, "full", cached, search_seconds
+
+
+def _forecast_from_state(train_series, steps):
+    """Forecast dari state model tersimpan jika deret hanya bertambah observasi baru.
+
+    Mengembalikan None jika state tidak ada, data berubah, atau jadwal/drift menuntut estimasi ulang.
+    """
+    results, metadata = model_update.load_state(train_series.name)
+    if results is None:
+        return None
+
+    n_obs = metadata["n_obs"]
+    if n_obs > len(train_series) or metadata["hash"] != order_cache.series_hash(train_series.iloc[:n_obs]):
+        return None
+
+    months_since_refit = metadata["months_since_refit"]
+    if n_obs < len(train_series):
+        endog_new, _ = model_update.new_observations(results, train_series.iloc[n_obs:])
+        if len(endog_new) != len(train_series) - n_obs:
+            return None
+        results = results.append(endog_new, refit=False)
+        score = model_update.drift_score(results, endog_new)
+        months_since_refit += len(endog_new)
+        if model_update.refit_due(months_since_refit, 0, score):
+            return None
+        model_update.save_state(train_series.name, results, {
+            "hash": order_cache.series_hash(train_series),
+            "n_obs": len(train_series),
+            "months_since_refit": months_since_refit,
+        })
+
+    return results.forecast(steps=steps).values
+
+
+def sarimax_forecast(train_series, steps=13, use_cache=True):
+    forecast_index = pd.date_range(
+        start=train_series.index.max() + pd.DateOffset(months=1),
+        periods=steps, freq='MS'
+    )
+
+    forecast = None
+    if use_cache:
+        try:
+            forecast = _forecast_from_state(train_series, steps)
+        except Exception:
+            forecast = None
+    if forecast is None:
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+        order, seasonal_order, mode, cached, search_seconds = select_order(train_series, use_cache)
+
+        start = time.perf_counter()
+        with span("sarimax_fit", series=train_series.name):
+            fitted = SARIMAX(train_series, order=order, seasonal_order=seasonal_order).fit()
+        fit_seconds = time.perf_counter() - start
+        forecast = fitted.forecast(steps=steps).values
+
+        if use_cache:
+            order_cache.record(
+                train_series, order, seasonal_order, float(fitted.aic), mode,
+                search_seconds, fit_seconds, previous=cached
+            )
+            model_update.save_state(train_series.name, fitted, {
+                "hash": order_cache.series_hash(train_series),
+                "n_obs": len(train_series),
+                "months_since_refit": 0,
+            })
+
+    return pd.DataFrame({train_series.name: forecast}, index=forecast_index)
+
+
+def last_value_forecast(train_series, steps=13):
+    """Forecast cadangan: ulangi nilai terakhir yang diketahui."""
+    forecast_index = pd.date_range(
+        start=train_series.index.max() + pd.DateOffset(months=1),
+        periods=steps, freq='MS'
+    )
+    last_value = train_series.dropna().iloc[-1] if train_series.notna().any() else float('nan')
+    return pd.DataFrame({train_series.name: [last_value] * steps}, index=forecast_index)
+
+
+def _fit_worker(conn, train_series, steps):
+    """Jalankan sarimax_forecast di proses anak dan kirim (status, hasil) lewat `conn`."""
+    try:
+        conn.send(("ok", call_traced(sarimax_forecast, train_series, steps)))
+    except Exception as e:
+        try:
+            conn.send(("error", e))
+        except Exception:
+            conn.send(("error", RuntimeError(f"{type(e).__name__}: {e}")))
+    finally:
+        conn.close()
+
+
+def sarimax_forecast_many(series_dict, steps=13, max_workers=FORECAST_WORKERS, fit_timeout=FIT_TIMEOUT,
+                          progress=None):
+    """Jalankan sarimax_forecast untuk beberapa kolom secara paralel, satu proses per kolom.
+
+    Setiap kolom punya batas waktu `fit_timeout` detik sejak prosesnya dimulai; proses yang
+    melewatinya dihentikan paksa. Kolom yang gagal atau kehabisan waktu memakai
+    `last_value_forecast` dan dicatat di `errors`. Dengan satu worker pun fitting tetap berjalan
+    di proses terpisah agar batas waktu berlaku. Hasil selalu berurutan sesuai `series_dict`.
+    `progress(selesai, total, kolom)` dipanggil setiap satu kolom selesai.
+    """
+    columns = list(series_dict)
+    results, errors = {}, {}
+    if not columns:
+        return results, errors
+    workers = min(max_workers or os.cpu_count() or 1, len(columns))
+
+    def finish(col, error=None):
+        if error is not None:
+            errors[col] = error
+            results[col] = last_value_forecast(series_dict[col], steps)
+        if progress is not None:
+            progress(len(results), len(columns), col)
+
+    context = multiprocessing.get_context("spawn")
+    waiting, running = list(columns), {}
+    try:
+        while waiting or running:
+            while waiting and len(running) < workers:
+                col = waiting.pop(0)
+                receiver, sender = context.Pipe(duplex=False)
+                process = context.Process(target=_fit_worker, args=(sender, series_dict[col], steps),
+                                          name=f"sarimax-{col}", daemon=True)
+                process.start()
+                sender.close()
+                running[col] = (process, receiver, time.monotonic() + fit_timeout)
+
+            next_deadline = min(deadline for _, _, deadline in running.values())
+            ready = wait([receiver for _, receiver, _ in running.values()],
+                         timeout=max(next_deadline - time.monotonic(), 0))
+            for col, (process, receiver, deadline) in list(running.items()):
+                if receiver in ready:
+                    try:
+                        status, payload = receiver.recv()
+                    except EOFError:
+                        status, payload = "error", RuntimeError(f"proses fitting berhenti (kode {process.exitcode})")
+                elif time.monotonic() >= deadline:
+                    process.kill()
+                    status, payload = "error", TimeoutError(f"fitting melebihi {fit_timeout} detik")
+                else:
+                    continue
+                process.join()
+                receiver.close()
+                del running[col]
+                if status == "ok":
+                    results[col], child = payload
+                    child.attrs["series"] = col
+                    attach(child)
+                    finish(col)
+                else:
+                    finish(col, payload)
+    finally:
+        for process, receiver, _ in running.values():
+            process.kill()
+            process.join()
+            receiver.close()
+
+    return {col: results[col] for col in columns}, errors
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from email.utils import formatdate
+
+import requests
+
+from utils.tracing import add_bytes
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get("HTTP_CACHE_DIR", os.path.join(".cache", "http"))
+OFFLINE = os.environ.get("HTTP_CACHE_OFFLINE", "").lower() in ("1", "true", "yes")
+
+_SECRET_PATH = re.compile(r"(/key/)[^/?#]+", re.IGNORECASE)
+_SECRET_QUERY = re.compile(r"([?&](?:key|api_key|apikey|token)=)[^&#]*", re.IGNORECASE)
+
+
+class OfflineCacheMiss(LookupError):
+    """Mode offline aktif tetapi URL belum pernah disimpan."""
+
+
+def redact_url(url):
+    """Hapus API key dari URL agar aman dijadikan kunci cache dan disimpan di disk."""
+    url = _SECRET_PATH.sub(r"\1***", url)
+    return _SECRET_QUERY.sub(r"\1***", url)
+
+
+class CachedResponse:
+    def __init__(self, url, status_code, content, encoding, headers, from_cache):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding
+        self.headers = headers
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} untuk {self.url}")
+
+
+class HttpCache:
+    """Cache respons HTTP di disk dengan TTL, revalidasi ETag/Last-Modified, dan mode replay offline.
+
+    Jika revalidasi gagal karena jaringan atau error 5xx, respons tersimpan yang kedaluwarsa tetap dipakai.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, offline=OFFLINE, session=None):
+        self.cache_dir = cache_dir
+        self.offline = offline
+        self.session = session or requests.Session()
+        self._lock = threading.Lock()
+
+    def _paths(self, url):
+        digest = hashlib.sha256(redact_url(url).encode("utf-8")).hexdigest()
+        base = os.path.join(self.cache_dir, digest)
+        return base + ".json", base + ".body"
+
+    def _load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(body_path, "rb") as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def _write(self, path, data):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _store(self, url, meta, body=None):
+        meta_path, body_path = self._paths(url)
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if body is not None:
+                self._write(body_path, body)
+            self._write(meta_path, json.dumps(meta, indent=2).encode("utf-8"))
+
+    def _response(self, url, meta, body, from_cache):
+        return CachedResponse(url, meta["status_code"], body, meta.get("encoding"), meta.get("headers", {}), from_cache)
+
+    def get(self, url, ttl, timeout=None):
+        meta, body = self._load(url)
+
+        if self.offline:
+            if meta is None:
+                raise OfflineCacheMiss(f"tidak ada respons tersimpan untuk {redact_url(url)}")
+            return self._response(url, meta, body, from_cache=True)
+
+        now = time.time()
+        if meta is not None and now - meta["fetched_at"] < ttl:
+            return self._response(url, meta, body, from_cache=True)
+
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+            elif not meta.get("etag"):
+                headers["If-Modified-Since"] = formatdate(meta["fetched_at"], usegmt=True)
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=timeout)
+        except requests.RequestException as e:
+            if meta is None:
+                raise
+            logger.warning("Gagal menghubungi %s (%s), memakai respons tersimpan", redact_url(url), e)
+            return self._response(url, meta, body, from_cache=True)
+        add_bytes(len(response.content))
+
+        if response.status_code >= 500 and meta is not None:
+            logger.warning("%s mengembalikan %s, memakai respons tersimpan", redact_url(url), response.status_code)
+            return self._response(url, meta, body, from_cache=True)
+
+        if response.status_code == 304 and meta is not None:
+            meta["fetched_at"] = now
+            meta["revalidated"] = meta.get("revalidated", 0) + 1
+            self._store(url, meta)
+            return self._response(url, meta, body, from_cache=True)
+
+        meta = {
+            "url": redact_url(url),
+            "status_code": response.status_code,
+            "encoding": response.encoding or response.apparent_encoding,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() in ("content-type", "etag", "last-modified")},
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": now,
+        }
+        if response.ok:
+            self._store(url, meta, response.content)
+        return self._response(url, meta, response.content, from_cache=False)
+
+    def put(self, url, body, status_code=200, encoding="utf-8", content_type=None):
+        """Simpan respons rekaman untuk `url`, misalnya fixture yang diputar ulang dalam mode offline."""
+        self._store(url, {
+            "url": redact_url(url),
+            "status_code": status_code,
+            "encoding": encoding,
+            "headers": {"Content-Type": content_type} if content_type else {},
+            "etag": None,
+            "last_modified": None,
+            "fetched_at": time.time(),
+        }, body)
+
+    def clear(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith((".json", ".body")):
+                os.remove(os.path.join(self.cache_dir, name))
+
+
+default_cache = HttpCache()
+
+
+def cached_get(url, ttl, timeout=None):
+    return default_cache.get(url, ttl=ttl, timeout=timeout)
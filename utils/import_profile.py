@@ -0,0 +1,85 @@
+import ast
+import os
+import subprocess
+import sys
+
+import pandas as pd
+
+
+HEAVY_STACKS = {
+    "Model (pmdarima/statsmodels)": ("pmdarima", "statsmodels"),
+    "LLM (openai)": ("openai",),
+    "Scraping (bs4)": ("bs4",),
+    "Grafik (plotly)": ("plotly",),
+}
+
+
+def page_imports(path):
+    """Pernyataan import tingkat modul dari sebuah file halaman, sesuai urutan di file."""
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    tree = ast.parse(source)
+    return [
+        ast.get_source_segment(source, node)
+        for node in tree.body
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+
+
+def parse_importtime(stderr):
+    """Ubah keluaran `python -X importtime` menjadi DataFrame satu baris per modul."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append({
+            "Modul": name.strip(),
+            "Kedalaman": depth,
+            "Self (ms)": int(self_us) / 1000,
+            "Kumulatif (ms)": int(cumulative_us) / 1000,
+        })
+    return pd.DataFrame(rows, columns=["Modul", "Kedalaman", "Self (ms)", "Kumulatif (ms)"])
+
+
+def profile_imports(statements, cwd=".", timeout=120):
+    """Jalankan `statements` di interpreter baru dengan `-X importtime` dan kembalikan hasilnya."""
+    env = dict(os.environ, PYTHONPATH=os.path.abspath(cwd))
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "\n".join(statements)],
+        cwd=cwd, env=env, capture_output=True, text=True, timeout=timeout
+    )
+    report = parse_importtime(completed.stderr)
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "gagal"
+        raise RuntimeError(f"Import gagal: {error}")
+    return report
+
+
+def loaded_stacks(modules):
+    """Stack berat yang ikut dimuat, berdasarkan daftar nama modul."""
+    packages = {name.split(".")[0] for name in modules}
+    return [stack for stack, roots in HEAVY_STACKS.items() if packages.intersection(roots)]
+
+
+def profile_pages(paths, cwd="."):
+    """Ringkasan biaya import tingkat modul untuk setiap halaman."""
+    rows, reports = [], {}
+    for path in paths:
+        name = os.path.basename(path)
+        try:
+            report = profile_imports(page_imports(path), cwd=cwd)
+        except Exception as e:
+            rows.append({"Halaman": name, "Import (ms)": None, "Jumlah Modul": None,
+                         "Stack Berat": "", "Error": str(e)})
+            continue
+        reports[name] = report
+        rows.append({
+            "Halaman": name,
+            "Import (ms)": round(report.loc[report["Kedalaman"] == 0, "Kumulatif (ms)"].sum(), 1),
+            "Jumlah Modul": len(report),
+            "Stack Berat": ", ".join(loaded_stacks(report["Modul"])),
+            "Error": "",
+        })
+    return pd.DataFrame(rows), reports
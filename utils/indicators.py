@@ -0,0 +1,169 @@
+import logging
+
+import numpy as np
+import pandas as pd
+
+from utils.tracing import traced
+from utils.working_days import effective_working_days
+
+
+logger = logging.getLogger(__name__)
+
+
+def _aligned(df, col_name, index):
+    if col_name not in df.columns:
+        return pd.Series(np.nan, index=index, dtype=float)
+    series = df[col_name]
+    series = series[series.index.notna() & ~series.index.duplicated()]
+    return series.reindex(index).astype(float)
+
+
+def merge_by_precedence(col_name, sources, index):
+    """Gabungkan beberapa sumber berdasarkan prioritas urutannya.
+
+    Mengembalikan nilai hasil gabungan dan nama sumber yang dipakai untuk setiap periode.
+    """
+    values = pd.Series(np.nan, index=index, dtype=float, name=col_name)
+    provenance = pd.Series(None, index=index, dtype=object, name=col_name)
+    for source_name, df_source in sources:
+        aligned = _aligned(df_source, col_name, index)
+        fill = values.isna() & aligned.notna()
+        values[fill] = aligned[fill]
+        provenance[fill] = source_name
+    return values, provenance
+
+
+@traced
+def update_or_forecast_column(col_name, df_existing, df_scraped, df_forecast, global_latest_index,
+                              with_provenance=False):
+    combined_index = pd.date_range(
+        start=min(df_scraped.index.min(), df_forecast.index.min()),
+        end=global_latest_index,
+        freq='MS'
+    )
+
+    values, provenance = merge_by_precedence(col_name, [
+        ("Aktual", df_existing),
+        ("Scraping", df_scraped),
+        ("Forecast", df_forecast),
+    ], combined_index)
+
+    updated_actual = values.to_frame()
+    forecast_df = df_forecast.loc[df_forecast.index > global_latest_index, [col_name]]
+
+    if with_provenance:
+        return updated_actual, forecast_df, provenance
+    return updated_actual, forecast_df
+
+
+def _allocation_weights(df_existing, weights):
+    periods = df_existing.index
+    years = pd.Series(periods.year, index=periods)
+
+    if isinstance(weights, pd.Series):
+        share = weights.reindex(periods).astype(float)
+        return share / share.groupby(years).transform('sum')
+
+    if weights == "volume":
+        volume = df_existing['Volume'].astype(float)
+        yearly_total = volume.groupby(years).sum()
+        tahun_terakhir = periods.max().year
+        comparison_year = years.where(years != tahun_terakhir, tahun_terakhir - 1)
+        total = comparison_year.map(yearly_total).fillna(0.0)
+        return (volume / total).where(total > 0, 0.0)
+
+    if weights == "working_days":
+        full_years = pd.date_range(f"{years.min()}-01-01", f"{years.max()}-12-01", freq='MS')
+        ewd = pd.Series(effective_working_days(full_years), index=full_years, dtype=float)
+        yearly_total = ewd.groupby(ewd.index.year).sum()
+        return pd.Series(ewd.reindex(periods).values, index=periods) / years.map(yearly_total)
+
+    if weights == "flat":
+        return pd.Series(1 / 12, index=periods)
+
+    raise ValueError(f"Bobot alokasi tidak dikenal: {weights}")
+
+
+def allocate_apbn_infra(df_apbn, df_existing, weights="volume", missing_budget="carry"):
+    """Alokasikan APBN infrastruktur tahunan ke tiap bulan dalam satu langkah.
+
+    `weights` dapat berupa "volume" (porsi volume penjualan), "working_days", "flat",
+    atau Series bobot per periode. `missing_budget` menentukan perlakuan tahun tanpa
+    anggaran: "carry" memakai anggaran tahun sebelumnya (tahun sebelum anggaran pertama
+    memakai anggaran pertama, dengan peringatan di log), "zero", atau "raise".
+    """
+    df_existing = df_existing.sort_index()
+    years = pd.Series(df_existing.index.year, index=df_existing.index)
+
+    budget_by_year = (
+        df_apbn.sort_values('Tahun', kind='stable')
+        .drop_duplicates('Tahun')
+        .set_index('Tahun')['APBN Infrastruktur']
+        .astype(float)
+    )
+    missing_years = sorted(set(years) - set(budget_by_year.index))
+    if missing_years:
+        if missing_budget == "raise":
+            raise ValueError(f"Anggaran APBN Infrastruktur tidak tersedia untuk tahun {missing_years}")
+        all_years = budget_by_year.index.union(missing_years)
+        budget_by_year = budget_by_year.reindex(all_years)
+        if missing_budget == "carry":
+            first_year = budget_by_year.first_valid_index()
+            if first_year is None:
+                raise ValueError("Anggaran APBN Infrastruktur kosong")
+            leading = [year for year in missing_years if year < first_year]
+            if leading:
+                logger.warning("Anggaran APBN Infrastruktur tahun %s tidak ada, memakai anggaran tahun pertama", leading)
+            budget_by_year = budget_by_year.ffill().bfill()
+        else:
+            budget_by_year = budget_by_year.fillna(0.0)
+
+    apbn_per_month = years.map(budget_by_year) * _allocation_weights(df_existing, weights)
+
+    periode = pd.to_datetime(pd.DataFrame({
+        'year': df_existing.index.year, 'month': df_existing.index.month, 'day': 1
+    }))
+    return pd.DataFrame(
+        {'APBN Infra': apbn_per_month.values},
+        index=pd.DatetimeIndex(periode, name='Periode')
+    )
+
+
+def seasonal_carry_forward(df_actual, col_name, horizon=13, max_lag_years=2, fill_value=0.0, annual_totals=None):
+    """Proyeksikan indikator dengan menyalin nilai bulan yang sama pada tahun-tahun sebelumnya.
+
+    Untuk setiap periode dicoba lag 1 tahun, lalu 2 tahun, dst. hingga `max_lag_years`.
+    Jika `annual_totals` (Series total tahunan berindeks tahun) diberikan, nilai yang
+    disalin diskalakan dengan rasio total tahun tujuan terhadap tahun sumber.
+    """
+    actual = df_actual[col_name]
+    actual = actual[actual.index.notna() & ~actual.index.duplicated()].astype(float)
+
+    forecast_index = pd.date_range(
+        start=actual.index.max() + pd.DateOffset(months=1),
+        periods=horizon, freq='MS', name='Periode'
+    )
+    values = pd.Series(np.nan, index=forecast_index)
+    source_year = pd.Series(np.nan, index=forecast_index)
+
+    for lag in range(1, max_lag_years + 1):
+        lagged = actual.reindex(forecast_index - pd.DateOffset(years=lag)).values
+        fill = values.isna().values & ~np.isnan(lagged)
+        values[fill] = lagged[fill]
+        source_year[fill] = forecast_index.year[fill] - lag
+
+    if annual_totals is not None:
+        target_total = pd.Series(forecast_index.year, index=forecast_index).map(annual_totals)
+        source_total = source_year.map(annual_totals)
+        values = values * (target_total / source_total).fillna(1.0)
+
+    return pd.DataFrame({col_name: values.fillna(fill_value)}, index=forecast_index)
+
+
+def forecast_apbn_infra(df_actual, horizon=13, annual_budget=None):
+    df_forecast = seasonal_carry_forward(
+        df_actual, 'APBN Infra', horizon=horizon, annual_totals=annual_budget
+    )
+    df_combined = pd.concat([df_actual[['APBN Infra']], df_forecast])
+    df_combined.index.name = 'Periode'
+    return df_combined.sort_index()
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from utils.local_insight import stats_summary
+from utils.tracing import span
+
+
+INSIGHT_CACHE_DIR = os.environ.get("INSIGHT_CACHE_DIR", os.path.join(".cache", "insight"))
+INSIGHT_TIMEOUT = float(os.environ.get("INSIGHT_TIMEOUT", "20"))
+REQUEST_TIMEOUT = 120
+RETRY_AFTER = 60
+PROMPT_VERSION = "2"
+MODEL_NAME = "openai/gpt-4o-mini"
+BASE_URL = "https://models.github.ai/inference"
+SYSTEM_PROMPT = "Kamu adalah analis data ahli yang memberikan insight dari data forecasting."
+COMPANY_PROFILES = {
+    "SBB": "PT Solusi Bangun Beton (PT SBB) adalah anak perusahaan dari PT Solusi Bangun Indonesia Tbk (SBI) yang bergerak di bidang produksi dan distribusi beton siap pakai (ready-mix concrete). Perusahaan ini menyediakan solusi beton berkualitas tinggi untuk berbagai kebutuhan konstruksi, mulai dari proyek infrastruktur skala besar hingga pembangunan perumahan dan komersial. Dengan jaringan lebih dari 30 batching plant yang tersebar di Pulau Jawa dan armada pengangkut yang terus diperluas, PT SBB mendukung pengiriman beton secara cepat dan efisien. Selain produk konvensional, PT SBB juga menawarkan beton inovatif seperti ThruCrete (beton berpori untuk resapan air), DekoCrete (beton dekoratif untuk estetika kawasan), dan SpeedCrete (beton cepat kering). Mengusung prinsip keberlanjutan, PT SBB menggunakan semen ramah lingkungan dan mendukung pengurangan emisi karbon dalam konstruksi. Dengan inovasi digital seperti layanan DynaPay dan komitmen terhadap mutu melalui laboratorium bersertifikasi, PT SBB berperan penting dalam pembangunan infrastruktur yang modern, efisien, dan berkelanjutan di Indonesia.",
+    "VUB": "PT Varia Usaha Beton (PT VUB) adalah anak perusahaan dari PT Semen Indonesia Beton yang bergerak di bidang produksi dan distribusi beton siap pakai (ready-mix), beton pracetak, dan material konstruksi lainnya. Berdiri sejak tahun 1991, PT VUB melayani berbagai kebutuhan konstruksi mulai dari infrastruktur besar hingga pembangunan komersial dan perumahan. Dengan lebih dari 30 plant yang tersebar di Jawa, Sulawesi, Kalimantan, dan Nusa Tenggara Barat, PT VUB memiliki jaringan distribusi yang luas serta didukung kuari internal untuk menjamin pasokan bahan baku. Perusahaan ini juga menyediakan layanan pengecoran, penyewaan concrete pump, dan produk beton inovatif seperti paving block dan pracetak. Mengusung prinsip profesionalisme, efisiensi, dan kepatuhan terhadap standar mutu internasional (ISO 9001, ISO 14001, OHSAS 18001), PT VUB menjadi salah satu penyedia solusi beton yang handal dan kompetitif di pasar nasional.",
+}
+
+
+@lru_cache(maxsize=None)
+def openai_client(api_key, base_url=BASE_URL):
+    """Client OpenAI bersama per proses; paket openai baru diimpor saat pertama dibutuhkan."""
+    from openai import OpenAI
+
+    return OpenAI(base_url=base_url, api_key=api_key)
+
+
+def build_insight_prompt(unit, df_full_forecast, stats):
+    forecast = df_full_forecast["Forecasting"].tail(12)
+    data_summary = "\n".join(f"{idx:%Y-%m}: {value:,.0f}" for idx, value in forecast.items())
+    prompt = f"""
+    {COMPANY_PROFILES[unit]}
+
+    Berikut adalah hasil peramalan volume penjualan readymix unit {unit} selama 12 bulan ke depan:
+
+    {data_summary}
+
+    Ringkasan statistik hasil peramalan dan histori penjualan:
+    {stats_summary(stats)}
+
+    Berdasarkan data tersebut dan latar belakang perusahaan di atas, lakukan analisis terhadap tren penjualan, temukan insight yang relevan, serta berikan rekomendasi bisnis strategis. Sampaikan dalam bahasa Indonesia yang formal, ringkas, dan berbasis data.
+    """
+    return prompt
+
+
+def insight_key(unit, forecast_values, prompt_version=PROMPT_VERSION):
+    values = np.round(np.asarray(forecast_values, dtype=float), 6)
+    digest = hashlib.sha256(values.tobytes()).hexdigest()[:16]
+    return f"{unit.lower()}-v{prompt_version}-{digest}"
+
+
+def _path(name, cache_dir):
+    return os.path.join(cache_dir, f"{name}.json")
+
+
+def load_insight(key, cache_dir=INSIGHT_CACHE_DIR):
+    try:
+        with open(_path(key, cache_dir), encoding="utf-8") as f:
+            return json.load(f)["text"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_insight(key, unit, text, cache_dir=INSIGHT_CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    entry = json.dumps({"key": key, "unit": unit, "text": text, "created_at": time.time()}, ensure_ascii=False)
+    path = _path(key, cache_dir)
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(entry)
+    os.replace(tmp_path, path)
+
+
+class InsightJob:
+    """Pembuatan insight di background thread; teks bertambah seiring token diterima.
+
+    `client` boleh berupa fungsi tanpa argumen yang mengembalikan client, sehingga
+    pembuatannya ikut berjalan di background.
+    """
+
+    def __init__(self, key, unit, client, prompt):
+        self.key = key
+        self.unit = unit
+        self.chunks = []
+        self.error = None
+        self.done = threading.Event()
+        self.finished_at = None
+        self._thread = threading.Thread(target=self._run, args=(client, prompt), daemon=True)
+
+    @property
+    def text(self):
+        return "".join(self.chunks)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self, client, prompt):
+        try:
+            with span("openai.chat", unit=self.unit, model=MODEL_NAME) as s:
+                if callable(client):
+                    client = client()
+                stream = client.chat.completions.create(
+                    model=MODEL_NAME,
+                    messages=[
+                        {"role": "system", "content": SYSTEM_PROMPT},
+                        {"role": "user", "content": prompt}
+                    ],
+                    stream=True,
+                    timeout=REQUEST_TIMEOUT,
+                )
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        self.chunks.append(chunk.choices[0].delta.content)
+                s.add_bytes(len(prompt.encode("utf-8")) + len(self.text.encode("utf-8")))
+            save_insight(self.key, self.unit, self.text)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished_at = time.time()
+            self.done.set()
+
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def get_or_start(key, unit, client, prompt):
+    """Kembalikan job yang sedang/selesai berjalan untuk key ini, atau mulai yang baru.
+
+    Job yang gagal dicoba ulang setelah `RETRY_AFTER` detik.
+    """
+    with _jobs_lock:
+        for other_key, other_job in list(_jobs.items()):
+            if other_key != key and other_job.done.is_set() and other_job.error is None:
+                del _jobs[other_key]
+        job = _jobs.get(key)
+        if job is None or (job.error is not None and time.time() - job.finished_at > RETRY_AFTER):
+            job = InsightJob(key, unit, client, prompt).start()
+            _jobs[key] = job
+        return job
+
+
+def stream_insight(placeholder, job, timeout=INSIGHT_TIMEOUT, poll_interval=0.1):
+    """Tampilkan teks insight secara bertahap ke `placeholder` hingga selesai atau timeout.
+
+    Mengembalikan True jika insight selesai dalam batas waktu.
+    """
+    deadline = time.monotonic() + timeout
+    while not job.done.wait(poll_interval):
+        if time.monotonic() > deadline:
+            return False
+        if job.chunks:
+            placeholder.markdown(job.text + " ▌")
+    return job.error is None
@@ -0,0 +1,140 @@
+import numpy as np
+import pandas as pd
+
+
+NAMA_BULAN = [
+    "Januari", "Februari", "Maret", "April", "Mei", "Juni",
+    "Juli", "Agustus", "September", "Oktober", "November", "Desember"
+]
+
+
+def _periode(ts):
+    return f"{NAMA_BULAN[ts.month - 1]} {ts.year}"
+
+
+def _angka(value):
+    return f"{value:,.0f}".replace(",", ".")
+
+
+def _persen(value):
+    return f"{value * 100:+.1f}%".replace(".", ",")
+
+
+def seasonality_strength(volume):
+    """Kekuatan musiman (0-1) dari deret aktual: 1 - Var(residual) / Var(detrended)."""
+    if len(volume) < 24:
+        return None
+    trend = volume.rolling(12, center=True).mean().rolling(2, center=True).mean()
+    detrended = (volume - trend).dropna()
+    seasonal = detrended.groupby(detrended.index.month).transform('mean')
+    residual = detrended - seasonal
+    if detrended.var() == 0:
+        return None
+    return float(max(0.0, 1 - residual.var() / detrended.var()))
+
+
+def compute_forecast_stats(forecast, volume):
+    """Hitung fakta kunci dari hasil peramalan dan histori volume aktual.
+
+    Jika forecast kosong, periode dan nilai puncak/terendah bernilai None.
+    """
+    forecast = forecast.astype(float).dropna()
+    actual = volume[volume > 0].astype(float).sort_index()
+    empty = forecast.empty
+
+    stats = {
+        "total_forecast": float(forecast.sum()),
+        "mean_forecast": float(forecast.mean()) if not empty else 0.0,
+        "peak_period": forecast.idxmax() if not empty else None,
+        "peak_value": float(forecast.max()) if not empty else None,
+        "trough_period": forecast.idxmin() if not empty else None,
+        "trough_value": float(forecast.min()) if not empty else None,
+        "trend_slope": float(np.polyfit(np.arange(len(forecast)), forecast.values, 1)[0]) if len(forecast) > 1 else 0.0,
+        "seasonality_strength": seasonality_strength(actual),
+        "yoy_growth": None,
+        "same_month_growth": None,
+        "months_above_last_year": None,
+        "months_compared": 0,
+    }
+
+    if len(actual) >= len(forecast) and len(forecast):
+        last_total = actual.iloc[-len(forecast):].sum()
+        if last_total > 0:
+            stats["yoy_growth"] = stats["total_forecast"] / last_total - 1
+
+    if empty:
+        return stats
+
+    last_year = actual.reindex(forecast.index - pd.DateOffset(years=1))
+    last_year.index = forecast.index
+    compared = last_year.notna()
+    if compared.any():
+        growth = forecast[compared] / last_year[compared] - 1
+        stats["same_month_growth"] = float(growth.mean())
+        stats["months_above_last_year"] = int((growth > 0).sum())
+        stats["months_compared"] = int(compared.sum())
+
+    return stats
+
+
+def stats_summary(stats):
+    """Ringkasan statistik dalam bentuk baris teks singkat, dipakai juga di prompt LLM."""
+    if stats["peak_period"] is None:
+        return "- Data tidak cukup: belum ada hasil peramalan untuk diringkas."
+    lines = [
+        f"- Total volume 12 bulan: {_angka(stats['total_forecast'])} (rata-rata {_angka(stats['mean_forecast'])}/bulan)",
+        f"- Puncak: {_periode(stats['peak_period'])} ({_angka(stats['peak_value'])}); "
+        f"terendah: {_periode(stats['trough_period'])} ({_angka(stats['trough_value'])})",
+    ]
+    if stats["mean_forecast"]:
+        lines.append(
+            f"- Tren: {_angka(stats['trend_slope'])} per bulan "
+            f"({_persen(stats['trend_slope'] / stats['mean_forecast'])} dari rata-rata bulanan)"
+        )
+    if stats["yoy_growth"] is not None:
+        lines.append(f"- Dibanding total 12 bulan aktual terakhir: {_persen(stats['yoy_growth'])}")
+    if stats["same_month_growth"] is not None:
+        lines.append(
+            f"- Dibanding bulan yang sama tahun lalu: rata-rata {_persen(stats['same_month_growth'])}, "
+            f"{stats['months_above_last_year']} dari {stats['months_compared']} bulan lebih tinggi"
+        )
+    if stats["seasonality_strength"] is not None:
+        lines.append(f"- Kekuatan pola musiman historis: {stats['seasonality_strength']:.2f}".replace(".", ","))
+    return "\n".join(lines)
+
+
+def render_local_insight(unit, stats):
+    """Susun ringkasan insight terstruktur dalam bahasa Indonesia tanpa memanggil LLM."""
+    if stats["peak_period"] is None:
+        return (
+            f"**Ringkasan Otomatis Peramalan {unit}**\n\n"
+            f"{stats_summary(stats)}\n\n"
+            "Periksa data aktual dan model unit ini, lalu jalankan ulang peramalan."
+        )
+    rekomendasi = [
+        f"Siapkan kapasitas batching plant, armada truk mixer, dan stok material menjelang "
+        f"{_periode(stats['peak_period'])} yang diperkirakan menjadi bulan tersibuk.",
+        f"Jadwalkan perawatan plant dan intensifkan penawaran proyek pada "
+        f"{_periode(stats['trough_period'])} ketika volume diperkirakan paling rendah.",
+    ]
+    growth = stats["yoy_growth"] if stats["yoy_growth"] is not None else stats["same_month_growth"]
+    if growth is not None and growth < 0:
+        rekomendasi.append(
+            "Volume diproyeksikan menurun dibanding tahun lalu; perkuat pipeline proyek infrastruktur "
+            "dan komersial serta evaluasi strategi harga."
+        )
+    elif growth is not None:
+        rekomendasi.append(
+            "Volume diproyeksikan tumbuh dibanding tahun lalu; pastikan pasokan semen dan agregat "
+            "mencukupi untuk menjaga tingkat layanan."
+        )
+    strength = stats["seasonality_strength"]
+    if strength is not None and strength >= 0.6:
+        rekomendasi.append("Pola musiman kuat; gunakan pola bulanan historis sebagai dasar perencanaan produksi.")
+
+    return (
+        f"**Ringkasan Otomatis Peramalan {unit}**\n\n"
+        f"{stats_summary(stats)}\n\n"
+        f"**Rekomendasi**\n\n"
+        + "\n".join(f"{i}. {item}" for i, item in enumerate(rekomendasi, start=1))
+    )
@@ -0,0 +1,193 @@
+"""Artefak ringkas model SARIMAX volume: spesifikasi JSON dan satu array .npy, tanpa pickle statsmodels."""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+FORMAT_VERSION = 1
+
+
+def compact_paths(path):
+    """Path (spesifikasi JSON, array NPY) artefak ringkas untuk model di `path` (.pkl atau tanpa ekstensi)."""
+    base = os.path.splitext(path)[0] if path.endswith(".pkl") else path
+    return f"{base}.sarimax.json", f"{base}.sarimax.npy"
+
+
+def has_compact(path):
+    return all(os.path.exists(p) for p in compact_paths(path))
+
+
+_state_sarimax = None
+
+
+def state_sarimax():
+    """Kelas SARIMAX dengan state awal yang diketahui; dibuat saat pertama dibutuhkan agar statsmodels tetap lazy."""
+    global _state_sarimax
+    if _state_sarimax is None:
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+        class StateSARIMAX(SARIMAX):
+            """Inisialisasi state yang diketahui ikut terbawa saat model di-`append`/`extend`."""
+
+            def __init__(self, endog, exog=None, initial_state=None, initial_state_cov=None, **kwargs):
+                super().__init__(endog, exog=exog, **kwargs)
+                self.initial_state = np.asarray(initial_state, dtype=float)
+                self.initial_state_cov = np.asarray(initial_state_cov, dtype=float)
+                self._init_keys += ["initial_state", "initial_state_cov"]
+                self.ssm.initialize_known(self.initial_state, self.initial_state_cov)
+
+        StateSARIMAX.__module__ = __name__
+        StateSARIMAX.__qualname__ = "StateSARIMAX"
+        _state_sarimax = StateSARIMAX
+    return _state_sarimax
+
+
+def __getattr__(name):
+    # Agar pickle bisa menemukan `utils.model_artifact.StateSARIMAX`.
+    if name == "StateSARIMAX":
+        return state_sarimax()
+    raise AttributeError(name)
+
+
+def model_spec(model):
+    """Argumen pembentuk model SARIMAX (order, seasonal_order, trend, dst.) yang bisa disimpan sebagai JSON."""
+    return {
+        key: list(value) if isinstance(value, tuple) else value
+        for key, value in model._get_init_kwds().items()
+        if key not in ("endog", "exog", "initial_state", "initial_state_cov")
+    }
+
+
+def compact_state(results):
+    """Pisahkan hasil SARIMAX menjadi (spesifikasi, array) yang cukup untuk meramal dari akhir sampel."""
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    model = results.model
+    if not isinstance(model, SARIMAX) or model.k_endog != 1:
+        raise TypeError("Artefak ringkas hanya mendukung model SARIMAX univariat")
+    if model.ssm.filter_method != 1 or model.ssm.stability_method != 1:
+        raise ValueError("Metode filter non-standar tidak didukung artefak ringkas")
+
+    n = model.nobs
+    filter_results = results.filter_results
+    arrays = {
+        "params": np.asarray(results.params, dtype=float),
+        "state": filter_results.predicted_state[:, n - 1],
+        "state_cov": filter_results.predicted_state_cov[:, :, n - 1],
+        "endog": model.endog[:, 0],
+        "exog": model.exog if model.k_exog else np.empty((n, 0)),
+    }
+    spec = {
+        "format": FORMAT_VERSION,
+        "class": "SARIMAX",
+        "init_kwds": model_spec(model),
+        "endog_name": model.endog_names,
+        "exog_names": list(model.exog_names or []),
+        "start": f"{model._index[0]:%Y-%m-%d}",
+        "freq": model._index.freqstr,
+        "nobs": n,
+        "param_names": list(model.param_names),
+    }
+    return spec, arrays
+
+
+def from_compact_state(spec, arrays):
+    """Bangun ulang hasil SARIMAX siap forecast dari `compact_state`.
+
+    Model dibentuk dari observasi terakhir saja dengan state awal yang diketahui.
+    """
+    index = pd.date_range(start=spec["start"], periods=spec["nobs"], freq=spec["freq"], name="Periode")
+    endog = pd.Series(arrays["endog"], index=index, name=spec["endog_name"])
+    exog = pd.DataFrame(arrays["exog"], index=index, columns=spec["exog_names"]) if spec["exog_names"] else None
+
+    init_kwds = {
+        key: tuple(value) if isinstance(value, list) else value
+        for key, value in spec["init_kwds"].items()
+    }
+    tail_kwds = dict(init_kwds, trend_offset=init_kwds.get("trend_offset", 1) + spec["nobs"] - 1)
+    model = state_sarimax()(
+        endog.iloc[-1:], exog=exog.iloc[-1:] if exog is not None else None,
+        initial_state=arrays["state"], initial_state_cov=arrays["state_cov"], **tail_kwds
+    )
+    results = model.filter(pd.Series(arrays["params"], index=spec["param_names"]), cov_type="none")
+    results.training_data = (endog, exog, init_kwds)
+    return results
+
+
+def export_compact(results, path, source=None):
+    """Simpan hasil SARIMAX sebagai artefak ringkas di samping `path`; kembalikan path kedua file.
+
+    `source` (opsional) dicatat di spesifikasi, misalnya hash pickle asal.
+    """
+    if isinstance(results.model, state_sarimax()):
+        raise TypeError("Ekspor harus dari model dengan data latih lengkap, bukan dari artefak ringkas")
+    spec, arrays = compact_state(results)
+
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = {"offset": offset, "shape": list(array.shape)}
+        offset += array.size
+    flat = np.concatenate([np.ravel(array) for array in arrays.values()]).astype(np.float64)
+    spec = dict(spec, arrays=layout, source=source)
+
+    json_path, npy_path = compact_paths(path)
+    for target, write in [
+        (npy_path, lambda f: np.save(f, flat)),
+        (json_path, lambda f: f.write(json.dumps(spec, indent=2).encode("utf-8"))),
+    ]:
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, target)
+    return json_path, npy_path
+
+
+def read_spec(path):
+    with open(compact_paths(path)[0], encoding="utf-8") as f:
+        spec = json.load(f)
+    if spec.get("format") != FORMAT_VERSION:
+        raise ValueError(f"Format artefak tidak didukung: {spec.get('format')}")
+    return spec
+
+
+def load_compact(path, mmap=False):
+    """Bangun ulang hasil SARIMAX siap forecast dari artefak ringkas.
+
+    Dengan `mmap=True` array dibaca lewat memory map. Riwayat data latih tersedia di
+    atribut `training_data` (endog, exog, init_kwds) untuk estimasi ulang parameter.
+    """
+    spec = read_spec(path)
+    flat = np.load(compact_paths(path)[1], mmap_mode="r" if mmap else None)
+    arrays = {
+        name: np.asarray(flat[item["offset"]:item["offset"] + int(np.prod(item["shape"]))]).reshape(item["shape"])
+        for name, item in spec["arrays"].items()
+    }
+    return from_compact_state(spec, arrays)
+
+
+def refit_compact(results, endog_new, exog_new=None, fit_kwargs=None):
+    """Estimasi ulang parameter model ringkas dengan seluruh riwayat ditambah observasi baru."""
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+    endog, exog, init_kwds = results.training_data
+    endog = pd.concat([endog, endog_new.rename(endog.name)])
+    if exog is not None:
+        exog = pd.concat([exog, exog_new[exog.columns]])
+    model = SARIMAX(endog, exog=exog, **init_kwds)
+    return model.fit(start_params=results.params, **(fit_kwargs or {}))
+
+
+def forecast_difference(results, compact, steps=12):
+    """Selisih absolut terbesar forecast model asal dan model ringkas untuk `steps` bulan ke depan."""
+    model = results.model
+    exog = None
+    if model.k_exog:
+        exog = pd.DataFrame(
+            model.exog[-steps:], columns=model.exog_names,
+            index=pd.date_range(start=model._index[-1], periods=steps + 1, freq=model._index.freq)[1:]
+        )
+    original = np.asarray(results.forecast(steps=steps, exog=exog))
+    rebuilt = np.asarray(compact.forecast(steps=steps, exog=exog))
+    return float(np.max(np.abs(original - rebuilt)))
@@ -0,0 +1,284 @@
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+import joblib
+import pandas as pd
+
+from utils.forecast_cache import artifact_identity
+from utils.model_artifact import compact_paths, has_compact, load_compact, read_spec
+from utils.tracing import span
+
+
+logger = logging.getLogger(__name__)
+
+MODEL_REGISTRY = os.environ.get("MODEL_REGISTRY", os.path.join("models", "registry.json"))
+MODEL_REGISTRY_DIR = os.environ.get("MODEL_REGISTRY_DIR", os.path.join("models", "registry"))
+REGISTRY_POLL = float(os.environ.get("MODEL_REGISTRY_POLL", "30"))
+
+_lock = threading.Lock()
+
+
+def artifact_source(path):
+    """File yang benar-benar dimuat untuk artefak `path`: artefak ringkas jika ada dan dibuat dari pickle yang sama."""
+    if has_compact(path) and (not os.path.exists(path) or read_spec(path)["source"] == artifact_identity(path)[2]):
+        return compact_paths(path)[1]
+    return path
+
+
+def load_artifact(path, mmap=False):
+    source = artifact_source(path)
+    with span("load_model", artifact=os.path.basename(path), compact=source != path) as s:
+        s.add_bytes(os.path.getsize(source))
+        if source != path:
+            return load_compact(path, mmap=mmap)
+        return joblib.load(path)
+
+
+def describe(results):
+    """Metadata ringkas model untuk dicatat di manifest."""
+    model = results.model
+    training = getattr(results, "training_data", None)
+    metadata = {
+        "order": str(tuple(model.order)),
+        "seasonal_order": str(tuple(model.seasonal_order)),
+        "exog": ", ".join(model.exog_names or []),
+        "observasi": len(training[0]) if training is not None else int(model.nobs),
+        "periode_akhir": f"{model._index[-1]:%Y-%m}",
+    }
+    if training is None:
+        metadata["aic"] = round(float(results.aic), 2)
+    return metadata
+
+
+def artifact_files(path):
+    return [p for p in [path, *compact_paths(path)] if os.path.exists(p)]
+
+
+def load_manifest(path=MODEL_REGISTRY):
+    """Manifest registri: unit -> versi -> artefak, metadata, dan metrik, beserta versi aktif."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"units": {}}
+
+
+def _save_manifest(manifest, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def register(unit, artifact, metadata=None, metrics=None, promote=False, copy=True,
+             path=MODEL_REGISTRY, registry_dir=MODEL_REGISTRY_DIR):
+    """Daftarkan artefak model sebagai versi baru unit dan kembalikan nomor versinya.
+
+    Dengan `copy`, file artefak (pickle dan/atau artefak ringkas) disalin ke `registry_dir/<unit>/vNNN`
+    sehingga versi lama tetap tersedia untuk rollback.
+    """
+    files = artifact_files(artifact)
+    if not files:
+        raise FileNotFoundError(f"Artefak {artifact} tidak ditemukan")
+
+    with _lock:
+        manifest = load_manifest(path)
+        entry = manifest["units"].setdefault(unit, {"current": None, "history": [], "versions": {}})
+        version = max(map(int, entry["versions"]), default=0) + 1
+
+        if copy:
+            directory = os.path.join(registry_dir, unit, f"v{version:03d}")
+            os.makedirs(directory, exist_ok=True)
+            for file_path in files:
+                shutil.copy2(file_path, directory)
+            artifact = os.path.join(directory, os.path.basename(artifact))
+
+        entry["versions"][str(version)] = {
+            "artifact": artifact.replace(os.sep, "/"),
+            "sha256": artifact_identity(artifact_source(artifact))[2],
+            "created_at": time.time(),
+            "metadata": metadata or {},
+            "metrics": metrics or {},
+        }
+        if promote:
+            entry["current"] = version
+            entry["history"].append(version)
+        _save_manifest(manifest, path)
+    return version
+
+
+def set_metrics(unit, version, metrics, path=MODEL_REGISTRY):
+    with _lock:
+        manifest = load_manifest(path)
+        manifest["units"][unit]["versions"][str(version)]["metrics"].update(metrics)
+        _save_manifest(manifest, path)
+
+
+def promote(unit, version, path=MODEL_REGISTRY):
+    with _lock:
+        manifest = load_manifest(path)
+        entry = manifest["units"].get(unit)
+        if entry is None or str(version) not in entry["versions"]:
+            raise KeyError(f"Versi {version} untuk unit {unit} tidak terdaftar")
+        entry["current"] = int(version)
+        entry["history"].append(int(version))
+        _save_manifest(manifest, path)
+
+
+def previous_version(unit, path=MODEL_REGISTRY):
+    """Versi aktif sebelum versi sekarang, atau None jika tidak ada."""
+    entry = load_manifest(path)["units"].get(unit, {})
+    history = entry.get("history", [])
+    earlier = [v for v in history[:-1] if v != entry.get("current")]
+    return earlier[-1] if earlier else None
+
+
+def resolve(unit, default=None, path=MODEL_REGISTRY):
+    """(versi, path artefak) yang aktif untuk unit; versi 0 berarti artefak bawaan di luar registri."""
+    entry = load_manifest(path)["units"].get(unit)
+    if entry is None or entry.get("current") is None:
+        return 0, default
+    return entry["current"], entry["versions"][str(entry["current"])]["artifact"]
+
+
+def versions_table(path=MODEL_REGISTRY):
+    rows = []
+    for unit, entry in sorted(load_manifest(path)["units"].items()):
+        for version, item in sorted(entry["versions"].items(), key=lambda kv: int(kv[0])):
+            rows.append({
+                "Unit": unit.upper(),
+                "Versi": int(version),
+                "Aktif": int(version) == entry.get("current"),
+                "Artefak": item["artifact"],
+                "Dibuat": pd.to_datetime(item["created_at"], unit="s"),
+                **{f"Metadata {k}": v for k, v in item["metadata"].items()},
+                **{f"Metrik {k}": v for k, v in item["metrics"].items()},
+            })
+    return pd.DataFrame(rows)
+
+
+class ModelPool:
+    """Model aktif setiap unit yang sudah dimuat, dipakai bersama semua sesi dalam proses.
+
+    Versi baru dimuat lebih dulu lalu ditukar dalam satu langkah, sehingga permintaan yang
+    berjalan tetap memakai model lama sampai model baru siap. Perubahan manifest dari proses
+    lain (misalnya CLI) dideteksi oleh thread pemantau `warm()`.
+    """
+
+    def __init__(self, defaults, path=MODEL_REGISTRY, poll=REGISTRY_POLL):
+        self.defaults = dict(defaults)
+        self.path = path
+        self.poll = poll
+        self._lock = threading.Lock()
+        self._models = {}
+        self._errors = {}
+        self._thread = None
+        self._manifest_mtime = None
+
+    def units(self):
+        return sorted(set(self.defaults) | set(load_manifest(self.path)["units"]))
+
+    def _load(self, unit, version, artifact):
+        results = load_artifact(artifact)
+        identity = (unit, version, artifact_identity(artifact_source(artifact))[2])
+        return {"version": version, "artifact": artifact, "identity": identity, "results": results,
+                "loaded_at": time.time()}
+
+    def _swap(self, unit, loaded):
+        with self._lock:
+            self._models[unit] = loaded
+            self._errors.pop(unit, None)
+
+    def entry(self, unit):
+        """Model aktif unit yang sudah dimuat; dimuat sekarang jika belum pernah dimuat."""
+        with self._lock:
+            loaded = self._models.get(unit)
+        if loaded is None:
+            version, artifact = resolve(unit, self.defaults.get(unit), self.path)
+            if artifact is None:
+                raise KeyError(f"Tidak ada model untuk unit {unit}")
+            loaded = self._load(unit, version, artifact)
+            self._swap(unit, loaded)
+        return loaded
+
+    def get(self, unit):
+        return self.entry(unit)["results"]
+
+    def identity(self, unit):
+        return self.entry(unit)["identity"]
+
+    def sync(self):
+        """Muat ulang unit yang versi aktifnya di manifest berbeda dari yang ada di pool."""
+        for unit in self.units():
+            version, artifact = resolve(unit, self.defaults.get(unit), self.path)
+            with self._lock:
+                loaded = self._models.get(unit)
+            if artifact is None or (loaded is not None and loaded["version"] == version
+                                    and loaded["artifact"] == artifact):
+                continue
+            if not artifact_files(artifact):
+                with self._lock:
+                    if unit not in self._errors:
+                        logger.warning("Model %s versi %s tidak ditemukan: %s", unit, version, artifact)
+                    self._errors[unit] = FileNotFoundError(f"{artifact} tidak ditemukan")
+                continue
+            try:
+                self._swap(unit, self._load(unit, version, artifact))
+            except Exception as e:
+                logger.exception("Gagal memuat model %s versi %s", unit, version)
+                with self._lock:
+                    self._errors[unit] = e
+
+    def promote(self, unit, version):
+        """Aktifkan versi lain secara langsung: muat dulu, catat di manifest, lalu tukar."""
+        item = load_manifest(self.path)["units"][unit]["versions"][str(version)]
+        loaded = self._load(unit, int(version), item["artifact"])
+        promote(unit, version, self.path)
+        self._swap(unit, loaded)
+        return loaded
+
+    def rollback(self, unit):
+        version = previous_version(unit, self.path)
+        if version is None:
+            raise ValueError(f"Tidak ada versi sebelumnya untuk unit {unit}")
+        return self.promote(unit, version)
+
+    def status(self):
+        with self._lock:
+            models, errors = dict(self._models), dict(self._errors)
+        return pd.DataFrame([
+            {
+                "Unit": unit.upper(),
+                "Versi": models[unit]["version"] if unit in models else None,
+                "Artefak": models[unit]["artifact"] if unit in models else None,
+                "Dimuat": pd.to_datetime(models[unit]["loaded_at"], unit="s") if unit in models else None,
+                "Error": str(errors[unit]) if unit in errors else None,
+            }
+            for unit in sorted(set(models) | set(errors) | set(self.defaults))
+        ])
+
+    def _watch(self):
+        while True:
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime != self._manifest_mtime or len(self._models) + len(self._errors) < len(self.units()):
+                self._manifest_mtime = mtime
+                self.sync()
+            if self.poll <= 0:
+                return
+            time.sleep(self.poll)
+
+    def warm(self):
+        """Muat semua model aktif di background dan pantau perubahan manifest; aman dipanggil berulang."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._watch, name="model-pool", daemon=True)
+                self._thread.start()
+        return self._thread
@@ -0,0 +1,106 @@
+import os
+import re
+import threading
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from utils.model_artifact import refit_compact
+
+
+MODEL_STATE_DIR = os.environ.get("MODEL_STATE_DIR", os.path.join(".cache", "model_state"))
+REFIT_EVERY = int(os.environ.get("MODEL_REFIT_EVERY", "12"))
+DRIFT_THRESHOLD = float(os.environ.get("MODEL_DRIFT_THRESHOLD", "3.0"))
+
+
+def last_period(results):
+    return pd.Timestamp(results.model._index[-1])
+
+
+def new_observations(results, endog, exog=None, drop_zero=False):
+    """Ambil observasi setelah periode terakhir model yang bersambung dan lengkap.
+
+    Berhenti pada bulan pertama yang kosong (NaN, atau 0 jika `drop_zero`) agar model
+    tidak maju dengan data yang belum tersedia.
+    """
+    start = last_period(results) + pd.DateOffset(months=1)
+    endog = endog[endog.index >= start].sort_index().rename(results.model.endog_names)
+    if exog is not None:
+        exog = exog[results.model.exog_names]
+    expected = pd.date_range(start=start, periods=len(endog), freq='MS')
+
+    valid = (endog.index == expected) & endog.notna().values
+    if drop_zero:
+        valid &= endog.values != 0
+    if exog is not None:
+        valid &= exog.reindex(endog.index).notna().all(axis=1).values
+    n_valid = int(np.argmin(valid)) if not valid.all() else len(valid)
+
+    endog_new = endog.iloc[:n_valid]
+    exog_new = exog.reindex(endog_new.index) if exog is not None else None
+    if len(endog_new):
+        endog_new = endog_new.set_axis(pd.date_range(start=start, periods=len(endog_new), freq='MS'))
+        if exog_new is not None:
+            exog_new = exog_new.set_axis(endog_new.index)
+    return endog_new, exog_new
+
+
+def drift_score(results, endog_new):
+    """Rata-rata galat prediksi satu langkah terstandardisasi pada observasi baru."""
+    errors = results.filter_results.standardized_forecasts_error[0][-len(endog_new):]
+    errors = errors[np.isfinite(errors)]
+    return float(np.mean(np.abs(errors))) if len(errors) else 0.0
+
+
+def refit_due(months_since_refit, n_new, score, refit_every=REFIT_EVERY, drift_threshold=DRIFT_THRESHOLD):
+    return months_since_refit + n_new >= refit_every or score > drift_threshold
+
+
+def update_results(results, endog_new, exog_new=None, months_since_refit=0,
+                   refit_every=REFIT_EVERY, drift_threshold=DRIFT_THRESHOLD):
+    """Majukan state model dengan observasi baru tanpa mengestimasi ulang parameter.
+
+    Estimasi ulang penuh hanya dilakukan jika jumlah bulan sejak refit terakhir
+    mencapai `refit_every` atau skor drift melewati `drift_threshold`.
+    Mengembalikan (results_baru, aksi, skor_drift) dengan aksi "none", "append", atau "refit".
+    """
+    if len(endog_new) == 0:
+        return results, "none", 0.0
+
+    appended = results.append(endog_new, exog=exog_new, refit=False)
+    score = drift_score(appended, endog_new)
+    if hasattr(results, "training_data"):
+        endog, exog, init_kwds = results.training_data
+        appended.training_data = (
+            pd.concat([endog, endog_new.rename(endog.name)]),
+            pd.concat([exog, exog_new[exog.columns]]) if exog is not None else None,
+            init_kwds,
+        )
+
+    if refit_due(months_since_refit, len(endog_new), score, refit_every, drift_threshold):
+        if hasattr(results, "training_data"):
+            return refit_compact(results, endog_new, exog_new, fit_kwargs={"disp": False}), "refit", score
+        return results.append(endog_new, exog=exog_new, refit=True, fit_kwargs={"disp": False}), "refit", score
+    return appended, "append", score
+
+
+def _state_path(name, state_dir):
+    slug = re.sub(r"[^0-9a-zA-Z]+", "_", str(name)).strip("_").lower()
+    return os.path.join(state_dir, f"{slug}.pkl")
+
+
+def load_state(name, state_dir=MODEL_STATE_DIR):
+    """Muat (results, metadata) model yang tersimpan, atau (None, None)."""
+    try:
+        return joblib.load(_state_path(name, state_dir))
+    except (OSError, EOFError, ValueError):
+        return None, None
+
+
+def save_state(name, results, metadata, state_dir=MODEL_STATE_DIR):
+    os.makedirs(state_dir, exist_ok=True)
+    path = _state_path(name, state_dir)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    joblib.dump((results, metadata), tmp_path)
+    os.replace(tmp_path, path)
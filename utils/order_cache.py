@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+
+ORDER_CACHE_DIR = os.environ.get("ORDER_CACHE_DIR", os.path.join(".cache", "order_selection"))
+
+
+def series_hash(series):
+    """Hash isi deret waktu (periode dan nilai) untuk kunci cache."""
+    digest = hashlib.sha256()
+    digest.update(np.asarray(series.index.asi8, dtype=np.int64).tobytes())
+    digest.update(np.asarray(series.values, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def _path(name, cache_dir):
+    slug = re.sub(r"[^0-9a-zA-Z]+", "_", str(name)).strip("_").lower()
+    return os.path.join(cache_dir, f"{slug}.json")
+
+
+def load_entry(name, cache_dir=ORDER_CACHE_DIR):
+    try:
+        with open(_path(name, cache_dir), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_entry(name, entry, cache_dir=ORDER_CACHE_DIR):
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _path(name, cache_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entry, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def lookup(series, cache_dir=ORDER_CACHE_DIR):
+    """Kembalikan (status, entry): "hit" jika deret identik, "append" jika hanya bertambah observasi baru."""
+    entry = load_entry(series.name, cache_dir)
+    if entry is None:
+        return "miss", None
+    n_obs = entry["n_obs"]
+    if n_obs == len(series) and entry["hash"] == series_hash(series):
+        return "hit", entry
+    if n_obs < len(series) and entry["hash"] == series_hash(series.iloc[:n_obs]):
+        return "append", entry
+    return "miss", entry
+
+
+def record(series, order, seasonal_order, aic, mode, search_seconds, fit_seconds, previous=None,
+           cache_dir=ORDER_CACHE_DIR):
+    full_search_seconds = search_seconds if mode == "full" else (previous or {}).get("full_search_seconds")
+    saved_seconds = (previous or {}).get("saved_seconds", 0.0)
+    if mode != "full" and full_search_seconds is not None:
+        saved_seconds += max(full_search_seconds - search_seconds, 0.0)
+
+    entry = {
+        "name": series.name,
+        "hash": series_hash(series),
+        "n_obs": len(series),
+        "order": list(order),
+        "seasonal_order": list(seasonal_order),
+        "aic": aic,
+        "mode": mode,
+        "search_seconds": search_seconds,
+        "full_search_seconds": full_search_seconds,
+        "fit_seconds": fit_seconds,
+        "saved_seconds": saved_seconds,
+        "updated_at": time.time(),
+    }
+    save_entry(series.name, entry, cache_dir)
+    return entry
+
+
+def summary(cache_dir=ORDER_CACHE_DIR):
+    """Ringkasan cache orde untuk ditampilkan di halaman pengaturan."""
+    if not os.path.isdir(cache_dir):
+        return pd.DataFrame()
+    rows = []
+    for file_name in sorted(os.listdir(cache_dir)):
+        if not file_name.endswith(".json"):
+            continue
+        with open(os.path.join(cache_dir, file_name), encoding="utf-8") as f:
+            entry = json.load(f)
+        rows.append({
+            "Indikator": entry["name"],
+            "Order": tuple(entry["order"]),
+            "Seasonal Order": tuple(entry["seasonal_order"]),
+            "AIC": entry["aic"],
+            "Mode": entry["mode"],
+            "Observasi": entry["n_obs"],
+            "Waktu Pencarian (s)": entry["search_seconds"],
+            "Waktu Fit (s)": entry["fit_seconds"],
+            "Total Hemat (s)": entry["saved_seconds"],
+            "Diperbarui": pd.to_datetime(entry["updated_at"], unit="s"),
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,416 @@
+import os
+import re
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from utils.data_cache import dataset_cache, reload_df
+from utils.forecast_cache import artifact_identity, forecast_cache, frame_hash
+from utils.forecasting import sarimax_forecast_many
+from utils.indicators import forecast_apbn_infra, update_or_forecast_column
+from utils.insight import INSIGHT_TIMEOUT, build_insight_prompt, get_or_start, insight_key, load_insight
+from utils.local_insight import compute_forecast_stats, render_local_insight
+from utils.model_artifact import compact_paths, export_compact, forecast_difference, load_compact, state_sarimax
+from utils.model_registry import ModelPool
+from utils.model_update import load_state, new_observations, save_state, update_results
+from utils.scraping import fetch_macro_indicators
+from utils.sheet_writer import sheet_writer
+from utils.tracing import span, traced
+from utils.working_days import effective_working_days
+
+
+UNITS = {
+    "sbb": {
+        "sheet": "SBB",
+        "assumptions": "Forecasting SBB",
+        "model": "models/model_sarimax_sbb_update_final.pkl",
+        "features": ["Inflasi", "APBN Infra", "Effective Working Days"],
+    },
+    "vub": {
+        "sheet": "VUB",
+        "assumptions": "Forecasting VUB",
+        "model": "models/model_sarimax_vub_update_final.pkl",
+        "features": ["BI Rate", "APBN Infra", "PDB Konstruksi"],
+    },
+}
+
+FORECAST_COLUMNS = ["BI Rate", "Inflasi", "PDB Konstruksi"]
+SCRAPED_ONLY_COLUMNS = ["APBN Infra", "Effective Working Days"]
+INDICATOR_COLUMNS = ["BI Rate", "Inflasi", "APBN Infra", "PDB Konstruksi", "Effective Working Days"]
+HORIZON = 12
+LAG_PATTERN = re.compile(r"^(?P<col>.+) \(lag (?P<lag>\d+)\)$")
+
+
+class StageTimer:
+    """Catat durasi setiap tahap pipeline (detik), sesuai urutan dijalankan.
+
+    Setiap tahap juga dicatat sebagai span (lihat utils.tracing) di bawah span yang sedang aktif.
+    """
+
+    def __init__(self):
+        self.durations = {}
+
+    @contextmanager
+    def stage(self, name):
+        with span(name) as s:
+            try:
+                yield
+            finally:
+                self.durations[name] = self.durations.get(name, 0.0) + time.perf_counter() - s.start
+
+
+def _warn(on_warning, message):
+    if on_warning is not None:
+        on_warning(message)
+
+
+def forecast_effective_working_days(df_actual, steps=HORIZON + 1):
+    forecast_periods = pd.date_range(
+        start=df_actual.index.max() + pd.DateOffset(months=1),
+        periods=steps,
+        freq='MS',
+        name='Periode'
+    )
+    return pd.DataFrame(
+        {'Effective Working Days': effective_working_days(forecast_periods)},
+        index=forecast_periods
+    )
+
+
+def fetch_indicators(df, api_key, on_warning=None):
+    """Ambil indikator makro terbaru; sumber yang gagal memakai data tersimpan di `df`."""
+    fetched = fetch_macro_indicators(df, api_key)
+    for source, error in fetched.errors.items():
+        _warn(on_warning, f"Gagal mengambil {source}, memakai data tersimpan: {error}")
+
+    return {
+        col: fetched.data.get(col, df[[col]].dropna())
+        for col in INDICATOR_COLUMNS
+    }
+
+
+def process_all_columns(df_existing, scraped_data_dict, start_year=2020, steps=HORIZON + 1,
+                        progress=None, on_warning=None):
+    """Gabungkan data aktual dengan hasil scraping dan forecast indikator.
+
+    Mengembalikan data aktual yang diperbarui dan asumsi indikator untuk `steps` bulan ke depan.
+    """
+    updated_actuals = df_existing.copy()
+    forecast_assumptions = pd.DataFrame(columns=['Periode'])
+
+    all_latest_indices = []
+    for col, df_scraped in scraped_data_dict.items():
+        if not df_scraped.empty:
+            all_latest_indices.append(df_scraped.index.max())
+
+    all_latest_indices.append(updated_actuals.index.max())
+    global_latest_index = max(all_latest_indices)
+
+    all_index = pd.date_range(
+        start=min(updated_actuals.index.min(), global_latest_index),
+        end=global_latest_index,
+        freq='MS'
+    )
+    updated_actuals = updated_actuals.reindex(all_index)
+    updated_actuals.index.name = "Periode"
+    updated_actuals['Tahun'] = updated_actuals.index.year
+    updated_actuals['Bulan'] = updated_actuals.index.month
+
+    train_series = {
+        col: df_existing.loc[df_existing.index.year >= start_year, col]
+        for col in FORECAST_COLUMNS
+    }
+    forecasts, fit_errors = sarimax_forecast_many(train_series, steps=steps, progress=progress)
+    for col, error in fit_errors.items():
+        _warn(on_warning, f"Model {col} gagal dilatih, memakai nilai terakhir: {error}")
+
+    for col in FORECAST_COLUMNS + SCRAPED_ONLY_COLUMNS:
+        df_col = df_existing[[col]]
+        df_col = df_col[df_col.index.year >= start_year]
+
+        scraped_df = scraped_data_dict.get(col, pd.DataFrame())
+        if col == "APBN Infra":
+            forecast_df = forecast_apbn_infra(
+                scraped_df, horizon=steps, annual_budget=scraped_df.attrs.get("annual_budget")
+            )
+        elif col == "Effective Working Days":
+            forecast_df = forecast_effective_working_days(scraped_df, steps)
+        else:
+            forecast_df = forecasts[col]
+            scraped_df = scraped_df[scraped_df.index.year >= start_year]
+
+        actual_df, forecast_df_col = update_or_forecast_column(
+            col, df_col, scraped_df, forecast_df, global_latest_index
+        )
+        actual_df = actual_df[actual_df.index.isin(updated_actuals.index)]
+
+        for c in actual_df:
+            updated_actuals.loc[actual_df.index, c] = actual_df[c].values
+
+        forecast_assumptions['Periode'] = forecast_df_col.index
+        forecast_assumptions[col] = forecast_df_col.values
+
+    forecast_assumptions.set_index('Periode', inplace=True)
+    return updated_actuals, forecast_assumptions
+
+
+@traced
+def refresh_indicators(df, forecasting_assumptions, api_key, start_year=2020, steps=HORIZON + 1,
+                       progress=None, on_warning=None, timer=None):
+    """Scraping, forecast indikator, dan gabungkan ke data aktual tanpa menulis ke penyimpanan."""
+    timer = timer or StageTimer()
+    with timer.stage("scraping"):
+        scraped_data_dict = fetch_indicators(df, api_key, on_warning)
+
+    with timer.stage("forecast indikator"):
+        updated_actuals, forecast_assumptions = process_all_columns(
+            df, scraped_data_dict, start_year=start_year, steps=steps,
+            progress=progress, on_warning=on_warning
+        )
+
+    updated_actuals['Volume'] = updated_actuals['Volume'].fillna(0)
+
+    prev_forecasting = forecasting_assumptions['Forecasting']
+    mask = prev_forecasting.index.isin(updated_actuals.index)
+    for idx in prev_forecasting.index[mask]:
+        updated_actuals.at[idx, 'Forecasting'] = prev_forecasting.at[idx]
+
+    return updated_actuals, forecast_assumptions
+
+
+model_pool = ModelPool({unit: config["model"] for unit, config in UNITS.items()})
+
+
+def load_model(unit):
+    """Model aktif unit dari registri (lihat utils.model_registry), dipakai bersama seluruh sesi."""
+    return model_pool.get(unit)
+
+
+def lag_name(col, lag):
+    """Nama fitur exog untuk kolom `col` yang digeser `lag` bulan, misalnya "Inflasi (lag 1)"."""
+    return col if lag == 0 else f"{col} (lag {lag})"
+
+
+def feature_frame(df, features):
+    """Kolom exog `features` dari data bulanan `df`; fitur lag diambil dari kolom asalnya beberapa bulan sebelumnya."""
+    columns = {}
+    for name in features:
+        match = LAG_PATTERN.match(name)
+        columns[name] = df[match["col"]].shift(int(match["lag"])) if match else df[name]
+    return pd.DataFrame(columns, index=df.index)
+
+
+def with_features(actuals, assumptions, features):
+    """Data aktual dan asumsi yang dilengkapi kolom lag `features`.
+
+    Lag bulan-bulan pertama asumsi diambil dari data aktual terakhir.
+    """
+    matches = [LAG_PATTERN.match(name) for name in features]
+    if not any(matches):
+        return actuals, assumptions
+    columns = sorted({match["col"] if match else name for name, match in zip(features, matches)})
+    timeline = pd.concat([actuals[columns], assumptions.loc[assumptions.index > actuals.index.max(), columns]])
+    exog = feature_frame(timeline, features)
+    return (
+        actuals.assign(**{name: exog[name].reindex(actuals.index) for name in features}),
+        assumptions.assign(**{name: exog[name].reindex(assumptions.index) for name in features}),
+    )
+
+
+def unit_features(unit):
+    """Nama exog model aktif unit (bisa berupa lag); fitur bawaan di UNITS jika unit belum punya model."""
+    try:
+        exog_names = load_model(unit).model.exog_names
+    except (KeyError, FileNotFoundError):
+        exog_names = None
+    return list(exog_names or UNITS[unit]["features"])
+
+
+def export_model(unit, steps=HORIZON):
+    """Ekspor pickle model unit ke artefak ringkas dan pastikan forecast keduanya sama.
+
+    Mengembalikan ukuran file, waktu muat, dan selisih forecast terbesar.
+    """
+    state_sarimax()  # impor statsmodels lebih dulu agar tidak ikut terukur sebagai waktu muat
+
+    path = UNITS[unit]["model"]
+    start = time.perf_counter()
+    results = joblib.load(path)
+    pickle_seconds = time.perf_counter() - start
+
+    export_compact(results, path, source=artifact_identity(path)[2])
+    start = time.perf_counter()
+    compact = load_compact(path)
+    compact_seconds = time.perf_counter() - start
+
+    difference = forecast_difference(results, compact, steps)
+    if difference > 1e-6:
+        for compact_path in compact_paths(path):
+            os.remove(compact_path)
+        raise ValueError(f"Forecast artefak ringkas {unit} berbeda {difference:g} dari pickle")
+    return {
+        "pickle_bytes": os.path.getsize(path),
+        "compact_bytes": sum(os.path.getsize(p) for p in compact_paths(path)),
+        "pickle_seconds": pickle_seconds,
+        "compact_seconds": compact_seconds,
+        "difference": difference,
+    }
+
+
+@traced
+def update_model(unit, df, features):
+    """Model aktif unit yang dimajukan dengan observasi volume baru (lihat utils.model_update).
+
+    Hasil pembaruan dan jumlah bulan sejak estimasi ulang disimpan per unit dan versi model,
+    sehingga estimasi ulang penuh hanya terjadi sesuai jadwal, bukan setiap proses dimulai.
+    """
+    base = load_model(unit)
+    identity = list(model_pool.identity(unit))
+    endog_new, exog_new = new_observations(base, df["Volume"], df[features], drop_zero=True)
+    if not len(endog_new):
+        return base
+
+    name = f"volume-{unit}"
+    results, metadata = load_state(name)
+    n_obs = metadata["n_obs"] if results is not None and metadata.get("identity") == identity else None
+    if n_obs is not None and n_obs <= len(endog_new) and metadata["hash"] == frame_hash(
+            pd.concat([endog_new, exog_new], axis=1).iloc[:n_obs]):
+        months_since_refit = metadata["months_since_refit"]
+        endog_rest, exog_rest = endog_new.iloc[n_obs:], exog_new.iloc[n_obs:]
+    else:
+        results, months_since_refit, endog_rest, exog_rest = base, 0, endog_new, exog_new
+    if not len(endog_rest):
+        return results
+
+    results, action, _ = update_results(results, endog_rest, exog_rest, months_since_refit)
+    save_state(name, results, {
+        "identity": identity,
+        "n_obs": len(endog_new),
+        "hash": frame_hash(pd.concat([endog_new, exog_new], axis=1)),
+        "months_since_refit": 0 if action == "refit" else months_since_refit + len(endog_rest),
+    })
+    return results
+
+
+def forecast_volume(model_fit, forecasting_assumptions, features, horizon=HORIZON):
+    exog_df = forecasting_assumptions[features][:horizon]
+    with span("model_fit.forecast", steps=horizon):
+        forecast = model_fit.forecast(steps=horizon, exog=exog_df)
+    return pd.DataFrame({
+        "Forecasting": np.asarray(forecast)
+    }, index=pd.date_range(start=forecasting_assumptions.index.min(), periods=horizon, freq='MS'))
+
+
+@dataclass
+class RefreshResult:
+    actuals: pd.DataFrame
+    assumptions: pd.DataFrame
+    forecast: pd.DataFrame
+    durations: dict = field(default_factory=dict)
+    warnings: list = field(default_factory=list)
+
+
+def write_unchanged(storage, frames, versions):
+    """Tulis `frames` {worksheet: df} hanya jika tiap worksheet belum diubah sejak versi `versions` dibaca.
+
+    Lock worksheet di `sheet_writer` dipegang selama pemeriksaan dan penulisan sehingga tidak
+    bertabrakan dengan antrian tulis. Jika ada worksheet yang diubah (versi `dataset_cache` naik
+    atau masih ada tulisan tertunda), tidak ada yang ditulis dan RuntimeError dilempar.
+    """
+    with ExitStack() as stack:
+        for name in sorted(frames):
+            stack.enter_context(sheet_writer.sheet_lock(name))
+        pending = sheet_writer.pending()
+        changed = [name for name in frames if dataset_cache.version(name) != versions[name] or name in pending]
+        if changed:
+            raise RuntimeError(f"{', '.join(changed)} diubah selama refresh; hasil refresh tidak ditulis")
+        for name, df in frames.items():
+            storage.write(name, df)
+            dataset_cache.put(name, df, expected_version=versions[name])
+
+
+@traced
+def run_refresh(storage, unit, api_key, horizon=HORIZON, write=True, start_year=2020, progress=None):
+    """Jalankan pembaruan lengkap satu unit: baca data, scraping, forecast indikator dan volume, tulis."""
+    config = UNITS[unit]
+    timer = StageTimer()
+    warnings = []
+
+    with timer.stage("baca data"):
+        # Perubahan dari halaman pengaturan yang masih di antrian harus masuk sebelum dibaca.
+        sheets = [config["sheet"], config["assumptions"]]
+        for name in sheets:
+            sheet_writer.flush(name)
+        versions = {name: dataset_cache.version(name) for name in sheets}
+        df = reload_df(storage, config["sheet"])
+        forecasting_assumptions = reload_df(storage, config["assumptions"])
+
+    updated_actuals, assumptions = refresh_indicators(
+        df, forecasting_assumptions, api_key, start_year=start_year, steps=horizon + 1,
+        progress=progress, on_warning=warnings.append, timer=timer
+    )
+
+    with timer.stage("forecast volume"):
+        features = unit_features(unit)
+        model_actuals, model_assumptions = with_features(updated_actuals, assumptions, features)
+        model_fit = update_model(unit, model_actuals, features)
+        forecast = forecast_volume(model_fit, model_assumptions, features, horizon)
+        assumptions = assumptions.assign(Forecasting=forecast["Forecasting"])
+
+    if write:
+        with timer.stage("tulis"):
+            write_unchanged(storage, {config["sheet"]: updated_actuals, config["assumptions"]: assumptions}, versions)
+
+    return RefreshResult(updated_actuals, assumptions, forecast, timer.durations, warnings)
+
+
+@traced
+def build_snapshot(unit, actuals, assumptions, forecast=None, client=None, insight_timeout=INSIGHT_TIMEOUT,
+                   durations=None, horizon=HORIZON):
+    """Susun snapshot peramalan siap tampil: forecast, exog yang dipakai, insight, dan durasi tiap tahap.
+
+    Jika `forecast` belum ada, model tersimpan diperbarui dengan data `actuals` lalu dipakai untuk meramal.
+    Insight AI ditunggu paling lama `insight_timeout` detik; setelah itu memakai insight lokal.
+    """
+    config = UNITS[unit]
+    name = config["sheet"]
+    features = unit_features(unit)
+    actuals_exog, assumptions_exog = with_features(actuals, assumptions, features)
+    timer = StageTimer()
+    timer.durations.update(durations or {})
+
+    if forecast is None:
+        with timer.stage("forecast volume"):
+            data_key = frame_hash(actuals_exog[["Volume"] + features])
+            forecast_key = (model_pool.identity(unit), data_key,
+                            frame_hash(assumptions_exog[features][:horizon]), horizon)
+            forecast = forecast_cache.get_or_compute(
+                forecast_key,
+                lambda: forecast_volume(update_model(unit, actuals_exog, features),
+                                        assumptions_exog, features, horizon)
+            )
+
+    with timer.stage("insight"):
+        stats = compute_forecast_stats(forecast["Forecasting"], actuals["Volume"])
+        key = insight_key(name, forecast["Forecasting"])
+        insight, insight_source = load_insight(key), "ai"
+        if insight is None and client is not None:
+            job = get_or_start(key, name, client, build_insight_prompt(name, forecast, stats))
+            if job.done.wait(insight_timeout) and job.error is None:
+                insight = job.text
+        if insight is None:
+            insight, insight_source = render_local_insight(name, stats), "lokal"
+
+    return {
+        "actuals": actuals[["Volume", "Forecasting"]].copy(),
+        "forecast": forecast,
+        "exog": assumptions_exog[features][:horizon].copy(),
+        "insight": insight,
+        "insight_key": key,
+        "insight_source": insight_source,
+        "durations": dict(timer.durations),
+    }
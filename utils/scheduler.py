@@ -0,0 +1,181 @@
+import logging
+import os
+import threading
+import time
+from functools import partial
+
+from utils.data_cache import dataset_cache
+from utils.pipeline import HORIZON, UNITS, build_snapshot, run_refresh
+from utils.sheet_writer import sheet_writer, values_changed
+from utils.snapshots import load_snapshot, save_snapshot
+from utils.tracing import span
+
+
+logger = logging.getLogger(__name__)
+
+# Scheduler di dalam proses Streamlit hanya aktif jika REFRESH_INTERVAL (detik) diisi.
+REFRESH_INTERVAL = float(os.environ.get("REFRESH_INTERVAL", "0"))
+
+
+def refresh_snapshots(storage, api_key, client=None, units=None, horizon=HORIZON, write=True,
+                      start_year=2020, source="terjadwal", progress=None):
+    """Jalankan refresh lengkap untuk setiap unit dan susun snapshot barunya.
+
+    Snapshot hanya disimpan (dan hasil refresh hanya ditulis) jika `write`. Unit yang gagal
+    tidak menghentikan unit lainnya. `progress(unit, selesai, total, kolom)` diteruskan ke fitting indikator.
+    Mengembalikan snapshot dan error per unit.
+    """
+    snapshots, errors = {}, {}
+    for unit in units or sorted(UNITS):
+        try:
+            with span("refresh", unit=unit, source=source):
+                result = run_refresh(
+                    storage, unit, api_key, horizon=horizon, write=write, start_year=start_year,
+                    progress=partial(progress, unit) if progress is not None else None
+                )
+                snapshot = build_snapshot(
+                    unit, result.actuals, result.assumptions, forecast=result.forecast,
+                    client=client, durations=result.durations, horizon=horizon
+                )
+                snapshot = dict(snapshot, warnings=result.warnings, source=source)
+                snapshots[unit] = save_snapshot(unit, snapshot) if write else snapshot
+        except Exception as e:
+            logger.exception("Refresh unit %s gagal", unit)
+            errors[unit] = e
+    return snapshots, errors
+
+
+def rebuild_snapshot(storage, unit, client=None, source="dashboard"):
+    """Snapshot baru dari data tersimpan tanpa scraping, misalnya setelah data diubah manual.
+
+    Forecast yang berubah ikut disimpan ke worksheet asumsi. Insight AI tidak ditunggu.
+    """
+    config = UNITS[unit]
+    with span("rebuild_snapshot", unit=unit, source=source):
+        actuals = dataset_cache.get(storage, config["sheet"])
+        assumptions = dataset_cache.get(storage, config["assumptions"])
+        snapshot = build_snapshot(unit, actuals, assumptions, client=client, insight_timeout=0)
+
+        updated_assumptions = assumptions.assign(Forecasting=snapshot["forecast"]["Forecasting"])
+        if values_changed(assumptions.get("Forecasting"), updated_assumptions["Forecasting"]):
+            dataset_cache.put(config["assumptions"], updated_assumptions)
+            sheet_writer.submit(storage, config["assumptions"], updated_assumptions)
+        return save_snapshot(unit, dict(snapshot, warnings=[], source=source))
+
+
+_rebuilds = {}
+_rebuilds_lock = threading.Lock()
+
+
+def rebuild_snapshot_async(storage, unit, client=None, source="pengaturan"):
+    """Jalankan `rebuild_snapshot` di background, paling banyak satu per unit.
+
+    Permintaan yang datang selama pembuatan berjalan digabung menjadi satu putaran ulang
+    setelahnya. Mengembalikan True jika thread baru dimulai.
+    """
+    with _rebuilds_lock:
+        if unit in _rebuilds:
+            _rebuilds[unit] = (storage, client, source)
+            return False
+        _rebuilds[unit] = None
+
+    def run(args):
+        while True:
+            try:
+                rebuild_snapshot(args[0], unit, *args[1:])
+            except Exception:
+                logger.exception("Gagal membuat snapshot unit %s", unit)
+            with _rebuilds_lock:
+                args = _rebuilds[unit]
+                if args is None:
+                    del _rebuilds[unit]
+                    return
+                _rebuilds[unit] = None
+
+    threading.Thread(target=run, args=((storage, client, source),), name=f"snapshot-{unit}", daemon=True).start()
+    return True
+
+
+def initial_delay(interval, units=None):
+    """Sisa waktu sampai refresh berikutnya berdasarkan umur snapshot tertua; 0 jika ada unit tanpa snapshot."""
+    ages = []
+    for unit in units or sorted(UNITS):
+        snapshot = load_snapshot(unit)
+        if snapshot is None:
+            return 0.0
+        ages.append(time.time() - snapshot["created_at"])
+    return max(0.0, interval - max(ages))
+
+
+class RefreshScheduler:
+    """Menjalankan `job` di background thread setiap `interval` detik; `run_now()` memicu lebih awal."""
+
+    def __init__(self, job, interval=REFRESH_INTERVAL, delay=0.0):
+        self.job = job
+        self.interval = interval
+        self.delay = delay
+        self.created_at = time.time()
+        self.last_started = None
+        self.last_finished = None
+        self.last_error = None
+        self.last_result = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="refresh-scheduler", daemon=True)
+
+    @property
+    def next_run(self):
+        if self.last_started is None:
+            return self.created_at + self.delay
+        return self.last_started + self.interval
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def run_now(self):
+        self._wake.set()
+
+    def join(self, timeout=None):
+        self._thread.join(timeout)
+
+    def _loop(self):
+        if self.delay and self._wake.wait(self.delay):
+            self._wake.clear()
+        while not self._stop.is_set():
+            self.last_started = time.time()
+            try:
+                self.last_result = self.job()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                logger.exception("Refresh terjadwal gagal")
+            self.last_finished = time.time()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def ensure_scheduler(job, interval=REFRESH_INTERVAL):
+    """Mulai scheduler bersama untuk proses ini jika belum berjalan; `interval` 0 menonaktifkannya.
+
+    Refresh pertama ditunda sampai snapshot yang ada berumur `interval`.
+    """
+    global _scheduler
+    if interval <= 0:
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RefreshScheduler(job, interval, delay=initial_delay(interval)).start()
+        return _scheduler
+
+
+def get_scheduler():
+    return _scheduler
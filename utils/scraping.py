@@ -0,0 +1,261 @@
+import html
+import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from utils.http_cache import cached_get
+from utils.indicators import allocate_apbn_infra
+from utils.tracing import in_context, traced
+from utils.working_days import effective_working_days
+
+
+SOURCE_TIMEOUT = 15
+TOTAL_DEADLINE = 45
+
+HOUR = 60 * 60
+SOURCE_TTL = {
+    "Inflasi": 12 * HOUR,
+    "BI Rate": 12 * HOUR,
+    "APBN Kemenkeu": 7 * 24 * HOUR,
+    "APBN Bisnis": 30 * 24 * HOUR,
+}
+
+
+@dataclass
+class FetchResult:
+    """Hasil pengambilan data: data yang berhasil, error, dan durasi per sumber."""
+    data: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+    durations: dict = field(default_factory=dict)
+
+
+def _timed(func):
+    start = time.perf_counter()
+    try:
+        return func(), None, time.perf_counter() - start
+    except Exception as e:
+        return None, e, time.perf_counter() - start
+
+
+def fetch_concurrently(sources, deadline=TOTAL_DEADLINE, max_workers=None):
+    """Jalankan semua sumber secara paralel dan kembalikan hasil parsial jika ada yang gagal/terlambat."""
+    result = FetchResult()
+    if not sources:
+        return result
+
+    executor = ThreadPoolExecutor(max_workers=max_workers or len(sources))
+    futures = {executor.submit(in_context(_timed), func): name for name, func in sources.items()}
+    done, not_done = wait(futures, timeout=deadline)
+
+    for future in done:
+        name = futures[future]
+        value, error, duration = future.result()
+        result.durations[name] = duration
+        if error is not None:
+            result.errors[name] = error
+        else:
+            result.data[name] = value
+
+    for future in not_done:
+        name = futures[future]
+        future.cancel()
+        result.durations[name] = deadline
+        result.errors[name] = TimeoutError(f"melebihi batas waktu {deadline} detik")
+
+    executor.shutdown(wait=False, cancel_futures=True)
+    return result
+
+
+@traced
+def scrape_inflasi(api_key, timeout=SOURCE_TIMEOUT):
+    url = f"https://webapi.bps.go.id/v1/api/view/domain/0000/model/statictable/lang/ind/id/915/key/{api_key}"
+    response = cached_get(url, ttl=SOURCE_TTL["Inflasi"], timeout=timeout)
+    response.raise_for_status()
+    json_data = response.json()
+    html_encoded = json_data["data"]["table"]
+    html_decoded = html.unescape(html_encoded)
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_decoded, "html.parser")
+    rows = soup.find_all('tr')
+    data_months, data_years, data_inflation = [], [], []
+    for row in rows:
+        months = row.find_all('td', class_='xl6622202')
+        months = [col.get_text(strip=True) for col in months]
+        if months:
+            data_months.append(months[0].replace('\xa0', '').strip())
+    for row in rows:
+        years = row.find_all('td', class_='xl7022202')
+        years = [col.get_text(strip=True) for col in years]
+        if years:
+            data_years = years
+    for row in rows:
+        values = row.find_all('td', class_=['xl7222202', 'xl7122202'])
+        values = [col.get_text(strip=True) for col in values]
+        if values:
+            data_inflation.append(values)
+    inflation_data = []
+    for i in range(len(data_months)):
+        for j in range(len(data_years)):
+            inflation_data.append({
+                'Tahun': data_years[j],
+                'Bulan': data_months[i],
+                'Inflasi': data_inflation[i][j] if j < len(data_inflation[i]) else None
+            })
+    df_inflation = pd.DataFrame(inflation_data)
+    df_inflation['Inflasi'] = df_inflation['Inflasi'].str.replace(',', '.', regex=False)
+    df_inflation['Inflasi'] = pd.to_numeric(df_inflation['Inflasi'], errors='coerce')
+    df_inflation = df_inflation.dropna(subset=['Inflasi']).reset_index(drop=True)
+    df_inflation['Inflasi'] = df_inflation['Inflasi'] / 100
+    df_inflation['Tahun'] = df_inflation['Tahun'].astype(int)
+    month_map = {
+        "Januari": 1, "Februari": 2, "Maret": 3, "April": 4, "Mei": 5, "Juni": 6,
+        "Juli": 7, "Agustus": 8, "September": 9, "Oktober": 10, "November": 11, "Desember": 12
+    }
+    df_inflation["Bulan"] = df_inflation["Bulan"].map(month_map)
+    df_inflation['Periode'] = pd.to_datetime({
+        'year': df_inflation['Tahun'],
+        'month': df_inflation['Bulan'],
+        'day': 1
+    })
+    df_inflation = df_inflation.set_index('Periode').drop(columns=['Tahun', 'Bulan']).sort_index()
+    return df_inflation
+
+
+@traced
+def scrape_bi_rate(api_key, timeout=SOURCE_TIMEOUT):
+    url = f'https://webapi.bps.go.id/v1/api/list/model/data/lang/ind/domain/0000/var/379/key/{api_key}?th=2020-2025'
+
+    response = cached_get(url, ttl=SOURCE_TTL["BI Rate"], timeout=timeout)
+    response.raise_for_status()
+    data = response.json()
+    datacontent = data.get('datacontent', {})
+
+    data_list = []
+
+    for kode, value in datacontent.items():
+        timecode = kode[6:]
+
+        try:
+            if len(timecode) == 3:
+                bulan = int(timecode[2])
+                tahun = 2000 + int(timecode[:2])
+            elif len(timecode) == 4:
+                bulan = int(timecode[2:])
+                tahun = 2000 + int(timecode[:2])
+            else:
+                continue
+        except ValueError:
+            continue
+
+        data_list.append({
+            'Tahun': tahun,
+            'Bulan': bulan,
+            'BI Rate': float(value)
+        })
+
+    df_bi_rate = pd.DataFrame(data_list)
+    df_bi_rate = df_bi_rate.sort_values(by=['Tahun', 'Bulan']).reset_index(drop=True)
+    df_bi_rate = df_bi_rate[df_bi_rate['Bulan'] <= 12]
+    df_bi_rate = df_bi_rate[df_bi_rate['Tahun'] >= 2009]
+    df_bi_rate['Periode'] = pd.to_datetime({
+        'year': df_bi_rate['Tahun'],
+        'month': df_bi_rate['Bulan'],
+        'day': 1
+    })
+    df_bi_rate = df_bi_rate.set_index('Periode')
+    df_bi_rate.drop(columns=['Tahun', 'Bulan'], inplace=True)
+    df_bi_rate['BI Rate'] = df_bi_rate['BI Rate'] / 100
+    return df_bi_rate
+
+
+@traced
+def scrape_apbn_kemenkeu(timeout=SOURCE_TIMEOUT):
+    url = "https://media.kemenkeu.go.id/SinglePage/custompage?p=/Pages/Home/Anggaran-Infrastruktur"
+    response = cached_get(url, ttl=SOURCE_TTL["APBN Kemenkeu"], timeout=timeout)
+    response.raise_for_status()
+    data = json.loads(response.text)['Data']['Content']
+
+    return pd.DataFrame({
+        'Tahun': [int(item['Tahun']) for item in data],
+        'APBN Infrastruktur': [
+            float(item['Jumlah'].replace(',', '.')) for item in data
+        ]
+    })
+
+
+@traced
+def scrape_apbn_bisnis(timeout=SOURCE_TIMEOUT):
+    url_apbn_2025 = 'https://ekonomi.bisnis.com/read/20240816/45/1791651/anggaran-infrastruktur-rp400-triliun-untuk-proyek-prioritas-di-2025-apa-saja'
+    response = cached_get(url_apbn_2025, ttl=SOURCE_TTL["APBN Bisnis"], timeout=timeout)
+    response.raise_for_status()
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(response.text, 'html.parser')
+    text = soup.find('article').find('p').get_text(strip=True)
+
+    tahun_2025_match = re.search(r'infrastruktur\s*(\d{4})', text)
+    anggaran_2025_match = re.search(r'Rp\s*(\d{1,3}(?:\.\d{3})*(?:,\d{1,2})?)\s*triliun', text)
+
+    if not (tahun_2025_match and anggaran_2025_match):
+        return None
+
+    tahun_2025 = int(tahun_2025_match.group(1))
+    anggaran_2025 = float(
+        anggaran_2025_match.group(1).replace('.', '').replace(',', '.')
+    )
+    return tahun_2025, anggaran_2025
+
+
+@traced
+def scrape_apbn_infra(df_existing, timeout=SOURCE_TIMEOUT, deadline=TOTAL_DEADLINE):
+    fetched = fetch_concurrently({
+        "kemenkeu": lambda: scrape_apbn_kemenkeu(timeout),
+        "bisnis": lambda: scrape_apbn_bisnis(timeout),
+    }, deadline=deadline)
+
+    if "kemenkeu" in fetched.errors:
+        raise fetched.errors["kemenkeu"]
+
+    df_apbn = fetched.data["kemenkeu"]
+    anggaran_terbaru = fetched.data.get("bisnis")
+    if anggaran_terbaru is not None:
+        df_apbn.loc[len(df_apbn)] = list(anggaran_terbaru)
+
+    df_apbn = df_apbn.sort_values('Tahun').reset_index(drop=True)
+    allocated = allocate_apbn_infra(df_apbn, df_existing)
+    # Anggaran per tahun ikut dibawa untuk menskalakan proyeksi tahun berikutnya (forecast_apbn_infra).
+    budget = df_apbn.drop_duplicates('Tahun')
+    allocated.attrs["annual_budget"] = pd.Series(
+        budget['APBN Infrastruktur'].astype(float).values, index=budget['Tahun'].astype(int), name='APBN Infrastruktur'
+    )
+    return allocated
+
+
+def scrape_pdb_konstruksi(df_existing):
+    return df_existing[['PDB Konstruksi']]
+
+
+@traced
+def scrape_effective_working_days(df_existing):
+    periods_actual = df_existing.index.sort_values()
+    return pd.DataFrame(
+        {'Effective Working Days': effective_working_days(periods_actual)},
+        index=pd.DatetimeIndex(periods_actual, name='Periode')
+    )
+
+
+def fetch_macro_indicators(df_existing, api_key, timeout=SOURCE_TIMEOUT, deadline=TOTAL_DEADLINE):
+    """Ambil seluruh indikator makro secara paralel dengan batas waktu per sumber dan total."""
+    sources = {
+        "BI Rate": lambda: scrape_bi_rate(api_key, timeout),
+        "Inflasi": lambda: scrape_inflasi(api_key, timeout),
+        "APBN Infra": lambda: scrape_apbn_infra(df_existing, timeout, deadline),
+        "PDB Konstruksi": lambda: scrape_pdb_konstruksi(df_existing),
+        "Effective Working Days": lambda: scrape_effective_working_days(df_existing),
+    }
+    return fetch_concurrently(sources, deadline=deadline)
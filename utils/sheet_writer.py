@@ -0,0 +1,143 @@
+import atexit
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.tracing import span
+
+
+logger = logging.getLogger(__name__)
+
+FLUSH_DELAY = 2.0
+RETRY_MAX_DELAY = float(os.environ.get("SHEET_WRITER_RETRY_MAX", "300"))
+
+
+def frame_digest(df):
+    return int(pd.util.hash_pandas_object(df.reset_index(), index=False).sum())
+
+
+def values_changed(stored, new):
+    """True jika nilai forecast baru berbeda dari yang tersimpan (NaN dianggap sama)."""
+    if stored is None:
+        return True
+    stored, new = pd.Series(stored, dtype=float).align(pd.Series(new, dtype=float))
+    return not np.allclose(stored.values, new.values, equal_nan=True)
+
+
+class WriteBehindWriter:
+    """Antrian tulis yang digabung antar sesi dan di-flush di background.
+
+    `target` adalah backend penyimpanan dengan method `write(worksheet, df)`.
+    Setiap worksheet hanya menyimpan data terbaru yang menunggu ditulis; data yang sama
+    dengan yang terakhir ditulis diabaikan. Worksheet yang gagal ditulis tetap di antrian
+    dan dicoba lagi dengan jeda yang berlipat hingga `max_delay`; kegagalannya dicatat
+    di `failures()` agar bisa ditampilkan ke pengguna.
+    """
+
+    def __init__(self, delay=FLUSH_DELAY, max_delay=RETRY_MAX_DELAY):
+        self.delay = delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._sheet_locks = {}
+        self._pending = {}
+        self._due = {}
+        self._written = {}
+        self._failures = {}
+        self._timer = None
+        self._timer_at = None
+
+    def sheet_lock(self, worksheet):
+        """Lock per worksheet yang dipegang selama penulisan; pakai juga untuk penulis lain ke worksheet yang sama."""
+        with self._lock:
+            return self._sheet_locks.setdefault(worksheet, threading.RLock())
+
+    def submit(self, target, worksheet, df):
+        digest = frame_digest(df)
+        with self._lock:
+            if self._written.get(worksheet) == digest and worksheet not in self._pending:
+                return False
+            self._pending[worksheet] = (target, df.copy(), digest)
+            self._due.setdefault(worksheet, time.monotonic() + self.delay)
+            self._schedule()
+        return True
+
+    def pending(self):
+        with self._lock:
+            return sorted(self._pending)
+
+    def failures(self):
+        """{worksheet: {"attempts", "error", "time"}} untuk worksheet yang penulisan terakhirnya gagal."""
+        with self._lock:
+            return {worksheet: dict(failure) for worksheet, failure in self._failures.items()}
+
+    def _schedule(self):
+        # Dipanggil dengan self._lock dipegang.
+        if not self._due:
+            return
+        at = min(self._due.values())
+        if self._timer is not None and self._timer_at <= at:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(max(0.0, at - time.monotonic()), self._run)
+        self._timer.daemon = True
+        self._timer_at = at
+        self._timer.start()
+
+    def _run(self):
+        with self._lock:
+            self._timer = None
+            now = time.monotonic()
+            due = [worksheet for worksheet, at in self._due.items() if at <= now]
+        self._write(due)
+        with self._lock:
+            self._schedule()
+
+    def flush(self, worksheet=None):
+        """Tulis sekarang semua worksheet yang menunggu (atau hanya `worksheet`).
+
+        Mengembalikan {worksheet: exception} untuk yang gagal; worksheet tersebut tetap di antrian.
+        """
+        with self._lock:
+            names = list(self._pending) if worksheet is None else [worksheet]
+        errors = self._write(names)
+        with self._lock:
+            self._schedule()
+        return errors
+
+    def _write(self, names):
+        errors = {}
+        for worksheet in names:
+            with self.sheet_lock(worksheet):
+                with self._lock:
+                    item = self._pending.pop(worksheet, None)
+                    self._due.pop(worksheet, None)
+                if item is None:
+                    continue
+                target, df, digest = item
+                try:
+                    with span("sheet_writer.write", sheet=worksheet):
+                        target.write(worksheet, df)
+                except Exception as e:
+                    logger.exception("Gagal menulis worksheet %s", worksheet)
+                    errors[worksheet] = e
+                    with self._lock:
+                        # Data yang lebih baru dari submit selama penulisan tetap diutamakan.
+                        self._pending.setdefault(worksheet, item)
+                        attempts = self._failures.get(worksheet, {}).get("attempts", 0) + 1
+                        self._failures[worksheet] = {"attempts": attempts, "error": str(e), "time": time.time()}
+                        retry = min(self.delay * 2 ** attempts, self.max_delay)
+                        self._due[worksheet] = time.monotonic() + retry
+                else:
+                    with self._lock:
+                        self._written[worksheet] = digest
+                        self._failures.pop(worksheet, None)
+        return errors
+
+
+sheet_writer = WriteBehindWriter()
+atexit.register(sheet_writer.flush)
@@ -0,0 +1,73 @@
+import os
+import re
+import threading
+import time
+
+import joblib
+
+
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", os.path.join("data", "snapshots"))
+SNAPSHOT_KEEP = int(os.environ.get("SNAPSHOT_KEEP", "30"))
+
+_VERSION_FILE = re.compile(r"^v(\d+)\.joblib$")
+_lock = threading.Lock()
+_loaded = {}
+
+
+def _unit_dir(unit, snapshot_dir):
+    return os.path.join(snapshot_dir, unit.lower())
+
+
+def list_versions(unit, snapshot_dir=SNAPSHOT_DIR):
+    try:
+        names = os.listdir(_unit_dir(unit, snapshot_dir))
+    except OSError:
+        return []
+    return sorted(int(m.group(1)) for m in map(_VERSION_FILE.match, names) if m)
+
+
+def save_snapshot(unit, snapshot, snapshot_dir=SNAPSHOT_DIR, keep=SNAPSHOT_KEEP):
+    """Simpan snapshot sebagai versi baru dan hapus versi lama di luar `keep` terakhir.
+
+    Mengembalikan snapshot yang sudah diberi nomor versi dan waktu pembuatan.
+    """
+    directory = _unit_dir(unit, snapshot_dir)
+    os.makedirs(directory, exist_ok=True)
+    with _lock:
+        versions = list_versions(unit, snapshot_dir)
+        version = versions[-1] + 1 if versions else 1
+        snapshot = dict(snapshot, unit=unit, version=version, created_at=time.time())
+        path = os.path.join(directory, f"v{version:05d}.joblib")
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        joblib.dump(snapshot, tmp_path)
+        os.replace(tmp_path, path)
+
+        for old in versions[:max(0, len(versions) + 1 - keep)]:
+            try:
+                os.remove(os.path.join(directory, f"v{old:05d}.joblib"))
+            except OSError:
+                pass
+    return snapshot
+
+
+def load_snapshot(unit, version=None, snapshot_dir=SNAPSHOT_DIR):
+    """Muat snapshot versi tertentu atau yang terbaru; None jika belum ada."""
+    if version is None:
+        versions = list_versions(unit, snapshot_dir)
+        if not versions:
+            return None
+        version = versions[-1]
+
+    directory = _unit_dir(unit, snapshot_dir)
+    path = os.path.join(directory, f"v{version:05d}.joblib")
+    with _lock:
+        cached = _loaded.get(directory)
+        if cached is not None and cached[0] == path:
+            return cached[1]
+    try:
+        snapshot = joblib.load(path)
+    except (OSError, EOFError):
+        return None
+    with _lock:
+        _loaded[directory] = (path, snapshot)
+    return snapshot
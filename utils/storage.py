@@ -0,0 +1,257 @@
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+from gspread.utils import rowcol_to_a1
+
+from utils.tracing import frame_bytes, span
+
+
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "gsheets")
+LOCAL_STORE_PATH = os.environ.get("LOCAL_STORE_PATH", os.path.join("data", "store.sqlite"))
+
+
+def diff_rows(old, new, key="Periode"):
+    """Bandingkan dua frame mentah per `key`; kembalikan periode yang ditambah, diubah, dan dihapus."""
+    old_rows = old.set_index(pd.to_datetime(old[key])).drop(columns=key)
+    new_rows = new.set_index(pd.to_datetime(new[key])).drop(columns=key)
+
+    appended = new_rows.index.difference(old_rows.index, sort=False)
+    deleted = old_rows.index.difference(new_rows.index, sort=False)
+    common = new_rows.index.intersection(old_rows.index, sort=False)
+
+    before = old_rows.loc[common, new_rows.columns]
+    after = new_rows.loc[common]
+    same = (before == after) | (before.isna() & after.isna())
+    updated = common[~same.all(axis=1).values]
+    return appended, updated, deleted
+
+
+def _cell(value):
+    if isinstance(value, pd.Timestamp):
+        return str(value)
+    if pd.isna(value):
+        return ""
+    return value.item() if hasattr(value, "item") else value
+
+
+class GSheetsBackend:
+    """Penyimpanan langsung ke Google Sheets melalui GSheetsConnection.
+
+    Data terakhir yang dibaca/ditulis disimpan sebagai snapshot dalam urutan baris di sheet,
+    sehingga penulisan berikutnya cukup mengirim baris yang berubah. Snapshot dibuang jika
+    penulisan gagal, dan penulisan berikutnya menulis ulang seluruh sheet.
+    """
+
+    def __init__(self, conn_factory):
+        self._conn_factory = conn_factory
+        self._conn = None
+        self._lock = threading.Lock()
+        self._sheet_locks = {}
+        self._snapshots = {}
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = self._conn_factory()
+        return self._conn
+
+    def _sheet_lock(self, sheet_name):
+        with self._lock:
+            return self._sheet_locks.setdefault(sheet_name, threading.Lock())
+
+    def read(self, sheet_name):
+        with self._sheet_lock(sheet_name):
+            with span("conn.read", sheet=sheet_name) as s:
+                df = self.conn.read(worksheet=sheet_name)
+                s.add_bytes(frame_bytes(df))
+            with self._lock:
+                self._snapshots[sheet_name] = df.copy()
+        return df
+
+    def write(self, sheet_name, df):
+        data = df.reset_index()
+        with self._sheet_lock(sheet_name):
+            with self._lock:
+                snapshot = self._snapshots.pop(sheet_name, None)
+            written = None
+            if snapshot is not None:
+                with span("gsheets.write_delta", sheet=sheet_name):
+                    written = self._write_delta(sheet_name, snapshot, data)
+            if written is None:
+                with span("conn.update", sheet=sheet_name) as s:
+                    s.add_bytes(frame_bytes(data))
+                    self.conn.update(worksheet=sheet_name, data=data)
+                written = data
+            with self._lock:
+                self._snapshots[sheet_name] = written
+
+    def _write_delta(self, sheet_name, snapshot, data):
+        """Kirim hanya baris yang berubah dan kembalikan isi sheet sesudahnya (urutan baris sheet).
+
+        Mengembalikan None jika harus menulis ulang seluruh sheet.
+        """
+        if list(snapshot.columns) != list(data.columns) or "Periode" not in data.columns:
+            return None
+        sheet_periods = pd.to_datetime(snapshot["Periode"])
+        rows = data.set_index(pd.to_datetime(data["Periode"]), drop=False)
+        if sheet_periods.duplicated().any() or rows.index.duplicated().any():
+            return None
+
+        appended, updated, deleted = diff_rows(snapshot, data)
+        if len(appended) and len(snapshot) and appended.min() <= sheet_periods.max():
+            return None
+        kept = sheet_periods[~sheet_periods.isin(deleted)]
+        result = rows.loc[list(kept) + sorted(appended)].reset_index(drop=True)
+        if not (len(appended) or len(updated) or len(deleted)):
+            return result
+
+        try:
+            # Belum ada API publik untuk objek gspread di st-gsheets-connection; versinya dipatok
+            # di requirements.txt. Jika atributnya hilang, kembali ke penulisan penuh.
+            worksheet = self.conn.client._select_worksheet(worksheet=sheet_name)
+        except AttributeError:
+            return None
+
+        sheet_rows = {periode: i + 2 for i, periode in enumerate(sheet_periods)}
+        last_col = len(data.columns)
+
+        if len(updated):
+            worksheet.batch_update([
+                {
+                    "range": f"{rowcol_to_a1(sheet_rows[p], 1)}:{rowcol_to_a1(sheet_rows[p], last_col)}",
+                    "values": [[_cell(v) for v in rows.loc[p].values]],
+                }
+                for p in updated
+            ], value_input_option="USER_ENTERED")
+
+        if len(deleted):
+            worksheet.spreadsheet.batch_update({"requests": [
+                {"deleteDimension": {"range": {
+                    "sheetId": worksheet.id,
+                    "dimension": "ROWS",
+                    "startIndex": sheet_rows[p] - 1,
+                    "endIndex": sheet_rows[p],
+                }}}
+                for p in sorted(deleted, key=sheet_rows.get, reverse=True)
+            ]})
+
+        if len(appended):
+            worksheet.append_rows(
+                [[_cell(v) for v in rows.loc[p].values] for p in sorted(appended)],
+                value_input_option="USER_ENTERED"
+            )
+        return result
+
+
+class SQLiteBackend:
+    """Penyimpanan lokal di satu file SQLite, satu tabel per worksheet."""
+
+    def __init__(self, path=LOCAL_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._snapshots = {}
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        return sqlite3.connect(self.path)
+
+    def has(self, sheet_name):
+        with self._connect() as con:
+            row = con.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (sheet_name,)
+            ).fetchone()
+        return row is not None
+
+    def read(self, sheet_name):
+        if not self.has(sheet_name):
+            raise KeyError(f"Worksheet {sheet_name} belum ada di penyimpanan lokal")
+        with self._connect() as con:
+            df = pd.read_sql_query(f'SELECT * FROM "{sheet_name}"', con)
+        self._snapshots[sheet_name] = df.copy()
+        return df
+
+    def write(self, sheet_name, df):
+        data = df.reset_index()
+        if "Periode" in data.columns:
+            data["Periode"] = pd.to_datetime(data["Periode"])
+
+        snapshot = self._snapshots.get(sheet_name)
+        with self._lock, self._connect() as con:
+            if snapshot is not None and list(snapshot.columns) == list(data.columns) and "Periode" in data.columns:
+                appended, updated, deleted = diff_rows(snapshot, data)
+                stale = [str(p) for p in updated.append(deleted)]
+                con.executemany(f'DELETE FROM "{sheet_name}" WHERE "Periode" = ?', [(p,) for p in stale])
+                changed = data[pd.to_datetime(data["Periode"]).isin(updated.append(appended))]
+                changed.to_sql(sheet_name, con, if_exists="append", index=False)
+            else:
+                data.to_sql(sheet_name, con, if_exists="replace", index=False)
+        self._snapshots[sheet_name] = data
+
+
+class MemoryBackend:
+    """Penyimpanan di memori untuk pengujian dan menjalankan aplikasi tanpa jaringan."""
+
+    def __init__(self, sheets=None):
+        self._sheets = {name: df.copy() for name, df in (sheets or {}).items()}
+        self._lock = threading.Lock()
+
+    def has(self, sheet_name):
+        return sheet_name in self._sheets
+
+    def read(self, sheet_name):
+        with self._lock:
+            if sheet_name not in self._sheets:
+                raise KeyError(f"Worksheet {sheet_name} tidak ada")
+            return self._sheets[sheet_name].copy()
+
+    def write(self, sheet_name, df):
+        with self._lock:
+            self._sheets[sheet_name] = df.reset_index()
+
+
+class SyncBackend:
+    """Penyimpanan lokal sebagai sumber baca utama, setiap penulisan diteruskan ke remote.
+
+    Worksheet yang belum ada di lokal diambil sekali dari remote lalu disimpan. Penulisan di
+    background dilakukan pemanggil lewat `sheet_writer`, sama seperti backend lain.
+    """
+
+    def __init__(self, local, remote):
+        self.local = local
+        self.remote = remote
+
+    def read(self, sheet_name):
+        if not self.local.has(sheet_name):
+            df = self.remote.read(sheet_name)
+            self.local.write(sheet_name, df.set_index("Periode"))
+        return self.local.read(sheet_name)
+
+    def write(self, sheet_name, df):
+        self.local.write(sheet_name, df)
+        self.remote.write(sheet_name, df)
+
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage(conn_factory, backend=STORAGE_BACKEND):
+    """Kembalikan backend penyimpanan bersama untuk proses ini sesuai `STORAGE_BACKEND`.
+
+    Pilihan: "gsheets", "sqlite", "memory", atau "sync" (SQLite lokal + Google Sheets).
+    """
+    with _storages_lock:
+        if backend not in _storages:
+            if backend == "gsheets":
+                _storages[backend] = GSheetsBackend(conn_factory)
+            elif backend == "sqlite":
+                _storages[backend] = SQLiteBackend()
+            elif backend == "memory":
+                _storages[backend] = MemoryBackend()
+            elif backend == "sync":
+                _storages[backend] = SyncBackend(SQLiteBackend(), GSheetsBackend(conn_factory))
+            else:
+                raise ValueError(f"Backend penyimpanan tidak dikenal: {backend}")
+        return _storages[backend]
@@ -0,0 +1,181 @@
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+
+TRACE_BUFFER = int(os.environ.get("TRACE_BUFFER", "200"))
+
+_current = contextvars.ContextVar("current_span", default=None)
+
+
+@dataclass
+class Span:
+    """Satu langkah yang diukur: waktu dinding, waktu CPU thread, dan byte yang dipindahkan."""
+    name: str
+    attrs: dict = field(default_factory=dict)
+    started_at: float = 0.0
+    start: float = 0.0
+    wall: float = 0.0
+    cpu: float = 0.0
+    bytes: int = 0
+    error: str = None
+    children: list = field(default_factory=list)
+
+    def add_bytes(self, n):
+        self.bytes += int(n)
+
+    def walk(self, depth=0):
+        yield depth, self
+        for child in sorted(self.children, key=lambda s: s.start):
+            yield from child.walk(depth + 1)
+
+
+class Tracer:
+    """Simpan trace terakhir (span akar beserta anak-anaknya) dalam ring buffer per nama span akar.
+
+    Buffer terpisah per nama agar trace yang sering (misalnya buka dashboard) tidak
+    menggeser trace yang jarang (misalnya refresh terjadwal).
+    """
+
+    def __init__(self, size=TRACE_BUFFER):
+        self.size = size
+        self._lock = threading.Lock()
+        self._traces = {}
+
+    def record(self, root):
+        with self._lock:
+            self._traces.setdefault(root.name, deque(maxlen=self.size)).append(root)
+
+    def names(self):
+        with self._lock:
+            return sorted(self._traces)
+
+    def traces(self, name=None):
+        with self._lock:
+            buffers = [self._traces.get(name, ())] if name is not None else list(self._traces.values())
+            traces = [t for buffer in buffers for t in buffer]
+        return sorted(traces, key=lambda t: t.started_at)
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+
+tracer = Tracer()
+
+
+def current_span():
+    return _current.get()
+
+
+@contextmanager
+def span(name, **attrs):
+    """Ukur blok kode sebagai span di bawah span yang sedang aktif, atau sebagai trace baru."""
+    parent = _current.get()
+    s = Span(name, attrs, started_at=time.time(), start=time.perf_counter())
+    cpu_start = time.thread_time()
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current.reset(token)
+        s.wall = time.perf_counter() - s.start
+        s.cpu = time.thread_time() - cpu_start
+        if parent is not None:
+            parent.children.append(s)
+        else:
+            tracer.record(s)
+
+
+def traced(func):
+    """Dekorator: setiap pemanggilan `func` dicatat sebagai span dengan nama fungsinya."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def add_bytes(n):
+    """Tambahkan jumlah byte yang dipindahkan ke span aktif, jika ada."""
+    s = _current.get()
+    if s is not None:
+        s.add_bytes(n)
+
+
+def frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def in_context(func):
+    """Bungkus `func` agar berjalan dengan span aktif saat ini, misalnya di ThreadPoolExecutor."""
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+def call_traced(func, *args, **kwargs):
+    """Jalankan `func` (misalnya di proses lain) dan kembalikan (hasil, span) untuk digabung dengan `attach`."""
+    with span(func.__name__) as s:
+        result = func(*args, **kwargs)
+    return result, s
+
+
+def attach(child):
+    """Gabungkan span yang diukur di proses lain ke span aktif, atau simpan sebagai trace baru."""
+    parent = _current.get()
+    if parent is not None:
+        parent.children.append(child)
+    else:
+        tracer.record(child)
+
+
+def waterfall(root):
+    """Ratakan satu trace menjadi baris (nama, kedalaman, mulai, durasi) untuk diagram waterfall."""
+    return pd.DataFrame([
+        {
+            "Span": s.name,
+            "Kedalaman": depth,
+            "Mulai (ms)": (s.start - root.start) * 1000,
+            "Durasi (ms)": s.wall * 1000,
+            "CPU (ms)": s.cpu * 1000,
+            "Byte": s.bytes,
+            "Atribut": ", ".join(f"{k}={v}" for k, v in s.attrs.items()),
+            "Error": s.error,
+        }
+        for depth, s in root.walk()
+    ])
+
+
+def stage_stats(traces):
+    """Ringkasan p50/p95 durasi per nama span dari beberapa trace."""
+    rows = {}
+    for root in traces:
+        for _, s in root.walk():
+            rows.setdefault(s.name, []).append(s)
+
+    summary = []
+    for name, spans in rows.items():
+        wall = np.array([s.wall for s in spans]) * 1000
+        summary.append({
+            "Span": name,
+            "Jumlah": len(spans),
+            "p50 (ms)": float(np.percentile(wall, 50)),
+            "p95 (ms)": float(np.percentile(wall, 95)),
+            "Maks (ms)": float(wall.max()),
+            "CPU p50 (ms)": float(np.percentile([s.cpu * 1000 for s in spans], 50)),
+            "Byte p50": float(np.percentile([s.bytes for s in spans], 50)),
+            "Error": sum(s.error is not None for s in spans),
+        })
+    if not summary:
+        return pd.DataFrame()
+    return pd.DataFrame(summary).sort_values("p95 (ms)", ascending=False, ignore_index=True)
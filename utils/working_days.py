@@ -0,0 +1,39 @@
+from functools import lru_cache
+
+import holidays
+import numpy as np
+import pandas as pd
+
+
+WEEKMASK = "1111100"
+
+
+@lru_cache(maxsize=16)
+def get_calendar(start_year, end_year, extra_holidays=()):
+    """Kalender hari kerja Indonesia untuk rentang tahun, dibangun sekali lalu disimpan."""
+    indo_holidays = holidays.country_holidays('ID', years=range(start_year, end_year + 1))
+    dates = set(indo_holidays.keys()) | {pd.Timestamp(d).date() for d in extra_holidays}
+    holiday_array = np.array(sorted(dates), dtype="datetime64[D]")
+    return np.busdaycalendar(weekmask=WEEKMASK, holidays=holiday_array)
+
+
+def effective_working_days(periods, extra_holidays=()):
+    """Hitung hari kerja efektif untuk sekumpulan bulan sekaligus.
+
+    `extra_holidays` dapat diisi libur perusahaan atau cuti bersama tambahan.
+    """
+    months = pd.DatetimeIndex(periods).to_period("M")
+    if len(months) == 0:
+        return np.array([], dtype=int)
+
+    calendar = get_calendar(
+        int(months.year.min()), int(months.year.max()),
+        tuple(sorted(pd.Timestamp(d).date() for d in extra_holidays))
+    )
+    starts = months.to_timestamp().values.astype("datetime64[D]")
+    ends = (months + 1).to_timestamp().values.astype("datetime64[D]")
+    return np.busday_count(starts, ends, busdaycal=calendar)
+
+
+def get_effective_working_days(year, month, extra_holidays=()):
+    return int(effective_working_days([pd.Timestamp(year, month, 1)], extra_holidays)[0])